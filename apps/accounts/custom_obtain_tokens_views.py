@@ -1,17 +1,43 @@
+import uuid
+from typing import Optional
+
 from django.contrib.auth.backends import AllowAllUsersModelBackend
+from django.contrib.auth.models import update_last_login
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.exceptions import PermissionDenied
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
 from .exceptions import UnauthorizedException
 from .serializers.token_serializers import TokenRefreshSerializerForStaff
 from services.confirmation_token_codec import ConfirmationTokenCodec
 from apps.verification import tasks
-from services.carts.cart_utils import clone_cart_items
+from apps.carts import tasks as cart_tasks
+from dependencies.service_dependencies.carts import get_cart_service
+
+
+def get_uuid_or_none(value) -> Optional[uuid.UUID]:
+    try:
+        return uuid.UUID(str(value)) if value else None
+    except ValueError:
+        return None
 
 
-class TokenObtainPairViewForRegularUsers(TokenObtainPairView):
+class SingleAuthenticationTokenObtainPairView(TokenObtainPairView):
+    """
+    Token obtain view which issues tokens for the user authenticated by the view itself,
+    so the password is hashed once per login instead of once more by the token serializer.
+    """
+    def get_tokens_response(self, user) -> Response:
+        refresh = self.get_serializer_class().get_token(user)
+        if api_settings.UPDATE_LAST_LOGIN:
+            update_last_login(None, user)
+
+        return Response({"refresh": str(refresh), "access": str(refresh.access_token)}, status=status.HTTP_200_OK)
+
+
+class TokenObtainPairViewForRegularUsers(SingleAuthenticationTokenObtainPairView):
     """
     Custom token obtain/refresh view for regular users.
     """
@@ -23,18 +49,20 @@ class TokenObtainPairViewForRegularUsers(TokenObtainPairView):
         if not user:
             raise UnauthorizedException
 
-        if cart_uuid := request.data.get("copy_cart_items_from"):
-            clone_cart_items(user.id, cart_uuid)
+        if cart_uuid := get_uuid_or_none(request.data.get("copy_cart_items_from")):
+            # Items are merged by the task, the request for the user's cart merges them if the task is late
+            get_cart_service().schedule_cart_items_merge(user.id, cart_uuid)
+            cart_tasks.merge_cart_items_after_login.send(user.id, str(cart_uuid))
 
         if not user.is_active:
             tasks.send_code_signup_confirmation.send(user.email)
             token = ConfirmationTokenCodec.encode_email_confirmation_token({"email": user.email, "id": user.id})
             return Response({"token": token}, status=status.HTTP_400_BAD_REQUEST)
 
-        return super().post(request, *args, **kwargs)
+        return self.get_tokens_response(user)
 
 
-class TokenObtainPairViewForStaff(TokenObtainPairView):
+class TokenObtainPairViewForStaff(SingleAuthenticationTokenObtainPairView):
     """
     Custom token obtain/refresh view for staff users
     """
@@ -43,13 +71,14 @@ class TokenObtainPairViewForStaff(TokenObtainPairView):
 
         user = backend.authenticate(request, email=request.data.get("email"), password=request.data.get("password"))
 
-        if not user:
+        # Tokens aren't issued for inactive users, like by the token serializer
+        if not user or not user.is_active:
             raise UnauthorizedException
 
         if not user.is_staff or not user.is_superuser:
             raise PermissionDenied
 
-        return super().post(request, *args, **kwargs)
+        return self.get_tokens_response(user)
 
 
 class TokenRefreshViewForStaff(TokenRefreshView):
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, ScryptPasswordHasher, Argon2PasswordHasher
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2 hasher with the number of iterations from the settings.
+    Hashes with a different number of iterations are rehashed on login.
+    """
+    iterations = settings.PASSWORD_HASHER_PBKDF2_ITERATIONS or PBKDF2PasswordHasher.iterations
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    """
+    Scrypt hasher with the work factor and parallelism from the settings.
+    """
+    work_factor = settings.PASSWORD_HASHER_SCRYPT_WORK_FACTOR or ScryptPasswordHasher.work_factor
+    parallelism = settings.PASSWORD_HASHER_PARALLELISM or ScryptPasswordHasher.parallelism
+    # Scrypt uses 128 * work_factor * block_size * parallelism bytes, the limit of OpenSSL is 32MB by default
+    maxmem = 2 * 128 * work_factor * ScryptPasswordHasher.block_size * parallelism
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """
+    Argon2 hasher with the memory cost and parallelism from the settings.
+    """
+    memory_cost = settings.PASSWORD_HASHER_ARGON2_MEMORY_COST or Argon2PasswordHasher.memory_cost
+    parallelism = settings.PASSWORD_HASHER_PARALLELISM or Argon2PasswordHasher.parallelism
@@ -2,9 +2,13 @@ from django.test import TestCase
 from django.urls import reverse
 from rest_framework.test import APITestCase
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password, get_hasher, make_password
 from rest_framework import status
 from unittest import mock
 
+from apps.carts.models import Cart, CartItem
+from apps.products.factories import ProductFactory
+
 Account = get_user_model()
 
 class MyTestCase(TestCase):
@@ -85,3 +89,68 @@ class TestLogin(APITestCase):
 
         # Check that send_code_signup_confirmation.delay was called once with the user email
         mocked_send_email.assert_called_once_with(data["email"])
+
+    @mock.patch('apps.carts.tasks.merge_cart_items_after_login.send')
+    def test_login_merges_anonymous_cart_after_tokens_are_issued(self, mocked_merge_task):
+        """Items of the anonymous cart are merged by the task, the user's cart shows them while it's pending"""
+        Cart.objects.create(user=self.user)
+        anonymous_cart = Cart.objects.create()
+        product = ProductFactory.create(stock=10, max_order_qty=10)
+        CartItem.objects.create(cart=anonymous_cart, product=product, quantity=2)
+
+        response = self.client.post(
+            reverse('token_obtain_pair'),
+            data={
+                'email': self.user.email,
+                'password': self.password,
+                'copy_cart_items_from': str(anonymous_cart.cart_uuid),
+            },
+            format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        mocked_merge_task.assert_called_once_with(self.user.id, str(anonymous_cart.cart_uuid))
+        self.assertFalse(CartItem.objects.filter(cart__user=self.user).exists())
+
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + response.data["access"])
+        response = self.client.get(reverse('user_get-full-information'),
+                                   data={'cart_uuid': str(anonymous_cart.cart_uuid)})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            list(CartItem.objects.filter(cart__user=self.user).values_list('product_id', 'quantity')),
+            [(product.object_id, 2)],
+        )
+        self.assertEqual(response.data["cart"]["items"], {product.object_id: {"quantity": 2}})
+
+    def test_login_checks_password_once(self):
+        """The password is hashed once per login and the issued tokens belong to the user"""
+        with mock.patch('django.contrib.auth.base_user.check_password', wraps=check_password) as mocked_check:
+            response = self.client.post(
+                reverse('token_obtain_pair'),
+                data={'email': self.user.email, 'password': self.password},
+                format='json'
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(mocked_check.call_count, 1)
+        self.assertIn('refresh', response.data)
+
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + response.data["access"])
+        response = self.client.get(reverse('user_get-full-information'))
+        self.assertEqual(response.data["user"]["email"], self.user.email)
+
+    def test_login_rehashes_password_with_configured_hasher(self):
+        """Password hashed by the previous hasher is rehashed by the configured one on login"""
+        self.user.password = make_password(self.password, hasher='pbkdf2_sha1')
+        self.user.save(update_fields=['password'])
+
+        response = self.client.post(
+            reverse('token_obtain_pair'),
+            data={'email': self.user.email, 'password': self.password},
+            format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith(f"{get_hasher().algorithm}$"))
@@ -1,3 +1,4 @@
+from django.db import transaction
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.response import Response
 from rest_framework import status
@@ -31,8 +32,9 @@ class AddressModelViewSet(ModelViewSet):
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        address = self.perform_write_operation(serializer)
-        self.address_replicator.replicate_address_creation(address)
+        with transaction.atomic():
+            address = self.perform_write_operation(serializer)
+            self.address_replicator.replicate_address_creation(address)
         headers = self.get_success_headers(serializer.data)
         serialized_address = serializer.data
         serialized_address['oneline_repr'] = address.format_address()
@@ -43,8 +45,9 @@ class AddressModelViewSet(ModelViewSet):
         instance = self.get_object()
         serializer = self.get_serializer(instance, data=request.data, partial=partial)
         serializer.is_valid(raise_exception=True)
-        address = self.perform_write_operation(serializer)
-        self.address_replicator.replicate_address_update(address)
+        with transaction.atomic():
+            address = self.perform_write_operation(serializer)
+            self.address_replicator.replicate_address_update(address)
         if getattr(instance, '_prefetched_objects_cache', None):
             # If 'prefetch_related' has been applied to a queryset, we need to
             # forcibly invalidate the prefetch cache on the instance.
@@ -55,6 +58,7 @@ class AddressModelViewSet(ModelViewSet):
     def destroy(self, request, *args, **kwargs):
         address = self.get_object()
         address.user = None
-        address.save()
-        self.address_replicator.replicate_address_delete(address.id)
+        with transaction.atomic():
+            address.save()
+            self.address_replicator.replicate_address_delete(address.id)
         return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,60 @@
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from apps.carts.model_serializers.cart_item import CartItemWithProductSerializer
+from apps.carts.models import CartItem
+from apps.products.models import Product
+from apps.products.pricing import price_items
+
+
+class Command(BaseCommand):
+    help = 'Compares pricing of cart items with per-item properties and with one pass of the pricing engine'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=100, help='Number of items in the cart')
+        parser.add_argument('--iterations', type=int, default=1000, help='Number of priced carts')
+
+    @staticmethod
+    def make_cart_items(count: int) -> list[CartItem]:
+        cart_items = []
+        for i in range(count):
+            product = Product(
+                object_id=str(i), name=f"Product {i}", price=Decimal(random.randint(100, 100000)) / 100,
+                discount_rate=random.choice([None, Decimal("0.10"), Decimal("0.25")]),
+                tax_rate=Decimal("0.20"), stock=100, max_order_qty=10, sku=f"SKU-{i}", image="https://example.com",
+            )
+            cart_items.append(CartItem(product=product, product_id=product.object_id, quantity=random.randint(1, 5)))
+
+        return cart_items
+
+    def measure(self, name: str, iterations: int, func) -> None:
+        started_at = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        elapsed = time.perf_counter() - started_at
+        self.stdout.write(f"{name}: {elapsed / iterations * 1000:.3f}ms per cart")
+
+    def handle(self, *args, **options):
+        cart_items = self.make_cart_items(options['items'])
+        iterations = options['iterations']
+
+        def price_with_properties():
+            # Amounts used by the cart details, every property prices the item again
+            for cart_item in cart_items:
+                _ = (cart_item.product.discounted_price, cart_item.product.tax_amount,
+                     cart_item.total_item_price, cart_item.total_item_tax)
+
+        def price_with_engine():
+            price_items(cart_item.product.get_pricing_row(cart_item.quantity) for cart_item in cart_items)
+
+        self.measure('per-item properties', iterations, price_with_properties)
+        self.measure('pricing engine', iterations, price_with_engine)
+
+        # Empty priced items make the serializer fall back to the per-item properties
+        self.measure('serializer with per-item properties', iterations // 10 or 1,
+                     lambda: CartItemWithProductSerializer(cart_items, many=True, context={"priced_items": {}}).data)
+        self.measure('serializer with pricing engine', iterations // 10 or 1,
+                     lambda: CartItemWithProductSerializer(cart_items, many=True).data)
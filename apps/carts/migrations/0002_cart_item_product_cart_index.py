@@ -0,0 +1,18 @@
+# Generated by Django 5.0.2 on 2026-10-18 16:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('carts', '0001_initial'),
+        ('products', '0002_product_event_id'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cartitem',
+            index=models.Index(fields=['product', 'cart'], name='cart_item_product_cart_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.0.2 on 2026-10-18 16:13
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Sum
+
+
+def delete_duplicated_cart_items(apps, schema_editor):
+    # The latest item of the product in the cart is kept with the quantities of all items, capped by the stock
+    CartItem = apps.get_model('carts', 'CartItem')
+    Product = apps.get_model('products', 'Product')
+    duplicates = CartItem.objects.values('cart_id', 'product_id').annotate(
+        items_count=Count('id'), latest_id=Max('id'), total_quantity=Sum('quantity'),
+    ).filter(items_count__gt=1)
+    for duplicate in duplicates.iterator():
+        latest_item = CartItem.objects.get(id=duplicate['latest_id'])
+        stock = Product.objects.filter(object_id=duplicate['product_id']).values_list('stock', flat=True).first()
+        # The quantity of the kept item isn't lowered, even if it's already above the stock
+        latest_item.quantity = max(min(duplicate['total_quantity'], stock or 0), latest_item.quantity)
+        latest_item.save(update_fields=['quantity'])
+        CartItem.objects.filter(
+            cart_id=duplicate['cart_id'], product_id=duplicate['product_id'],
+        ).exclude(id=duplicate['latest_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('carts', '0002_cart_item_product_cart_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicated_cart_items, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='cartitem',
+            constraint=models.UniqueConstraint(fields=('cart', 'product'), name='cart_item_cart_product_unique'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.2 on 2026-10-18 16:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('carts', '0003_cart_item_cart_product_unique'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cart',
+            index=models.Index(condition=models.Q(('user__isnull', True)), fields=['updated_at'], name='cart_anonymous_updated_idx'),
+        ),
+    ]
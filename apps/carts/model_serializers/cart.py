@@ -3,14 +3,20 @@ from rest_framework import serializers
 
 
 class CartSerializer(serializers.ModelSerializer):
+    """
+    Pass the precomputed cart summary in the context ("summary" key)
+    to avoid aggregate queries for the total and count fields.
+    """
     total = serializers.SerializerMethodField(read_only=True)
     count = serializers.SerializerMethodField(read_only=True)
 
     def get_total(self, obj):
-        return obj.total
+        summary = self.context.get("summary")
+        return summary.total if summary is not None else obj.total
 
     def get_count(self, obj):
-        return obj.count
+        summary = self.context.get("summary")
+        return summary.count if summary is not None else obj.count
 
     class Meta:
         model = Cart
@@ -2,13 +2,25 @@ from rest_framework import serializers
 
 from apps.carts.models import CartItem
 from apps.products.models import Product
+from apps.products.pricing import price_items
 
 
 class ProductCartItemSerializer(serializers.ModelSerializer):
-    discounted_price = serializers.ReadOnlyField()
-    tax_amount = serializers.ReadOnlyField()
+    """
+    Prices calculated by the parent serializer are taken from the context ("priced_items" key).
+    """
+    discounted_price = serializers.SerializerMethodField()
+    tax_amount = serializers.SerializerMethodField()
     tax_percentage = serializers.ReadOnlyField()
 
+    def get_discounted_price(self, obj):
+        priced_item = self.context.get("priced_items", {}).get(obj.object_id)
+        return priced_item.discounted_price if priced_item is not None else obj.discounted_price
+
+    def get_tax_amount(self, obj):
+        priced_item = self.context.get("priced_items", {}).get(obj.object_id)
+        return priced_item.tax_amount if priced_item is not None else obj.tax_amount
+
     class Meta:
         model = Product
         fields = ('object_id', 'name', 'stock', 'max_order_qty', 'discounted_price', 'tax_amount',
@@ -16,13 +28,41 @@ class ProductCartItemSerializer(serializers.ModelSerializer):
 
 
 class CartItemSerializer(serializers.ModelSerializer):
+    product = serializers.CharField(source='product_id', read_only=True)
+
     class Meta:
         model = CartItem
         exclude = ('cart',)
 
 
+class PricedCartItemListSerializer(serializers.ListSerializer):
+    """
+    Prices all cart items in one pass before their serialization,
+    unless the prices are already passed in the context ("priced_items" key).
+    """
+    def to_representation(self, data):
+        cart_items = list(data.all() if hasattr(data, 'all') else data)
+        if "priced_items" not in self.context:
+            pricing = price_items(cart_item.product.get_pricing_row(cart_item.quantity) for cart_item in cart_items)
+            self.context["priced_items"] = {
+                cart_item.product_id: priced_item for cart_item, priced_item in zip(cart_items, pricing.items)
+            }
+
+        return super().to_representation(cart_items)
+
+
 class CartItemWithProductSerializer(CartItemSerializer):
-    total_item_price = serializers.ReadOnlyField()
-    total_item_tax = serializers.ReadOnlyField()
+    total_item_price = serializers.SerializerMethodField()
+    total_item_tax = serializers.SerializerMethodField()
     product = ProductCartItemSerializer(read_only=True)
 
+    def get_total_item_price(self, obj):
+        priced_item = self.context.get("priced_items", {}).get(obj.product_id)
+        return priced_item.total_price if priced_item is not None else obj.total_item_price
+
+    def get_total_item_tax(self, obj):
+        priced_item = self.context.get("priced_items", {}).get(obj.product_id)
+        return priced_item.total_tax if priced_item is not None else obj.total_item_tax
+
+    class Meta(CartItemSerializer.Meta):
+        list_serializer_class = PricedCartItemListSerializer
@@ -1,10 +1,12 @@
 import uuid
+from typing import List, Optional, Tuple
+
 from django.contrib.auth import get_user_model
-from django.db import models
-from django.db.models import Sum, F, ExpressionWrapper
-from django.db.models.functions import Coalesce
+from django.db import models, connection
+from django.db.models import Sum
 
 from apps.products.models import Product
+from apps.products.pricing import PricingRow, price_item, price_items
 
 
 User = get_user_model()
@@ -16,6 +18,13 @@ class Cart(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Inactive anonymous carts are found for deletion without reading the carts of users
+            models.Index(fields=['updated_at'], condition=models.Q(user__isnull=True),
+                         name='cart_anonymous_updated_idx'),
+        ]
+
     @property
     def count(self):
         """
@@ -31,14 +40,8 @@ class Cart(models.Model):
         Returns the total cost of all items in the cart, accounting for any discounts on products.
         The total is dynamically calculated from the cart items, using the product's price and discount rate.
         """
-        result = self.items.annotate(
-                discounted_price=ExpressionWrapper(F('quantity') * (
-                        F('product__price') - (F('product__price') * Coalesce(F('product__discount_rate'), 0))
-                ), output_field=models.DecimalField())
-            ).aggregate(
-                total=Sum('discounted_price'),
-            )['total'] or 0.00
-        return round(result, 2)
+        rows = self.items.values_list('product__price', 'product__discount_rate', 'product__tax_rate', 'quantity')
+        return price_items(PricingRow(*row) for row in rows).total
 
     def clear(self):
         """
@@ -54,6 +57,18 @@ class CartItem(models.Model):
     cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name="items", to_field='cart_uuid')
     product = models.ForeignKey(Product, on_delete=models.CASCADE, to_field='object_id')
     quantity = models.PositiveIntegerField(default=1)
+    # How the quantity of the product which is in both carts is combined when carts are merged
+    MERGE_QUANTITY_POLICIES = ('sum', 'max', 'replace')
+
+    class Meta:
+        indexes = [
+            # Carts containing the product are found using only the index
+            models.Index(fields=['product', 'cart'], name='cart_item_product_cart_idx'),
+        ]
+        constraints = [
+            # Conflict target of the cart item upsert
+            models.UniqueConstraint(fields=['cart', 'product'], name='cart_item_cart_product_unique'),
+        ]
 
     @classmethod
     def change_quantity_or_create(cls, validated_data):
@@ -76,13 +91,94 @@ class CartItem(models.Model):
 
         return cart_item, created
 
+    @classmethod
+    def upsert_if_able_to_add(cls, cart_id: uuid.UUID, product_id: str,
+                              quantity: int) -> Optional[Tuple['CartItem', bool]]:
+        """
+        Creates the cart item or changes its quantity with one statement,
+        if the cart exists and the product is for sale and the quantity is within its stock and max order quantity.
+        :return: Tuple with the CartItem object and bool value that indicates whether the cart item created,
+        or None if nothing is changed.
+        """
+        quote_name = connection.ops.quote_name
+        cart_item_table, cart_table, product_table = (
+            quote_name(cls._meta.db_table), quote_name(Cart._meta.db_table), quote_name(Product._meta.db_table)
+        )
+        cart_uuid = Cart._meta.get_field('cart_uuid').get_db_prep_value(cart_id, connection)
+        # The row to insert is selected only if the cart and the product satisfy the conditions
+        guarded_row_sql = (
+            f"SELECT c.cart_uuid, p.object_id, %s FROM {cart_table} c, {product_table} p "
+            f"WHERE c.cart_uuid = %s AND p.object_id = %s AND p.for_sale = %s "
+            f"AND p.stock >= %s AND p.max_order_qty >= %s"
+        )
+        guarded_row_params = [quantity, cart_uuid, product_id, True, quantity, quantity]
+        upsert_sql = (
+            f"INSERT INTO {cart_item_table} (cart_id, product_id, quantity) {guarded_row_sql} "
+            f"ON CONFLICT (cart_id, product_id) DO UPDATE SET quantity = EXCLUDED.quantity"
+        )
+
+        with connection.cursor() as cursor:
+            # xmax of the inserted row version is 0, while the updated one has the id of the updating transaction
+            cursor.execute(f"{upsert_sql} RETURNING id, (xmax = 0)", guarded_row_params)
+            row = cursor.fetchone()
+
+        if row is None:
+            return None
+
+        cart_item_id, created = row
+        return cls(id=cart_item_id, cart_id=cart_id, product_id=product_id, quantity=quantity), bool(created)
+
+    @classmethod
+    def merge_cart_items(cls, source_cart_id: uuid.UUID, target_cart_id: uuid.UUID,
+                         quantity_policy: str = 'sum') -> List['CartItem']:
+        """
+        Copies items of the source cart to the target cart with one statement.
+        Products which aren't for sale are skipped, quantities are capped by the stock and max order quantity
+        of the product, and the quantity of the product which is already in the target cart is combined
+        by the quantity policy: "sum" adds quantities, "max" keeps the larger one and "replace" takes the copied one.
+        :return: Created and changed cart items of the target cart.
+        """
+        if quantity_policy not in cls.MERGE_QUANTITY_POLICIES:
+            raise ValueError(f"Unknown quantity policy: {quantity_policy}")
+
+        quote_name = connection.ops.quote_name
+        cart_item_table, product_table = quote_name(cls._meta.db_table), quote_name(Product._meta.db_table)
+        cart_uuid_field = Cart._meta.get_field('cart_uuid')
+        source_cart_uuid, target_cart_uuid = (cart_uuid_field.get_db_prep_value(source_cart_id, connection),
+                                              cart_uuid_field.get_db_prep_value(target_cart_id, connection))
+
+        product_limit_sql = (f"(SELECT LEAST(p.stock, p.max_order_qty) FROM {product_table} p "
+                             f"WHERE p.object_id = EXCLUDED.product_id)")
+        merged_quantity_sql = {
+            'sum': f"LEAST({cart_item_table}.quantity + EXCLUDED.quantity, {product_limit_sql})",
+            'max': f"GREATEST({cart_item_table}.quantity, EXCLUDED.quantity)",
+            'replace': "EXCLUDED.quantity",
+        }[quantity_policy]
+        merge_sql = (
+            f"INSERT INTO {cart_item_table} (cart_id, product_id, quantity) "
+            f"SELECT %s, ci.product_id, LEAST(ci.quantity, p.stock, p.max_order_qty) "
+            f"FROM {cart_item_table} ci JOIN {product_table} p ON p.object_id = ci.product_id "
+            f"WHERE ci.cart_id = %s AND p.for_sale = %s AND LEAST(ci.quantity, p.stock, p.max_order_qty) > 0 "
+            f"ON CONFLICT (cart_id, product_id) DO UPDATE SET quantity = {merged_quantity_sql} "
+            # Rows whose quantity stays the same aren't updated and returned
+            f"WHERE {cart_item_table}.quantity <> {merged_quantity_sql} "
+            f"RETURNING id, product_id, quantity"
+        )
+
+        with connection.cursor() as cursor:
+            cursor.execute(merge_sql, [target_cart_uuid, source_cart_uuid, True])
+            rows = cursor.fetchall()
+
+        return [cls(id=cart_item_id, cart_id=target_cart_id, product_id=product_id, quantity=quantity)
+                for cart_item_id, product_id, quantity in rows]
+
     @property
     def total_item_price(self):
-        return round(self.product.discounted_price * self.quantity, 2)
+        return price_item(self.product.get_pricing_row(self.quantity)).total_price
 
     @property
     def total_item_tax(self):
-        return round((self.product.discounted_price * self.product.tax_rate) * self.quantity, 2)
+        return price_item(self.product.get_pricing_row(self.quantity)).total_tax
 
     def __str__(self):
         return f"{self.quantity} x {self.product.name}"
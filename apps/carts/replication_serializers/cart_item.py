@@ -4,6 +4,10 @@ from apps.carts.models import CartItem
 
 
 class CartItemReplicationSerializer(serializers.ModelSerializer):
+    # Keys are read from the cart item itself, so the cart and the product aren't fetched
+    cart = serializers.UUIDField(source='cart_id', read_only=True)
+    product = serializers.CharField(source='product_id', read_only=True)
+
     class Meta:
         model = CartItem
         fields = '__all__'
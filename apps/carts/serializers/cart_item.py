@@ -7,3 +7,25 @@ class CreateCartItemSerializer(serializers.Serializer):
     cart_id = serializers.UUIDField()
     product_id = serializers.CharField(min_length=1)
     quantity = serializers.IntegerField(default=1)
+
+
+class CartItemChangeSerializer(serializers.Serializer):
+    """
+    Change of one cart item in the batch, the cart item is deleted if the quantity is 0
+    """
+    product_id = serializers.CharField(min_length=1)
+    quantity = serializers.IntegerField(min_value=0)
+
+
+class BatchCartItemChangesSerializer(serializers.Serializer):
+    MAX_ITEMS_COUNT = 100
+
+    items = CartItemChangeSerializer(many=True, allow_empty=False)
+
+    def validate_items(self, items):
+        if len(items) > self.MAX_ITEMS_COUNT:
+            raise serializers.ValidationError(f"No more than {self.MAX_ITEMS_COUNT} items can be changed at once")
+        product_ids = [item["product_id"] for item in items]
+        if len(set(product_ids)) != len(product_ids):
+            raise serializers.ValidationError("Every product can be changed only once in the batch")
+        return items
@@ -5,8 +5,19 @@ import logging
 import dramatiq
 from dramatiq_crontab import cron
 
-from .models import Cart
-from apps.core.tasks import perform_data_topic_replication
+from dependencies.service_dependencies.carts import (
+    get_inactive_cart_purger, get_cart_activity_tracker, get_cart_service,
+)
+
+
+@cron("*/5 * * * *") # Run Task Every 5 Minutes
+@dramatiq.actor
+def flush_cart_activity():
+    """
+    Writes the time of the last changes of cart items to the carts.
+    """
+    carts_count = get_cart_activity_tracker().flush()
+    logging.info(f"Flushed the activity of {carts_count} carts")
 
 
 @cron(f"0 0 */{settings.DELETE_INACTIVE_CARTS_PERIOD_DAYS} * *") # Run Task Every N Days
@@ -14,9 +25,19 @@ from apps.core.tasks import perform_data_topic_replication
 def delete_inactive_carts():
     # Get the time 1 day (24 hours) ago from now
     one_day_ago = timezone.now() - timedelta(days=1)
+    # Carts whose items were changed since the last flush aren't inactive
+    get_cart_activity_tracker().flush()
     logging.info("Deleting inactive carts...")
-    Cart.objects.filter(updated_at__lte=one_day_ago, user__isnull=True).delete()
-    perform_data_topic_replication.send(
-        settings.USERS_DATA_CRUD_EXCHANGE_TOPIC_NAME,
-        'users.carts.delete_inactive_carts', {"updated_at_lte": str(one_day_ago), },
+    result = get_inactive_cart_purger().purge(one_day_ago)
+    logging.info(
+        f"Deleted {result.deleted_carts_count} inactive carts and {result.deleted_items_count} cart items "
+        f"in {result.elapsed_seconds:.1f}s"
     )
+
+
+@dramatiq.actor
+def merge_cart_items_after_login(user_id: int, cart_uuid: str):
+    """
+    Merges items of the anonymous cart into the cart of the user who logged in.
+    """
+    get_cart_service().merge_pending_cart_items(user_id, cart_uuid)
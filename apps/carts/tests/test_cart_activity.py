@@ -0,0 +1,68 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..models import Cart
+from apps.products.factories import ProductFactory
+from dependencies.service_dependencies.carts import get_cart_activity_tracker
+from services.carts.cart_activity_tracker import CartActivityTracker
+from services.carts.cart_replicator import CartReplicator
+from services.carts.inactive_cart_purger import InactiveCartPurger
+
+
+class TestCartActivityTracker(TestCase):
+    def setUp(self):
+        self.redis_client = get_cart_activity_tracker().redis_client
+        self.tracker = CartActivityTracker(self.redis_client, Cart.objects.all(), throttle_seconds=60,
+                                           key='carts:activity:test')
+        self.redis_client.delete(self.tracker.key)
+        self.addCleanup(self.redis_client.delete, self.tracker.key)
+
+        self.two_days_ago = timezone.now() - timedelta(days=2)
+        self.carts = [Cart.objects.create() for _ in range(3)]
+        Cart.objects.update(updated_at=self.two_days_ago)
+
+    def test_activity_is_recorded_once_per_throttle_period(self):
+        active_at = timezone.now()
+        self.tracker.touch(self.carts[0].cart_uuid, active_at)
+        self.tracker.touch(self.carts[0].cart_uuid, active_at + timedelta(seconds=1))
+
+        self.assertEqual(self.redis_client.zscore(self.tracker.key, str(self.carts[0].cart_uuid)),
+                         active_at.timestamp())
+
+    def test_flushed_activity_keeps_active_carts_from_purge(self):
+        active_at = timezone.now() - timedelta(hours=1)
+        self.tracker.touch(self.carts[0].cart_uuid, active_at)
+        self.tracker.touch(self.carts[1].cart_uuid, active_at)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.tracker.flush(), 2)
+        self.assertEqual(self.tracker.flush(), 0)
+
+        self.carts[0].refresh_from_db()
+        self.assertEqual(self.carts[0].updated_at, active_at)
+
+        InactiveCartPurger(Cart.objects.all(), CartReplicator()).purge(timezone.now() - timedelta(days=1))
+        self.assertEqual(set(Cart.objects.values_list('id', flat=True)), {self.carts[0].id, self.carts[1].id})
+
+
+class TestCartActivityOfRequests(APITestCase):
+    def setUp(self):
+        self.tracker = get_cart_activity_tracker()
+        self.cart = Cart.objects.create()
+        self.product = ProductFactory.create()
+        self.product.stock = self.product.max_order_qty = 5
+        self.product.save()
+
+    def test_adding_cart_item_records_activity(self):
+        response = self.client.post(reverse('create-cart-item', kwargs={"cart_uuid": self.cart.cart_uuid}),
+                                    data={"product_id": self.product.object_id, "quantity": 1}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        cart_uuid = str(self.cart.cart_uuid)
+        self.addCleanup(self.tracker.redis_client.zrem, self.tracker.key, cart_uuid)
+        self.assertIsNotNone(self.tracker.redis_client.zscore(self.tracker.key, cart_uuid))
@@ -0,0 +1,103 @@
+from decimal import Decimal
+from typing import List
+from unittest import mock
+
+from django.core.cache import caches
+from django.urls import reverse
+from redis.exceptions import ConnectionError as RedisConnectionError
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..models import Cart, CartItem
+from apps.products.factories import ProductFactory
+from apps.products.models import Product
+from dependencies.service_dependencies.carts import get_cart_service
+from services.products.replication.update import ProductModifier
+
+
+class TestCartCache(APITestCase):
+    def setUp(self):
+        caches['carts'].clear()
+        # create multiple product instances
+        self.products: List[Product] = [ProductFactory.create() for _ in range(3)]
+        self.products[0].max_order_qty = 6
+        self.products[0].stock = 4
+        self.products[0].save()
+
+        self.cart = Cart.objects.create(user_id=None)
+        CartItem.objects.create(cart=self.cart, product=self.products[1], quantity=1)
+        self.cart_service = get_cart_service()
+        self.cart_filters = self.cart_service.get_cart_filters(self.cart.cart_uuid)
+
+    def test_short_info_is_read_from_cache(self):
+        """
+        The second read of the cart's short info must not hit the database
+        """
+        first_response = self.cart_service.get_cart_short_info(self.cart_filters)
+
+        with self.assertNumQueries(0):
+            second_response = self.cart_service.get_cart_short_info(self.cart_filters)
+
+        self.assertEqual(first_response, second_response)
+
+    def test_cart_item_creation_invalidates_cache(self):
+        """
+        Adding the cart item must invalidate the cached short info and details of the cart
+        """
+        self.cart_service.get_cart_short_info(self.cart_filters)
+        self.cart_service.get_cart_details(self.cart.cart_uuid, None)
+
+        create_cart_item_link = reverse('create-cart-item', kwargs={"cart_uuid": self.cart.cart_uuid})
+        with mock.patch("services.carts.cart_replicator.CartReplicator.replicate_one_cart_item_creation"):
+            response = self.client.post(create_cart_item_link, data={
+                "product_id": self.products[0].object_id,
+                "quantity": 2,
+            }, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        cart_short_info = self.cart_service.get_cart_short_info(self.cart_filters)
+        cart_details = self.cart_service.get_cart_details(self.cart.cart_uuid, None)
+
+        self.assertEqual(cart_short_info["count"], 3)
+        self.assertIn(self.products[0].object_id, cart_short_info["items"])
+        self.assertEqual(cart_details.data["cart"]["count"], 3)
+
+    def test_product_update_invalidates_carts_with_product(self):
+        """
+        Product's price change must invalidate only carts which contain the product
+        """
+        self.cart_service.get_cart_short_info(self.cart_filters)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ProductModifier().update_one_product({
+                "object_id": self.products[1].object_id,
+                "price": Decimal("10.00"),
+                "discount_rate": None,
+            })
+
+        cart_short_info = self.cart_service.get_cart_short_info(self.cart_filters)
+        self.assertEqual(cart_short_info["total"], Decimal("10.00"))
+
+    def test_cached_cart_of_another_user_is_not_returned(self):
+        """
+        Cached details of the anonymous cart must not be returned to the user who doesn't own the cart
+        """
+        self.cart_service.get_cart_details(self.cart.cart_uuid, None)
+
+        response = self.cart_service.get_cart_details(self.cart.cart_uuid, 1)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cart_is_read_from_database_if_cache_is_unavailable(self):
+        expected_short_info = self.cart_service.get_cart_short_info(self.cart_filters)
+        caches['carts'].clear()
+        unavailable = mock.Mock(side_effect=RedisConnectionError("Redis is unavailable"))
+
+        with mock.patch.object(self.cart_service.cart_cache.cache, 'get', unavailable), \
+                mock.patch.object(self.cart_service.cart_cache.cache, 'set_many', unavailable), \
+                self.assertLogs(level='WARNING'):
+            short_info = self.cart_service.get_cart_short_info(self.cart_filters)
+            response = self.cart_service.get_cart_details(self.cart.cart_uuid, None)
+
+        self.assertEqual(short_info, expected_short_info)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -0,0 +1,90 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from ..models import Cart, CartItem
+from apps.core.models import OutboxEvent
+from apps.products.factories import ProductFactory
+from dependencies.service_dependencies.carts import get_cart_service
+
+Account = get_user_model()
+
+
+class TestCartMerge(TestCase):
+    def setUp(self):
+        # Shared product, new product, product which isn't for sale and product with the low stock
+        self.products = [ProductFactory.create(stock=100, max_order_qty=10) for _ in range(4)]
+        self.products[2].for_sale = False
+        self.products[2].save()
+        self.products[3].stock = 4
+        self.products[3].save()
+
+        self.user = Account.objects.create_user(email="merge@gmail.com", password="test1234", first_name="Hello")
+        self.users_cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=self.users_cart, product=self.products[0], quantity=2)
+        self.anonymous_cart = Cart.objects.create()
+        for product, quantity in zip(self.products, (9, 1, 1, 6)):
+            CartItem.objects.create(cart=self.anonymous_cart, product=product, quantity=quantity)
+
+    def get_users_cart_quantities(self):
+        return dict(CartItem.objects.filter(cart=self.users_cart).values_list('product_id', 'quantity'))
+
+    def test_merge_with_each_quantity_policy(self):
+        merged_quantities = {'sum': 10, 'max': 9, 'replace': 9}
+        for quantity_policy, merged_quantity in merged_quantities.items():
+            with self.subTest(quantity_policy=quantity_policy):
+                CartItem.objects.filter(cart=self.users_cart).exclude(product=self.products[0]).delete()
+                CartItem.objects.filter(cart=self.users_cart).update(quantity=2)
+
+                cart_items = CartItem.merge_cart_items(self.anonymous_cart.cart_uuid, self.users_cart.cart_uuid,
+                                                       quantity_policy)
+
+                expected_quantities = {
+                    self.products[0].object_id: merged_quantity,
+                    self.products[1].object_id: 1,
+                    self.products[3].object_id: 4,
+                }
+                self.assertEqual(self.get_users_cart_quantities(), expected_quantities)
+                self.assertEqual({cart_item.product_id: cart_item.quantity for cart_item in cart_items},
+                                 expected_quantities)
+
+    def test_unchanged_items_are_not_returned(self):
+        CartItem.merge_cart_items(self.anonymous_cart.cart_uuid, self.users_cart.cart_uuid, 'max')
+
+        self.assertEqual(
+            CartItem.merge_cart_items(self.anonymous_cart.cart_uuid, self.users_cart.cart_uuid, 'max'), [],
+        )
+
+    def test_copy_cart_items_merges_with_one_statement(self):
+        cart_service = get_cart_service()
+
+        with self.assertNumQueries(5):
+            # Savepoint, the user's cart, the copied cart, the merge and the savepoint release
+            cart_items = cart_service.copy_cart_items(self.user.id, self.anonymous_cart.cart_uuid)
+
+        self.assertEqual(len(cart_items), 3)
+        self.assertIsNone(cart_service.copy_cart_items(self.user.id, self.users_cart.cart_uuid))
+
+    def test_pending_merge_replicates_changes_as_creation(self):
+        cart_service = get_cart_service()
+        cart_service.schedule_cart_items_merge(self.user.id, self.anonymous_cart.cart_uuid)
+        # The differently formatted uuid refers to the same pending merge
+        cart_service.merge_pending_cart_items(self.user.id, str(self.anonymous_cart.cart_uuid).upper())
+        # The merge is performed once, and nothing is queried if there's nothing to merge
+        with self.assertNumQueries(0):
+            cart_service.merge_pending_cart_items(self.user.id, self.anonymous_cart.cart_uuid)
+
+        event = OutboxEvent.objects.get()
+        self.assertEqual(event.routing_key, 'users.cart_items.create.many')
+        self.assertEqual(len(event.payload), 3)
+
+    @override_settings(CART_ITEM_BATCH_EVENTS=True)
+    def test_pending_merge_replicates_changes_as_batch(self):
+        cart_service = get_cart_service()
+        cart_service.schedule_cart_items_merge(self.user.id, self.anonymous_cart.cart_uuid)
+        cart_service.merge_pending_cart_items(self.user.id, self.anonymous_cart.cart_uuid)
+
+        event = OutboxEvent.objects.get()
+        self.assertEqual(event.routing_key, 'users.cart_items.batch')
+        self.assertEqual(event.payload["cart"], str(self.users_cart.cart_uuid))
+        self.assertEqual(len(event.payload["upserted"]), 3)
+        self.assertEqual(event.payload["deleted"], [])
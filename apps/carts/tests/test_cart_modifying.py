@@ -1,11 +1,15 @@
+import uuid
 from typing import List
 
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 from unittest import mock
 
+from apps.core.models import OutboxEvent
 from apps.products.models import Product
 from testing_services.auth_setup import AuthSetupService
 from ..models import Cart, CartItem
@@ -286,4 +290,138 @@ class TestCartModifying(APITestCase):
 
         updated_cart_item = CartItem.objects.get(product=self.products[0])
         # Assert that cart item's quantity changed to 3
-        self.assertEqual(updated_cart_item.quantity, 3)
\ No newline at end of file
+        self.assertEqual(updated_cart_item.quantity, 3)
+
+    def test_apply_cart_item_changes(self):
+        """
+        Test creating, updating and deleting cart items with one request
+        """
+        updated_cart_item = CartItem.objects.create(cart=self.first_users_cart, product=self.products[1], quantity=1)
+        deleted_cart_item = CartItem.objects.create(cart=self.first_users_cart, product=self.products[2], quantity=1)
+        self.products[3].for_sale = False
+        self.products[3].save()
+
+        apply_changes_link = reverse('apply-cart-item-changes',
+                                     kwargs={"cart_uuid": self.first_users_cart.cart_uuid})
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.access_token)
+        with mock.patch(
+                "services.carts.cart_replicator.CartReplicator.replicate_cart_item_changes"
+        ) as mocked_replication_of_changes:
+            response = self.client.post(apply_changes_link, data={"items": [
+                {"product_id": self.products[0].object_id, "quantity": 2},
+                {"product_id": self.products[1].object_id, "quantity": 1},
+                {"product_id": self.products[2].object_id, "quantity": 0},
+                {"product_id": self.products[3].object_id, "quantity": 1},
+                {"product_id": "missing", "quantity": 1},
+            ]}, format='json')
+            # Assert that all changes are replicated at once
+            self.assertEqual(mocked_replication_of_changes.call_count, 1)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([result["status"] for result in response.data["results"]],
+                         ["created", "updated", "deleted", "failed", "failed"])
+        self.assertEqual(response.data["results"][0]["cart_item"]["quantity"], 2)
+        self.assertEqual(response.data["results"][1]["cart_item"]["id"], updated_cart_item.id)
+        self.assertEqual(response.data["results"][2]["cart_item_id"], deleted_cart_item.id)
+
+        # Assert that only valid changes are applied
+        self.assertEqual(
+            dict(CartItem.objects.filter(cart=self.first_users_cart).values_list('product_id', 'quantity')),
+            {self.products[0].object_id: 2, self.products[1].object_id: 1},
+        )
+
+    def test_apply_cart_item_changes_replication(self):
+        """
+        Test that changes are replicated with the messages all consumers handle unless batch messages are enabled
+        """
+        updated_cart_item = CartItem.objects.create(cart=self.first_users_cart, product=self.products[1], quantity=1)
+        deleted_cart_item = CartItem.objects.create(cart=self.first_users_cart, product=self.products[2], quantity=1)
+        apply_changes_link = reverse('apply-cart-item-changes',
+                                     kwargs={"cart_uuid": self.first_users_cart.cart_uuid})
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.access_token)
+        response = self.client.post(apply_changes_link, data={"items": [
+            {"product_id": self.products[0].object_id, "quantity": 2},
+            {"product_id": self.products[1].object_id, "quantity": 2},
+            {"product_id": self.products[2].object_id, "quantity": 0},
+        ]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        events = list(OutboxEvent.objects.order_by('id'))
+        self.assertEqual([event.routing_key for event in events], [
+            'users.cart_items.create.many', 'users.cart_items.update.one', 'users.cart_items.delete.one',
+        ])
+        self.assertEqual(events[1].payload["quantity"], 2)
+        self.assertEqual(events[2].payload, {"cart_item_id": deleted_cart_item.id})
+
+        OutboxEvent.objects.all().delete()
+        with self.settings(CART_ITEM_BATCH_EVENTS=True):
+            response = self.client.post(apply_changes_link, data={"items": [
+                {"product_id": self.products[1].object_id, "quantity": 3},
+            ]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        event = OutboxEvent.objects.get()
+        self.assertEqual(event.routing_key, 'users.cart_items.batch')
+        self.assertEqual([cart_item["original_id"] for cart_item in event.payload["upserted"]], [updated_cart_item.id])
+        self.assertEqual(event.payload["deleted"], [])
+
+    def test_apply_cart_item_changes_with_duplicated_products(self):
+        """
+        Test that the batch is rejected if the product is changed more than once
+        """
+        apply_changes_link = reverse('apply-cart-item-changes',
+                                     kwargs={"cart_uuid": self.first_users_cart.cart_uuid})
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.access_token)
+        response = self.client.post(apply_changes_link, data={"items": [
+            {"product_id": self.products[0].object_id, "quantity": 1},
+            {"product_id": self.products[0].object_id, "quantity": 2},
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(CartItem.objects.filter(cart=self.first_users_cart).exists())
+
+    def test_add_cart_item_with_one_statement(self):
+        """
+        Test that the cart item is added without the existence checks of the cart and the product
+        """
+        create_cart_item_link = reverse('create-cart-item',
+                                        kwargs={"cart_uuid": self.first_users_cart.cart_uuid})
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.access_token)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(create_cart_item_link, data={
+                "product_id": self.products[0].object_id,
+                "quantity": 1,
+            }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        tables = (Cart._meta.db_table, CartItem._meta.db_table, Product._meta.db_table)
+        cart_item_queries = [query["sql"] for query in queries.captured_queries
+                             if any(table in query["sql"] for table in tables)]
+        # On PostgreSQL the cart item is upserted with one statement, other databases try to update it first
+        self.assertLessEqual(len(cart_item_queries), 2)
+        self.assertTrue(all(not sql.startswith("SELECT") for sql in cart_item_queries))
+
+    def test_add_cart_item_over_the_limits(self):
+        """
+        Test that the cart item isn't added or changed if the quantity exceeds the product's stock
+        """
+        CartItem.objects.create(cart=self.first_users_cart, product=self.products[0], quantity=1)
+        create_cart_item_link = reverse('create-cart-item',
+                                        kwargs={"cart_uuid": self.first_users_cart.cart_uuid})
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.access_token)
+
+        response = self.client.post(create_cart_item_link, data={
+            "product_id": self.products[0].object_id,
+            "quantity": self.products[0].stock + 1,
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["error"], "Not able to add a product to the cart")
+        self.assertEqual(CartItem.objects.get(cart=self.first_users_cart).quantity, 1)
+
+        response = self.client.post(create_cart_item_link, data={"product_id": "missing", "quantity": 1},
+                                    format='json')
+        self.assertEqual(response.data["error"], "Specified product does not exist")
+
+        response = self.client.post(reverse('create-cart-item', kwargs={"cart_uuid": uuid.uuid4()}),
+                                    data={"product_id": self.products[0].object_id, "quantity": 1}, format='json')
+        self.assertEqual(response.data["error"], "Cart with specified cart_id does not exist")
@@ -0,0 +1,45 @@
+from django.test import TestCase
+
+from ..models import Cart, CartItem
+from apps.products.factories import ProductFactory
+from dependencies.service_dependencies.carts import get_cart_product_index
+
+
+class TestCartProductIndex(TestCase):
+    def setUp(self):
+        self.products = ProductFactory.create_batch(3)
+        self.carts = [Cart.objects.create(user_id=None) for _ in range(3)]
+        CartItem.objects.bulk_create([
+            CartItem(cart=self.carts[0], product=self.products[0]),
+            CartItem(cart=self.carts[0], product=self.products[1]),
+            CartItem(cart=self.carts[1], product=self.products[1]),
+            CartItem(cart=self.carts[2], product=self.products[2]),
+        ])
+        self.cart_product_index = get_cart_product_index()
+
+    def test_carts_with_products(self):
+        product_ids = [self.products[0].object_id, self.products[1].object_id]
+
+        cart_uuids = self.cart_product_index.get_carts_with_products(product_ids)
+
+        self.assertCountEqual(cart_uuids, [self.carts[0].cart_uuid, self.carts[1].cart_uuid])
+
+    def test_products_by_cart(self):
+        product_ids = [self.products[1].object_id, self.products[2].object_id]
+
+        products_by_cart = self.cart_product_index.get_products_by_cart(product_ids)
+
+        self.assertEqual(products_by_cart, {
+            self.carts[0].cart_uuid: {self.products[1].object_id},
+            self.carts[1].cart_uuid: {self.products[1].object_id},
+            self.carts[2].cart_uuid: {self.products[2].object_id},
+        })
+
+    def test_lookup_of_many_products_is_chunked(self):
+        self.cart_product_index.PRODUCTS_LOOKUP_CHUNK_SIZE = 2
+        product_ids = [f"missing-{i}" for i in range(3)] + [product.object_id for product in self.products]
+
+        with self.assertNumQueries(3):
+            cart_uuids = self.cart_product_index.get_carts_with_products(product_ids)
+
+        self.assertCountEqual(cart_uuids, [cart.cart_uuid for cart in self.carts])
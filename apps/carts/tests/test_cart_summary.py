@@ -0,0 +1,94 @@
+from decimal import Decimal
+from typing import List
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..models import Cart, CartItem
+from apps.products.factories import ProductFactory
+from apps.products.models import Product
+from dependencies.service_dependencies.carts import get_cart_service
+
+Account = get_user_model()
+
+
+class TestCartSummary(APITestCase):
+    def setUp(self):
+        # create multiple product instances
+        self.products: List[Product] = [ProductFactory.create() for _ in range(5)]
+        # Product without discount to check that missing discount rate is handled
+        self.products[0].discount_rate = None
+        self.products[0].save()
+
+        self.user = Account.objects.create_user(
+            email="testing44@gmail.com",
+            password="test1234",
+            first_name="Hello",
+        )
+        self.cart = Cart.objects.create(user=self.user)
+        CartItem.objects.bulk_create([
+            CartItem(cart=self.cart, product=product, quantity=index + 1)
+            for index, product in enumerate(self.products)
+        ])
+        self.cart_service = get_cart_service()
+
+    def test_summary_matches_cart_properties(self):
+        """
+        Summary calculated in one query must match the values of the Cart.count and Cart.total
+        """
+        cart_filters = self.cart_service.get_cart_filters(self.cart.cart_uuid, self.user.id)
+
+        with self.assertNumQueries(1):
+            cart_summary = self.cart_service.cart_summary_engine.get_summary(cart_filters)
+
+        expected_tax_total = sum(
+            cart_item.total_item_tax for cart_item in self.cart.items.select_related('product')
+        )
+
+        self.assertEqual(cart_summary.count, self.cart.count)
+        self.assertEqual(cart_summary.total, self.cart.total)
+        self.assertEqual(cart_summary.tax_total, expected_tax_total)
+        self.assertEqual(
+            cart_summary.quantities,
+            {product.object_id: {"quantity": index + 1} for index, product in enumerate(self.products)}
+        )
+
+    def test_summary_of_empty_cart(self):
+        """
+        Empty cart must be found and summarized with zero values
+        """
+        anonymous_cart = Cart.objects.create(user_id=None)
+        cart_filters = self.cart_service.get_cart_filters(anonymous_cart.cart_uuid)
+
+        cart_summary = self.cart_service.cart_summary_engine.get_summary(cart_filters)
+
+        self.assertEqual(cart_summary.cart.cart_uuid, anonymous_cart.cart_uuid)
+        self.assertEqual(cart_summary.count, 0)
+        self.assertEqual(cart_summary.total, Decimal("0.00"))
+        self.assertEqual(cart_summary.quantities, {})
+
+    def test_summary_of_missing_cart(self):
+        """
+        Summary of the cart that does not exist must raise Cart.DoesNotExist
+        """
+        cart_filters = self.cart_service.get_cart_filters(self.cart.cart_uuid)
+
+        with self.assertRaises(Cart.DoesNotExist):
+            self.cart_service.cart_summary_engine.get_summary(cart_filters)
+
+    def test_cart_details_use_summary(self):
+        """
+        Cart details return the same count and total as the Cart properties
+        """
+        anonymous_cart = Cart.objects.create(user_id=None)
+        CartItem.objects.create(cart=anonymous_cart, product=self.products[1], quantity=2)
+        cart_details_url = reverse('cart-detail', kwargs={"cart_uuid": anonymous_cart.cart_uuid})
+
+        response = self.client.get(cart_details_url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["cart"]["count"], anonymous_cart.count)
+        self.assertEqual(response.data["cart"]["total"], anonymous_cart.total)
+        self.assertEqual(len(response.data["cart_items"]), 1)
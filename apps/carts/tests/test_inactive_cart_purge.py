@@ -0,0 +1,55 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from ..models import Cart, CartItem
+from apps.products.factories import ProductFactory
+from apps.core.models import OutboxEvent
+from services.carts.cart_replicator import CartReplicator
+from services.carts.inactive_cart_purger import InactiveCartPurger
+
+Account = get_user_model()
+
+
+class TestInactiveCartPurge(TestCase):
+    def setUp(self):
+        self.product = ProductFactory.create()
+        self.user = Account.objects.create_user(email="purge@gmail.com", password="test1234", first_name="Hello")
+        self.users_cart = Cart.objects.create(user=self.user)
+        self.inactive_carts = [Cart.objects.create() for _ in range(5)]
+        self.active_cart = Cart.objects.create()
+        for cart in (self.users_cart, *self.inactive_carts, self.active_cart):
+            CartItem.objects.create(cart=cart, product=self.product)
+
+        self.two_days_ago = timezone.now() - timedelta(days=2)
+        Cart.objects.exclude(id=self.active_cart.id).update(updated_at=self.two_days_ago)
+
+    def test_purge_deletes_inactive_anonymous_carts_with_items_in_chunks(self):
+        purger = InactiveCartPurger(Cart.objects.all(), CartReplicator(), chunk_size=2)
+
+        with CaptureQueriesContext(connection) as queries:
+            result = purger.purge(timezone.now() - timedelta(days=1))
+
+        statements = [query['sql'].split()[0] for query in queries if 'SAVEPOINT' not in query['sql']]
+        # Every chunk of carts is found by one query, deleted with its items by two statements and replicated
+        self.assertEqual(statements, ['SELECT', 'DELETE', 'DELETE', 'INSERT'] * 3)
+
+        self.assertEqual((result.deleted_carts_count, result.deleted_items_count), (5, 5))
+        self.assertEqual(set(Cart.objects.values_list('id', flat=True)), {self.users_cart.id, self.active_cart.id})
+        self.assertEqual(
+            set(CartItem.objects.values_list('cart_id', flat=True)),
+            {self.users_cart.cart_uuid, self.active_cart.cart_uuid},
+        )
+        self.assertEqual(purger.purge(timezone.now() - timedelta(days=1)).deleted_carts_count, 0)
+
+        replicated_cart_uuids = [
+            cart_uuid
+            for payload in OutboxEvent.objects.filter(routing_key='users.carts.delete_inactive_carts')
+            .values_list('payload', flat=True)
+            for cart_uuid in payload["cart_uuids"]
+        ]
+        self.assertEqual(sorted(replicated_cart_uuids), sorted(str(cart.cart_uuid) for cart in self.inactive_carts))
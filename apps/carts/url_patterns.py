@@ -16,6 +16,9 @@ def get_url_patterns():
             'post': 'create_cart_item'
         }
     )
+    apply_cart_item_changes = CartViewSet.as_view(
+        {'post': 'apply_cart_item_changes'}
+    )
     update_or_delete_cart_item = CartViewSet.as_view(
         {
             'patch': 'update_cart_item',
@@ -30,6 +33,7 @@ def get_url_patterns():
         path('<cart_uuid>/', get_cart_details, name='cart-detail'),
         path('<cart_uuid>/short-info/', get_carts_short_info, name='cart-short-info'),
         path('<cart_uuid>/items/', get_or_create_cart_item, name='create-cart-item'),
+        path('<cart_uuid>/items/batch/', apply_cart_item_changes, name='apply-cart-item-changes'),
         path('<cart_uuid>/items/<item_id>/', update_or_delete_cart_item, name='update-or-delete-cart-item'),
         path('<cart_uuid>/clear/', clear_cart, name='clear-cart'),
     ]
@@ -50,6 +50,13 @@ class CartViewSet(ViewSet):
         cart_item_data = request.data
         return self.cart_service.create_cart_item(cart_uuid, cart_item_data)
 
+    @action(detail=True)
+    def apply_cart_item_changes(self, request, cart_uuid):
+        """
+        Method to create, update and delete many cart items at once
+        """
+        return self.cart_service.apply_cart_item_changes(cart_uuid, request.data)
+
     @action(detail=True)
     def update_cart_item(self, request, cart_uuid, item_id):
         """
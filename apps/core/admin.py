@@ -1,3 +1,12 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import OutboxEvent, ProcessedMessage
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ('id', 'exchange_name', 'routing_key', 'created_at')
+
+
+@admin.register(ProcessedMessage)
+class ProcessedMessageAdmin(admin.ModelAdmin):
+    list_display = ('message_id', 'processed_at')
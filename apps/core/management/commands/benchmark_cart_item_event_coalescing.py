@@ -0,0 +1,98 @@
+import itertools
+import json
+import random
+import uuid
+from datetime import timedelta
+from typing import List, Tuple
+
+from django.core.management.base import BaseCommand
+
+from apps.core.models import OutboxEvent
+from services.outbox.cart_item_event_coalescer import CartItemEventCoalescer
+
+
+class Command(BaseCommand):
+    help = 'Compares the number of published cart item messages with and without coalescing on a click stream'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--click-stream', help='JSON lines file with "time_ms", "routing_key" and "payload" '
+                                                   'of recorded cart item events. Random clicks are used if omitted')
+        parser.add_argument('--carts', type=int, default=100, help='Number of carts in the random click stream')
+        parser.add_argument('--clicks', type=int, default=20, help='Number of clicks per cart in the random stream')
+        parser.add_argument('--click-interval-ms', type=float, default=150,
+                            help='Average interval between clicks of the same user in the random stream')
+        parser.add_argument('--window-ms', type=int, default=200, help='Coalescing window')
+        parser.add_argument('--poll-interval-ms', type=int, default=500, help='Poll interval of the outbox relay')
+
+    @staticmethod
+    def generate_click_stream(carts: int, clicks: int, click_interval_ms: float) -> List[Tuple[float, OutboxEvent]]:
+        # Users press "+" and "-" on a few products in their carts
+        click_stream = []
+        for cart_number in range(carts):
+            cart_uuid = str(uuid.uuid4())
+            products = [f"product-{cart_number}-{i}" for i in range(random.randint(1, 3))]
+            quantities = {}
+            time_ms = random.uniform(0, 1000)
+            for _ in range(clicks):
+                product = random.choice(products)
+                routing_key = 'users.cart_items.update.one' if product in quantities \
+                    else 'users.cart_items.create.one'
+                quantities[product] = max(1, quantities.get(product, 0) + random.choice((1, 1, -1)))
+                payload = {"cart": cart_uuid, "product": product, "quantity": quantities[product],
+                           "original_id": products.index(product) + cart_number * 10}
+                click_stream.append((time_ms, OutboxEvent(exchange_name='users', routing_key=routing_key,
+                                                          payload=payload)))
+                time_ms += random.expovariate(1 / click_interval_ms)
+
+        return sorted(click_stream, key=lambda item: item[0])
+
+    @staticmethod
+    def read_click_stream(path: str) -> List[Tuple[float, OutboxEvent]]:
+        click_stream = []
+        with open(path) as file:
+            for line in file:
+                if not line.strip():
+                    continue
+
+                record = json.loads(line)
+                click_stream.append((record["time_ms"], OutboxEvent(
+                    exchange_name=record.get("exchange_name", 'users'),
+                    routing_key=record["routing_key"],
+                    payload=record["payload"],
+                )))
+
+        return sorted(click_stream, key=lambda item: item[0])
+
+    def handle(self, *args, **options):
+        if options['click_stream']:
+            click_stream = self.read_click_stream(options['click_stream'])
+        else:
+            click_stream = self.generate_click_stream(options['carts'], options['clicks'],
+                                                      options['click_interval_ms'])
+
+        if not click_stream:
+            self.stdout.write('Click stream is empty')
+            return
+
+        window_ms = options['window_ms']
+        poll_interval_ms = options['poll_interval_ms']
+        coalescer = CartItemEventCoalescer(window=timedelta(milliseconds=window_ms))
+
+        # Every poll, the relay publishes events which are older than the window
+        published_messages = 0
+        published_events = 0
+        poll_time_ms = 0.0
+        while published_events < len(click_stream):
+            poll_time_ms += poll_interval_ms
+            ready_events = [event for _, event in itertools.takewhile(
+                lambda item: item[0] <= poll_time_ms - window_ms, click_stream[published_events:],
+            )]
+            published_messages += len(coalescer.coalesce(ready_events))
+            published_events += len(ready_events)
+
+        events_count = len(click_stream)
+        self.stdout.write(f"without coalescing: {events_count} messages")
+        self.stdout.write(
+            f"with {window_ms}ms window: {published_messages} messages "
+            f"({100 * (1 - published_messages / events_count):.1f}% fewer)"
+        )
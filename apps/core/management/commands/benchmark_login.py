@@ -0,0 +1,75 @@
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import AllowAllUsersModelBackend
+from django.db import transaction
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+
+from apps.accounts.custom_obtain_tokens_views import TokenObtainPairViewForRegularUsers
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Measures CPU time of checking the password by every hasher profile and CPU time of the login request '
+            'with the configured hasher, compared to authenticating twice as the login did before. '
+            'The test user is created in a transaction which is rolled back')
+    PASSWORD = 'benchmark-password-1488'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=20, help='Number of measured logins')
+
+    @staticmethod
+    def measure_cpu(count: int, func) -> float:
+        """
+        Returns CPU time of one call in milliseconds.
+        """
+        started_at = time.process_time()
+        for _ in range(count):
+            func()
+        return (time.process_time() - started_at) / count * 1000
+
+    def measure_hashers(self, count: int) -> None:
+        self.stdout.write("Password check:")
+        for name, hasher_path in settings.PASSWORD_HASHER_PROFILES.items():
+            hasher = import_string(hasher_path)()
+            try:
+                encoded = hasher.encode(self.PASSWORD, hasher.salt())
+            except ValueError as e:
+                self.stdout.write(f"  {name}: unavailable ({e})")
+                continue
+            cpu_ms = self.measure_cpu(count, lambda: hasher.verify(self.PASSWORD, encoded))
+            self.stdout.write(f"  {name}: {cpu_ms:.1f}ms CPU")
+
+    def measure_logins(self, count: int) -> None:
+        user = User.objects.create_user(email=f"benchmark-{uuid.uuid4().hex}@example.com", password=self.PASSWORD,
+                                        first_name="Benchmark")
+        credentials = {"email": user.email, "password": self.PASSWORD}
+        factory = APIRequestFactory()
+        login_view = TokenObtainPairViewForRegularUsers.as_view()
+
+        def login():
+            response = login_view(factory.post('/login/', credentials, format='json'))
+            assert response.status_code == 200, response.data
+
+        def authenticate_twice():
+            # The view authenticated the user, and then the token serializer authenticated the user again
+            AllowAllUsersModelBackend().authenticate(None, **credentials)
+            serializer = TokenObtainPairSerializer(data=credentials)
+            assert serializer.is_valid(), serializer.errors
+
+        self.stdout.write(f"Login with the {settings.PASSWORD_HASHER} hasher:")
+        self.stdout.write(f"  single authentication: {self.measure_cpu(count, login):.1f}ms CPU per request")
+        self.stdout.write(f"  double authentication: {self.measure_cpu(count, authenticate_twice):.1f}ms CPU "
+                          f"per request")
+
+    def handle(self, *args, **options):
+        self.measure_hashers(options['logins'])
+        with transaction.atomic():
+            self.measure_logins(options['logins'])
+            transaction.set_rollback(True)
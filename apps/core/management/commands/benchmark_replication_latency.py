@@ -0,0 +1,97 @@
+import random
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction, connection
+
+from apps.core.message_broker.publisher import PooledPublisher
+from apps.core.models import OutboxEvent
+from services.outbox.background_outbox_relay import BackgroundOutboxRelay
+from services.outbox.outbox_relay import OutboxRelay
+from services.outbox.outbox_writer import write_replication_event
+from testing_services.fake_amqp import FakeBroker
+
+
+class Command(BaseCommand):
+    help = ('Measures the time from the commit of a replication event to its publishing with the outbox relay '
+            'process and with the direct transport. Use it against PostgreSQL and an empty outbox, '
+            'published events are removed')
+    # How long the event can wait for publishing before the benchmark fails
+    PUBLISHING_TIMEOUT_SECONDS = 10
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=100, help='Number of replication events')
+        parser.add_argument('--round-trip-ms', type=float, default=0.5,
+                            help='Simulated network round trip of the in-memory broker')
+        parser.add_argument('--poll-interval', type=float, default=0.5,
+                            help='Poll interval of the outbox relay process in seconds')
+
+    @staticmethod
+    def make_relay(broker: FakeBroker, wait_for_locks: bool = True) -> OutboxRelay:
+        publisher = PooledPublisher(connection_factory=broker.connect, pool_size=1, use_transactions=True)
+        return OutboxRelay(OutboxEvent.objects.all(), publisher, batch_size=500, wait_for_locks=wait_for_locks)
+
+    def measure(self, name: str, broker: FakeBroker, events_count: int, poll_interval: float, on_commit) -> None:
+        latencies = []
+        for i in range(events_count):
+            # Events are committed at random moments of the poll interval, like requests of users
+            time.sleep(random.uniform(0, poll_interval))
+            published_count = len(broker.messages)
+            with transaction.atomic():
+                write_replication_event('benchmark_replication', 'benchmark.one', {"number": i})
+                transaction.on_commit(on_commit)
+            committed_at = time.perf_counter()
+
+            while len(broker.messages) == published_count:
+                if time.perf_counter() - committed_at > self.PUBLISHING_TIMEOUT_SECONDS:
+                    raise CommandError(f"{name}: the event wasn't published")
+                time.sleep(0.0001)
+            latencies.append(time.perf_counter() - committed_at)
+
+            # The next event is written after the relay removed the published one, so they don't compete for locks
+            while OutboxEvent.objects.exists():
+                time.sleep(0.0001)
+
+        latencies.sort()
+        self.stdout.write(
+            f"{name}: median {statistics.median(latencies) * 1000:.1f}ms, "
+            f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f}ms"
+        )
+
+    def handle(self, *args, **options):
+        round_trip_latency = options['round_trip_ms'] / 1000
+
+        polling_broker = FakeBroker(round_trip_latency=round_trip_latency)
+        polling_relay = self.make_relay(polling_broker)
+        stop_polling = threading.Event()
+
+        def run_relay_process():
+            # The same loop as OutboxRelay.run, which can be stopped
+            try:
+                while not stop_polling.is_set():
+                    try:
+                        relayed_count = polling_relay.relay_batch()
+                    except Exception as e:
+                        self.stderr.write(f"Unable to relay outbox events: {e!r}")
+                        relayed_count = 0
+                    if relayed_count < polling_relay.batch_size:
+                        stop_polling.wait(options['poll_interval'])
+            finally:
+                connection.close()
+
+        polling_thread = threading.Thread(target=run_relay_process)
+        polling_thread.start()
+        try:
+            self.measure('outbox relay process', polling_broker, options['events'], options['poll_interval'],
+                         on_commit=lambda: None)
+        finally:
+            stop_polling.set()
+            polling_thread.join()
+
+        direct_broker = FakeBroker(round_trip_latency=round_trip_latency)
+        background_relay = BackgroundOutboxRelay(relay_factory=lambda: self.make_relay(direct_broker, wait_for_locks=False),
+                                                 retry_delay=options['poll_interval'])
+        self.measure('direct transport', direct_broker, options['events'], options['poll_interval'],
+                     on_commit=background_relay.notify)
@@ -0,0 +1,77 @@
+import json
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from apps.accounts.serializers.replication_serializers import UserReplicationSerializer
+from apps.addresses.models import Address
+from apps.addresses.serializers import AddressReplicationSerializer
+from apps.carts.models import CartItem
+from apps.carts.replication_serializers.cart_item import CartItemReplicationSerializer
+from apps.core.message_broker.codecs import JsonCodec, MsgpackCodec, msgpack
+from services.replication_utils import serialize_address_data, serialize_cart_item_data, serialize_user_data
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Compares CPU time and size of replication messages built by the replication serializers '
+            'with payloads built directly from model instances and encoded by the message codecs')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=10000, help='Number of events of each kind')
+
+    @staticmethod
+    def make_instances():
+        user = User(id=1, email="replication@example.com", first_name="Hello", last_name="World",
+                    date_joined=timezone.now(), last_login=timezone.now(), phone_number="+4915112345678")
+        address = Address(id=1, user_id=1, country='DE', first_name="Hello", last_name="World",
+                          phone_number="+4915112345678", city="Berlin", street="Main", house_number="1",
+                          postal_code="10115")
+        cart_item = CartItem(id=1, cart_id=uuid.uuid4(), product_id="663a9ec5d1e8f1a8b6d6a3c1", quantity=2)
+        return user, address, cart_item
+
+    @staticmethod
+    def serialize_with_serializer(serializer_class, instance):
+        data = dict(serializer_class(instance=instance).data)
+        data["original_id"] = data.pop("id")
+        if "cart" in data:
+            data["cart"] = str(data["cart"])
+        return data
+
+    def measure(self, name: str, events_count: int, build_payload, encode) -> None:
+        started_at = time.perf_counter()
+        for _ in range(events_count):
+            # The payload is saved to the outbox as JSON and read back by the outbox relay before it is published
+            stored_payload = json.loads(json.dumps(build_payload(), cls=DjangoJSONEncoder))
+            body = encode(stored_payload)
+        elapsed = time.perf_counter() - started_at
+        self.stdout.write(f"  {name}: {elapsed / events_count * 1_000_000:.1f}us per event, {len(body)} bytes")
+
+    def handle(self, *args, **options):
+        events_count = options['events']
+        user, address, cart_item = self.make_instances()
+        json_codec = JsonCodec()
+        msgpack_codec = MsgpackCodec() if msgpack is not None else None
+
+        events = (
+            ('user', UserReplicationSerializer, serialize_user_data, user),
+            ('address', AddressReplicationSerializer, serialize_address_data, address),
+            ('cart item', CartItemReplicationSerializer, serialize_cart_item_data, cart_item),
+        )
+        for event_name, serializer_class, build_payload, instance in events:
+            self.stdout.write(f"{event_name}:")
+            self.measure('serializer + json.dumps', events_count,
+                         lambda: self.serialize_with_serializer(serializer_class, instance),
+                         lambda payload: json.dumps(payload).encode())
+            self.measure('payload builder + json codec', events_count,
+                         lambda: build_payload(instance), json_codec.encode)
+            if msgpack_codec is not None:
+                self.measure('payload builder + msgpack codec', events_count,
+                             lambda: build_payload(instance), msgpack_codec.encode)
+            else:
+                self.stdout.write("  msgpack is not installed, the msgpack codec is skipped")
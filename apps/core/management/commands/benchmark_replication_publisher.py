@@ -0,0 +1,62 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.core.message_broker.publisher import PooledPublisher, get_connection_factory
+from testing_services.fake_amqp import FakeBroker
+
+
+class Command(BaseCommand):
+    help = 'Compares throughput of the connection per message publishing and the pooled publisher'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=1000, help='Number of messages to publish')
+        parser.add_argument('--round-trip-ms', type=float, default=0.5,
+                            help='Simulated network round trip of the in-memory broker')
+        parser.add_argument('--use-broker', action='store_true',
+                            help='Publish to the broker from AMPQ_CONNECTION_URL instead of the in-memory broker')
+        parser.add_argument('--exchange', default='benchmark_replication', help='Name of the exchange')
+
+    def handle(self, *args, **options):
+        if options['use_broker']:
+            connection_factory = get_connection_factory()
+            get_round_trips = None
+        else:
+            broker = FakeBroker(round_trip_latency=options['round_trip_ms'] / 1000)
+            connection_factory = broker.connect
+            get_round_trips = lambda: broker.round_trips
+
+        exchange_name = options['exchange']
+        message = {"cart": "f3b1a3d4-5a8f-4a57-9df4-0f35f8d1c0a2", "product": "663a9ec5d1e8f1a8b6d6a3c1",
+                   "quantity": 1, "original_id": 1}
+        messages_count = options['messages']
+
+        def publish_with_connection_per_message():
+            # A new connection with the exchange declaration for every replication event
+            for _ in range(messages_count):
+                connection = connection_factory()
+                channel = connection.channel()
+                channel.exchange_declare(exchange=exchange_name, exchange_type='topic')
+                channel.basic_publish(exchange=exchange_name, routing_key='benchmark.one', body=json.dumps(message))
+                connection.close()
+
+        publisher = PooledPublisher(connection_factory=connection_factory, pool_size=1)
+
+        def publish_with_pooled_publisher():
+            for _ in range(messages_count):
+                publisher.publish(exchange_name, 'benchmark.one', message)
+
+        for name, publish in (('connection per message', publish_with_connection_per_message),
+                              ('pooled publisher', publish_with_pooled_publisher)):
+            round_trips_before = get_round_trips() if get_round_trips else 0
+            started_at = time.perf_counter()
+            publish()
+            elapsed = time.perf_counter() - started_at
+
+            result = f"{name}: {messages_count} messages in {elapsed:.3f}s ({messages_count / elapsed:.0f} msg/s)"
+            if get_round_trips:
+                result += f", {(get_round_trips() - round_trips_before) / messages_count:.1f} round trips/msg"
+            self.stdout.write(result)
+
+        publisher.close()
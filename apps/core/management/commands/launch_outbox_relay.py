@@ -0,0 +1,11 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from dependencies.service_dependencies.outbox import get_outbox_relay
+
+
+class Command(BaseCommand):
+    help = 'Launches the relay that publishes replication events from the outbox: RabbitMQ'
+    def handle(self, *args, **options):
+        self.stdout.write("Started Outbox Relay")
+        get_outbox_relay().run(poll_interval=settings.OUTBOX_RELAY_POLL_INTERVAL_SECONDS)
@@ -8,10 +8,13 @@ from pika.adapters.blocking_connection import BlockingChannel
 
 class Consumer:
     """
-    Class responsible for getting messages from the broker
+    Class responsible for getting messages from the broker.
+    Messages are consumed from the durable named queue, so they survive restarts of the consumer and the broker.
+    Rejected messages are dead-lettered to the "<queue name>.dead-letter" queue, where they're kept for inspection.
     """
-    def __init__(self, exchange_name: str, exchange_type: str):
+    def __init__(self, exchange_name: str, exchange_type: str, queue_name: str):
         self._exchange_name: str = exchange_name
+        self._queue_name: str = queue_name
 
         self._parameters: URLParameters = URLParameters(settings.AMPQ_CONNECTION_URL)
         self._connection: BlockingConnection = BlockingConnection(parameters=self._parameters)
@@ -19,12 +22,35 @@ class Consumer:
 
         self._channel.exchange_declare(exchange=self._exchange_name, exchange_type=exchange_type)
 
-        result = self._channel.queue_declare('', exclusive=True)
-        self._queue_name: str = result.method.queue
+        dead_letter_name = f"{self._queue_name}.dead-letter"
+        self._channel.exchange_declare(exchange=dead_letter_name, exchange_type='fanout', durable=True)
+        self._channel.queue_declare(dead_letter_name, durable=True)
+        self._channel.queue_bind(exchange=dead_letter_name, queue=dead_letter_name)
+
+        self._channel.queue_declare(self._queue_name, durable=True,
+                                    arguments={"x-dead-letter-exchange": dead_letter_name})
 
     def bind_queue(self, binding_key: str):
         self._channel.queue_bind(exchange=self._exchange_name, queue=self._queue_name, routing_key=binding_key)
 
+    def set_prefetch_count(self, prefetch_count: int):
+        """
+        Limits the number of messages delivered to the consumer and not acknowledged yet.
+        """
+        self._channel.basic_qos(prefetch_count=prefetch_count)
+
+    def add_callback_threadsafe(self, callback: Callable):
+        """
+        Schedules the callback on the consumer's thread, the only thread where the channel can be used.
+        """
+        self._connection.add_callback_threadsafe(callback)
+
+    def call_later(self, delay: float, callback: Callable):
+        """
+        Schedules the callback on the consumer's thread after the delay in seconds.
+        """
+        self._connection.call_later(delay, callback)
+
     def consume(self, callback: Callable, auto_ack: bool = True):
         self._channel.basic_consume(queue=self._queue_name, on_message_callback=callback, auto_ack=auto_ack)
         self._channel.start_consuming()
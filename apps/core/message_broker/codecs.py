@@ -0,0 +1,73 @@
+import json
+from typing import Any, Dict, Optional
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+# Version of the replication payloads, increased on incompatible changes of their fields
+REPLICATION_SCHEMA_VERSION = 1
+SCHEMA_VERSION_HEADER = 'schema_version'
+
+
+class MessageCodec:
+    """
+    Encodes messages to bodies of the content type which is sent in the message properties.
+    """
+    content_type: str = None
+
+    def encode(self, message: Any) -> bytes:
+        raise NotImplementedError
+
+    def decode(self, body: bytes) -> Any:
+        raise NotImplementedError
+
+
+class JsonCodec(MessageCodec):
+    content_type = 'application/json'
+
+    def encode(self, message: Any) -> bytes:
+        return json.dumps(message, cls=DjangoJSONEncoder, separators=(',', ':')).encode()
+
+    def decode(self, body: bytes) -> Any:
+        return json.loads(body)
+
+
+class MsgpackCodec(MessageCodec):
+    content_type = 'application/msgpack'
+
+    def __init__(self):
+        if msgpack is None:
+            raise ImproperlyConfigured("msgpack must be installed to use the application/msgpack content type")
+
+    def encode(self, message: Any) -> bytes:
+        return msgpack.packb(message, use_bin_type=True)
+
+    def decode(self, body: bytes) -> Any:
+        return msgpack.unpackb(body, raw=False)
+
+
+CODEC_CLASSES = {codec_class.content_type: codec_class for codec_class in (JsonCodec, MsgpackCodec)}
+_codecs: Dict[str, MessageCodec] = {}
+
+
+def get_codec(content_type: Optional[str]) -> MessageCodec:
+    """
+    Returns the codec of the content type, messages without the content type are JSON.
+    :raises ValueError: if the content type is not supported.
+    """
+    content_type = content_type or JsonCodec.content_type
+    codec = _codecs.get(content_type)
+    if codec is None:
+        codec_class = CODEC_CLASSES.get(content_type)
+        if codec_class is None:
+            raise ValueError(f"Unsupported content type: {content_type}")
+
+        codec = _codecs[content_type] = codec_class()
+
+    return codec
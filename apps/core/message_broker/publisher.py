@@ -0,0 +1,150 @@
+import logging
+import queue
+from contextlib import contextmanager
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Set, Tuple
+
+from django.conf import settings
+from pika import URLParameters, BlockingConnection, BasicProperties
+from pika.adapters.blocking_connection import BlockingChannel
+from pika.exceptions import AMQPError
+
+from .codecs import MessageCodec, JsonCodec, get_codec, REPLICATION_SCHEMA_VERSION, SCHEMA_VERSION_HEADER
+
+
+class PooledChannel:
+    """
+    Connection to the broker with one channel in the publisher confirms or transactional mode.
+    Connection and channel are opened lazily and reopened after they were lost.
+    """
+    def __init__(self, connection_factory: Callable[[], BlockingConnection], use_transactions: bool = False):
+        self._connection_factory = connection_factory
+        self._use_transactions = use_transactions
+        self._connection: Optional[BlockingConnection] = None
+        self._channel: Optional[BlockingChannel] = None
+        self._declared_exchanges: Set[Tuple[str, str]] = set()
+
+    def _get_channel(self) -> BlockingChannel:
+        if self._connection is None or not self._connection.is_open:
+            self._connection = self._connection_factory()
+            self._channel = None
+
+        if self._channel is None or not self._channel.is_open:
+            self._channel = self._connection.channel()
+            if self._use_transactions:
+                # Published messages are accepted by the broker all at once on the commit
+                self._channel.tx_select()
+            else:
+                # Every publish waits until the broker confirms that it accepted the message
+                self._channel.confirm_delivery()
+            self._declared_exchanges = set()
+
+        return self._channel
+
+    def publish(self, exchange_name: str, exchange_type: str, routing_key: str, body: bytes,
+                properties: Optional[BasicProperties] = None) -> None:
+        channel = self._get_channel()
+        if (exchange_name, exchange_type) not in self._declared_exchanges:
+            channel.exchange_declare(exchange=exchange_name, exchange_type=exchange_type)
+            self._declared_exchanges.add((exchange_name, exchange_type))
+
+        channel.basic_publish(exchange=exchange_name, routing_key=routing_key, body=body, properties=properties)
+
+    def commit(self) -> None:
+        self._get_channel().tx_commit()
+
+    def reset(self) -> None:
+        """
+        Closes the connection, the next publish will open a new one.
+        """
+        connection, self._connection, self._channel = self._connection, None, None
+        if connection is not None and connection.is_open:
+            try:
+                connection.close()
+            except AMQPError:
+                pass
+
+
+class PooledPublisher:
+    """
+    Long-lived publisher that keeps connections to the broker open between messages.
+    Threads borrow channels from the pool, so one channel is never used by several threads at once.
+    With use_transactions, publish_many waits for the broker once per batch instead of once per message.
+    Messages are encoded by the codec, its content type and the schema version are sent in the message properties.
+    """
+    def __init__(self, connection_factory: Callable[[], BlockingConnection], pool_size: int = 2, retries: int = 1,
+                 use_transactions: bool = False, codec: Optional[MessageCodec] = None):
+        self._retries = retries
+        self._use_transactions = use_transactions
+        self._codec = codec if codec is not None else JsonCodec()
+        self._properties = BasicProperties(
+            content_type=self._codec.content_type,
+            headers={SCHEMA_VERSION_HEADER: REPLICATION_SCHEMA_VERSION},
+        )
+        self._pool: queue.LifoQueue[PooledChannel] = queue.LifoQueue()
+        for _ in range(pool_size):
+            self._pool.put(PooledChannel(connection_factory, use_transactions))
+
+    @contextmanager
+    def _borrow_channel(self) -> Iterator[PooledChannel]:
+        channel = self._pool.get()
+        try:
+            yield channel
+        finally:
+            self._pool.put(channel)
+
+    def publish(self, exchange_name: str, routing_key: str, message: Any, exchange_type: str = 'topic') -> None:
+        self.publish_many(exchange_name, [(routing_key, message)], exchange_type)
+
+    def publish_many(self, exchange_name: str, messages: Iterable[Tuple[str, Any]],
+                     exchange_type: str = 'topic') -> None:
+        """
+        Publishes messages in the specified order using one channel from the pool.
+        :param exchange_name: Name of the exchange where messages will be published.
+        :param messages: Pairs of the routing key and the message.
+        :param exchange_type: Type of the exchange.
+        """
+        bodies: List[Tuple[str, bytes]] = [
+            (routing_key, self._codec.encode(message)) for routing_key, message in messages
+        ]
+
+        with self._borrow_channel() as channel:
+            accepted_count = 0
+            failed_attempts = 0
+            while accepted_count < len(bodies):
+                try:
+                    for routing_key, body in bodies[accepted_count:]:
+                        channel.publish(exchange_name, exchange_type, routing_key, body, self._properties)
+                        if not self._use_transactions:
+                            accepted_count += 1
+
+                    if self._use_transactions:
+                        # Uncommitted messages are discarded by the broker, so the whole batch is retried on failure
+                        channel.commit()
+                        accepted_count = len(bodies)
+                except AMQPError as e:
+                    # Not accepted messages are published again after reconnect,
+                    # so consumers can receive a message twice if the confirmation was lost.
+                    channel.reset()
+                    failed_attempts += 1
+                    if failed_attempts > self._retries:
+                        raise
+
+                    logging.warning(f"Unable to publish the message, reconnecting to the broker: {e!r}")
+
+    def close(self) -> None:
+        channels = []
+        while not self._pool.empty():
+            channels.append(self._pool.get())
+
+        for channel in channels:
+            channel.reset()
+            self._pool.put(channel)
+
+
+def get_connection_factory() -> Callable[[], BlockingConnection]:
+    parameters = URLParameters(settings.AMPQ_CONNECTION_URL)
+    return lambda: BlockingConnection(parameters=parameters)
+
+
+def get_replication_codec() -> MessageCodec:
+    return get_codec(settings.REPLICATION_CONTENT_TYPE)
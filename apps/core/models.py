@@ -1,3 +1,28 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 
-# Create your models here.
+
+class OutboxEvent(models.Model):
+    """
+    Replication event saved in the same transaction as the data it describes.
+    Events are published to the message broker by the outbox relay in the order of their ids.
+    """
+    exchange_name = models.CharField(max_length=255)
+    routing_key = models.CharField(max_length=255)
+    payload = models.JSONField(encoder=DjangoJSONEncoder, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.routing_key} ({self.id})"
+
+
+class ProcessedMessage(models.Model):
+    """
+    Identifier of the message received from the message broker and already handled.
+    Saved in the same transaction as the changes made by the message, so redelivered messages are skipped.
+    """
+    message_id = models.CharField(max_length=255, unique=True)
+    processed_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return self.message_id
@@ -1,17 +1,40 @@
-import json
+import queue
 import threading
 import logging
+from functools import partial
+from typing import Any, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
 
 from apps.core.message_broker.base.consumer import Consumer
+from apps.core.message_broker.codecs import get_codec
+from dependencies.service_dependencies.inbox import get_processed_message_ledger
 
 
 class BaseQueueListener(threading.Thread):
+    """
+    Listener that handles messages in the pool of worker threads and acknowledges them after they were handled.
+    Messages with the same ordering key are handled by the same worker in the order they were received.
+    Messages without the ordering key are handled after all previous messages and before the next ones.
+    If batch_size is greater than 1, consecutive messages with BATCHED_ROUTING_KEYS are collected
+    for batch_window_ms or until batch_size messages and handled at once by batch_message_handler_func.
+    Messages with the identifier (see get_message_id) are recorded in the processed message ledger
+    in the same transaction as their changes, so redelivered messages are acknowledged without handling.
+    Messages which can't be handled are rejected to the dead-letter queue of the listener's queue.
+    """
     BINDING_KEY = None
     exchange_name = None
+    # Durable queue of the listener, shared by all its processes
+    queue_name = None
     message_handler_func = None
     exchange_type = "topic"
+    # Routing keys of messages which can be handled in batches
+    BATCHED_ROUTING_KEYS = ()
+    batch_message_handler_func = None
 
-    def __init__(self):
+    def __init__(self, workers_count: Optional[int] = None, prefetch_count: Optional[int] = None,
+                 batch_size: int = 1, batch_window_ms: int = 0):
         super().__init__()
 
         # Check if BINDING_KEY, exchange_name, and message_handler_func are defined in the subclass
@@ -19,19 +42,202 @@ class BaseQueueListener(threading.Thread):
             raise ValueError("BINDING_KEY must be defined in the subclass")
         if self.exchange_name is None:
             raise ValueError("exchange_name must be defined in the subclass")
+        if self.queue_name is None:
+            raise ValueError("queue_name must be defined in the subclass")
         if self.message_handler_func is None or not callable(self.message_handler_func):
             raise ValueError("message_handler_func must be defined and callable in the subclass")
 
-        self.consumer = Consumer(
-            exchange_name=self.exchange_name,
-            exchange_type=self.exchange_type
-        )
+        self.workers_count = workers_count if workers_count is not None else settings.QUEUE_LISTENER_WORKERS
+        self.prefetch_count = prefetch_count if prefetch_count is not None else settings.QUEUE_LISTENER_PREFETCH_COUNT
+        self.batch_size = batch_size
+        self.batch_window_ms = batch_window_ms
+        if self.batch_size > 1 and (self.batch_message_handler_func is None
+                                    or not callable(self.batch_message_handler_func)):
+            raise ValueError("batch_message_handler_func must be defined and callable to handle messages in batches")
+
+        self.message_ledger = get_processed_message_ledger()
+        self.consumer = self.create_consumer()
         self.consumer.bind_queue(self.BINDING_KEY)
+        # Without the limit, the broker pushes the whole backlog into the listener's memory
+        self.consumer.set_prefetch_count(self.prefetch_count)
+
+        self._worker_queues: List[queue.Queue] = [queue.Queue() for _ in range(self.workers_count)]
+        self._workers: List[threading.Thread] = []
+        self._in_flight_count = 0
+        self._in_flight_condition = threading.Condition()
+        self._batch: List[Tuple[Any, int, str, Any, Optional[str]]] = []
+        # Increased on every flush, so the timer of the already flushed batch doesn't flush the next one
+        self._batch_number = 0
+
+    def create_consumer(self) -> Consumer:
+        return Consumer(exchange_name=self.exchange_name, exchange_type=self.exchange_type, queue_name=self.queue_name)
+
+    def get_ordering_key(self, routing_key: str, message: Any) -> Optional[str]:
+        """
+        Returns the key of messages which must be handled in the order they were received.
+        Messages with different keys are handled concurrently.
+        If None is returned, the message is handled after all previous messages are handled.
+        """
+        return None
+
+    def get_message_id(self, routing_key: str, message: Any, properties: Any) -> Optional[str]:
+        """
+        Returns the unique identifier of the message, used to skip redelivered messages.
+        If None is returned, the message is handled every time it is delivered.
+        """
+        message_id = getattr(properties, 'message_id', None)
+        return f"{self.exchange_name}:{message_id}" if message_id else None
+
+    def handle_message(self, routing_key: str, message: Any, message_id: Optional[str] = None) -> bool:
+        """
+        Handles the message and returns True if it was handled successfully or it was already handled.
+        """
+        # Worker threads have their own database connections, which can be closed by the database while idle
+        close_old_connections()
+        try:
+            if message_id is None:
+                self.message_handler_func(routing_key, message)
+                return True
+
+            with transaction.atomic():
+                if not self.message_ledger.mark_processed(message_id):
+                    logging.info(f"Skipping already handled message {message_id}")
+                    return True
+
+                self.message_handler_func(routing_key, message)
+            return True
+        except Exception as e:
+            logging.exception(f"Unable to handle the message {routing_key}: {e!r}")
+            return False
+
+    def handle_message_batch(self, messages: List[Tuple[str, Any, Optional[str]]]) -> bool:
+        """
+        Handles messages (routing key, message, message id) at once
+        and returns True if they were handled successfully.
+        """
+        close_old_connections()
+        try:
+            message_ids = [message_id for _, _, message_id in messages if message_id is not None]
+            if not message_ids:
+                self.batch_message_handler_func([(routing_key, message) for routing_key, message, _ in messages])
+                return True
+
+            with transaction.atomic():
+                new_message_ids = self.message_ledger.mark_many_processed(message_ids)
+                new_messages = []
+                for routing_key, message, message_id in messages:
+                    if message_id is None:
+                        new_messages.append((routing_key, message))
+                    elif message_id in new_message_ids:
+                        # The message can be redelivered while its first copy is still in the batch
+                        new_message_ids.remove(message_id)
+                        new_messages.append((routing_key, message))
+
+                self.batch_message_handler_func(new_messages)
+            return True
+        except Exception as e:
+            logging.exception(f"Unable to handle the batch of {len(messages)} messages: {e!r}")
+            return False
+
+    @staticmethod
+    def _acknowledge(channel, delivery_tag: int, is_handled: bool) -> None:
+        if is_handled:
+            channel.basic_ack(delivery_tag=delivery_tag)
+        else:
+            # The failed message is dead-lettered instead of being requeued, otherwise it would be redelivered endlessly
+            channel.basic_nack(delivery_tag=delivery_tag, requeue=False)
+
+    def _wait_for_workers(self) -> None:
+        with self._in_flight_condition:
+            self._in_flight_condition.wait_for(lambda: self._in_flight_count == 0)
+
+    def _work(self, worker_queue: queue.Queue) -> None:
+        while True:
+            item = worker_queue.get()
+            if item is None:
+                return
+
+            channel, delivery_tag, routing_key, message, message_id = item
+            is_handled = self.handle_message(routing_key, message, message_id)
+            # Channels are not thread-safe, so the message is acknowledged on the consumer's thread
+            self.consumer.add_callback_threadsafe(partial(self._acknowledge, channel, delivery_tag, is_handled))
+
+            with self._in_flight_condition:
+                self._in_flight_count -= 1
+                self._in_flight_condition.notify_all()
+
+    def _add_to_batch(self, channel, delivery_tag: int, routing_key: str, message: Any,
+                      message_id: Optional[str]) -> None:
+        self._batch.append((channel, delivery_tag, routing_key, message, message_id))
+        if len(self._batch) >= self.batch_size:
+            self._flush_batch()
+        elif len(self._batch) == 1:
+            batch_number = self._batch_number
+            self.consumer.call_later(self.batch_window_ms / 1000, lambda: self._flush_batch(batch_number))
+
+    def _flush_batch(self, batch_number: Optional[int] = None) -> None:
+        if not self._batch or (batch_number is not None and batch_number != self._batch_number):
+            return
+
+        batch, self._batch = self._batch, []
+        self._batch_number += 1
+        # The batch is handled like a message without the ordering key
+        self._wait_for_workers()
+        is_handled = self.handle_message_batch([
+            (routing_key, message, message_id) for _, _, routing_key, message, message_id in batch
+        ])
+        for channel, delivery_tag, _, _, _ in batch:
+            self._acknowledge(channel, delivery_tag, is_handled)
+
+    def callback(self, ch, method, properties, body):
+        try:
+            # Messages are decoded according to their content type, messages without it are JSON
+            message = get_codec(getattr(properties, 'content_type', None)).decode(body)
+        except Exception:
+            logging.error(f"Unable to parse the message {method.routing_key}: {body!r}")
+            self._acknowledge(ch, method.delivery_tag, is_handled=False)
+            return
+
+        logging.debug(f"[x] {method.routing_key}, {message}")
+        message_id = self.get_message_id(method.routing_key, message, properties)
+        if self.batch_size > 1 and method.routing_key in self.BATCHED_ROUTING_KEYS:
+            self._add_to_batch(ch, method.delivery_tag, method.routing_key, message, message_id)
+            return
+
+        # Collected messages must be handled before the next message
+        self._flush_batch()
+        ordering_key = self.get_ordering_key(method.routing_key, message)
+        if ordering_key is None or not self._worker_queues:
+            self._wait_for_workers()
+            is_handled = self.handle_message(method.routing_key, message, message_id)
+            self._acknowledge(ch, method.delivery_tag, is_handled)
+            return
+
+        with self._in_flight_condition:
+            self._in_flight_count += 1
+
+        worker_queue = self._worker_queues[hash(ordering_key) % len(self._worker_queues)]
+        worker_queue.put((ch, method.delivery_tag, method.routing_key, message, message_id))
+
+    def start_workers(self) -> None:
+        for worker_queue in self._worker_queues:
+            worker = threading.Thread(target=self._work, args=(worker_queue, ), daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def stop_workers(self) -> None:
+        for worker_queue in self._worker_queues:
+            worker_queue.put(None)
+
+        for worker in self._workers:
+            worker.join()
 
-    def callback(self, _ch, method, _properties, body):
-        print(f"[x] {method.routing_key}, {json.loads(body)}")
-        self.message_handler_func(method.routing_key, json.loads(body))
+        self._workers = []
 
     def run(self):
         logging.info('Listener was launched')
-        self.consumer.consume(callback=self.callback)
+        self.start_workers()
+        try:
+            self.consumer.consume(callback=self.callback, auto_ack=False)
+        finally:
+            self.stop_workers()
@@ -1,9 +1,25 @@
 from django.conf import settings
 
 from .base_queue_listenter import BaseQueueListener
-from services.orders.message_handler import handle_message
+from services.orders.message_handler import handle_message, handle_message_batch, BATCHED_ROUTING_KEYS
 
 class OrderProcessingQueueListener(BaseQueueListener):
     BINDING_KEY = 'orders.#'
     exchange_name = settings.ORDER_PROCESSING_EXCHANGE_TOPIC_NAME
+    queue_name = 'users.orders'
     message_handler_func = staticmethod(handle_message)
+    BATCHED_ROUTING_KEYS = BATCHED_ROUTING_KEYS
+    batch_message_handler_func = staticmethod(handle_message_batch)
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('batch_size', settings.ORDER_QUEUE_LISTENER_BATCH_SIZE)
+        kwargs.setdefault('batch_window_ms', settings.ORDER_QUEUE_LISTENER_BATCH_WINDOW_MS)
+        super().__init__(**kwargs)
+
+    def get_message_id(self, routing_key, message, properties):
+        # Stock changes are relative, so the redelivered message must not be handled twice
+        message_id = super().get_message_id(routing_key, message, properties)
+        if message_id is None and message.get("order_id") is not None:
+            message_id = f"{routing_key}:{message['order_id']}"
+
+        return message_id
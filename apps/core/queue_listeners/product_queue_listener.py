@@ -1,9 +1,26 @@
 from django.conf import settings
 
 from .base_queue_listenter import BaseQueueListener
-from services.products.message_handler import handle_message
+from services.products.message_handler import handle_message, handle_message_batch, BATCHED_ROUTING_KEYS
 
 class ProductQueueListener(BaseQueueListener):
     BINDING_KEY = 'products.#'
     exchange_name = settings.PRODUCT_CRUD_EXCHANGE_TOPIC_NAME
+    queue_name = 'users.products'
     message_handler_func = staticmethod(handle_message)
+    BATCHED_ROUTING_KEYS = BATCHED_ROUTING_KEYS
+    batch_message_handler_func = staticmethod(handle_message_batch)
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('batch_size', settings.PRODUCT_QUEUE_LISTENER_BATCH_SIZE)
+        kwargs.setdefault('batch_window_ms', settings.PRODUCT_QUEUE_LISTENER_BATCH_WINDOW_MS)
+        super().__init__(**kwargs)
+
+    def get_ordering_key(self, routing_key, message):
+        # Messages about one product are handled in order, messages about many products wait for all previous ones
+        if routing_key in ('products.crud.create.one', 'products.crud.update.one'):
+            return message.get("object_id")
+        elif routing_key == 'products.crud.delete.one':
+            return message.get("_id")
+
+        return None
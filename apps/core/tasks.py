@@ -1,18 +1,38 @@
 import logging
 from typing import Any
 import dramatiq
+from dramatiq_crontab import cron
 
-from apps.core.message_broker.base.producer import Producer
+from dependencies.service_dependencies.inbox import get_processed_message_ledger
+from dependencies.service_dependencies.outbox import get_outbox_relay
+from services.outbox.outbox_writer import write_replication_event
 
 
 @dramatiq.actor
 def perform_data_topic_replication(exchange_name: str, routing_key: str, data: Any):
     """
-    Performs replicating of the data to other "subscribed" microservices.
+    Writes the replication event to the outbox.
+    Kept for messages which were enqueued before replication events were written to the outbox.
     """
-    logging.info(routing_key)
-    logging.info(str(data))
+    write_replication_event(exchange_name, routing_key, data)
 
-    producer = Producer(exchange_name=exchange_name, exchange_type='topic')
-    producer.send_message(routing_key, data)
-    producer.close()
+
+@dramatiq.actor
+def relay_outbox_events():
+    """
+    Publishes all events from the outbox, sent when the background relay of the web process couldn't publish them.
+    While the broker is unavailable, the task fails and is retried by Dramatiq with the backoff.
+    """
+    relay = get_outbox_relay()
+    while relay.relay_batch() == relay.batch_size:
+        pass
+
+
+@cron("30 * * * *") # Run Task Every Hour
+@dramatiq.actor
+def delete_expired_processed_messages():
+    """
+    Removes identifiers of handled messages older than the retention period.
+    """
+    deleted_count = get_processed_message_ledger().delete_expired()
+    logging.info(f"Deleted {deleted_count} identifiers of processed messages")
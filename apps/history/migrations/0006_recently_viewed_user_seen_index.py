@@ -0,0 +1,17 @@
+# Generated by Django 5.0.2 on 2026-10-18 16:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('history', '0005_alter_recentlyvieweditem_last_seen'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recentlyvieweditem',
+            index=models.Index(fields=['user', '-last_seen', '-id'], name='recently_viewed_user_seen_idx'),
+        ),
+    ]
@@ -18,5 +18,11 @@ class RecentlyViewedItem(models.Model):
     last_seen = models.DateTimeField(auto_now=True, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # User's history is read from the index in the order of pages
+            models.Index(fields=['user', '-last_seen', '-id'], name='recently_viewed_user_seen_idx'),
+        ]
+
     def __str__(self):
         return f"{self.product.name} Viewed By {self.user.email}"
@@ -1,4 +1,6 @@
-from rest_framework.pagination import PageNumberPagination
+import math
+
+from rest_framework.pagination import PageNumberPagination, CursorPagination
 
 class RecentlyViewedItemsPagination(PageNumberPagination):
     page_size_query_param = 'page_size'
@@ -9,3 +11,38 @@ class RecentlyViewedItemsPagination(PageNumberPagination):
         response = super().get_paginated_response(data)
         response.data['total_pages'] = self.page.paginator.num_pages
         return response
+
+
+class RecentlyViewedItemsCursorPagination(CursorPagination):
+    """
+    Pagination by the position of the last item, which is used instead of page numbers if the "cursor" parameter
+    is passed (an empty one for the first page). Items aren't counted and skipped with OFFSET,
+    so every page is read from the (user, -last_seen, -id) index as fast as the first one.
+    Approximate "total_pages" is returned only if "with_total_pages" parameter is passed.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 20
+    max_page_size = 40
+    ordering = ('-last_seen', '-id')
+    with_total_pages_query_param = 'with_total_pages'
+    # Items are counted up to this number, so "total_pages" of the longer history is the lower estimate
+    max_counted_items = 1000
+
+    @classmethod
+    def is_requested(cls, request) -> bool:
+        return cls.cursor_query_param in request.query_params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.total_pages = None
+        if request.query_params.get(self.with_total_pages_query_param) in ('true', '1'):
+            counted_items = queryset[:self.max_counted_items].count()
+            self.total_pages = max(math.ceil(counted_items / self.get_page_size(request)), 1)
+
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.total_pages is not None:
+            response.data['total_pages'] = self.total_pages
+        return response
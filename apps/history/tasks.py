@@ -0,0 +1,38 @@
+import logging
+import dramatiq
+from django.conf import settings
+from dramatiq_crontab import cron
+
+from dependencies.service_dependencies.history import get_recently_viewed_buffer, get_history_retention
+
+
+@cron("* * * * *") # Run Task Every Minute
+@dramatiq.actor
+def flush_recently_viewed_items():
+    """
+    Writes views of products buffered by the web processes to the users' history.
+    The task is skipped if write-behind is disabled.
+    """
+    if not settings.RECENTLY_VIEWED_WRITE_BEHIND:
+        return
+
+    buffer = get_recently_viewed_buffer()
+    users_count = 0
+    while True:
+        # Users are taken in portions, so a big buffer isn't written at once
+        flushed_users_count = buffer.flush()
+        if not flushed_users_count:
+            break
+        users_count += flushed_users_count
+
+    logging.info(f"Flushed recently viewed items of {users_count} users")
+
+
+@cron("15 3 * * *") # Run Task Every Day
+@dramatiq.actor
+def prune_recently_viewed_items():
+    """
+    Removes items of the users' history which are out of the retention policy.
+    """
+    result = get_history_retention().prune()
+    logging.info(f"Pruned {result.pruned_count} recently viewed items in {result.elapsed_seconds:.1f}s")
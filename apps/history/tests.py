@@ -1,10 +1,17 @@
+from datetime import timedelta
+
 from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.urls import reverse
 
 from apps.products.factories import ProductFactory
+from dependencies.service_dependencies.history import get_recently_viewed_buffer
+from services.history.history_retention import HistoryRetention
 from .models import RecentlyViewedItem
+from .tasks import flush_recently_viewed_items
 
 User = get_user_model()
 
@@ -157,3 +164,175 @@ class HistoryTestCase(APITestCase):
 
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertEqual(RecentlyViewedItem.objects.all().count(), 0)
+
+    def test_retrieve_recently_viewed_items_with_cursor(self):
+        """
+        Test that pages of the cursor pagination contain all items in the order they were viewed, without counting
+        """
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.access_token)
+
+        history_list_url = reverse('history-list')
+        response = self.client.get(history_list_url, {"cursor": "", "page_size": 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("count", response.data)
+        self.assertNotIn("total_pages", response.data)
+
+        ids = [item["id"] for item in response.data["results"]]
+        while response.data["next"]:
+            response = self.client.get(response.data["next"])
+            ids.extend(item["id"] for item in response.data["results"])
+
+        self.assertEqual(ids, [item.id for item in reversed(self.recently_viewed_items)])
+
+    def test_retrieve_recently_viewed_items_with_cursor_and_total_pages(self):
+        """
+        Test that the cursor pagination returns the total number of pages only if it's requested
+        """
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.access_token)
+
+        history_list_url = reverse('history-list')
+        response = self.client.get(history_list_url, {"cursor": "", "page_size": 2, "with_total_pages": "true"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["total_pages"], 3)
+
+
+@override_settings(RECENTLY_VIEWED_WRITE_BEHIND=True)
+class HistoryWriteBehindTestCase(APITestCase):
+    def setUp(self):
+        self.products = [ProductFactory.create() for _ in range(3)]
+        self.user = User.objects.create_user(email='buffered@gmail.com', password='test1488', first_name='Buffered')
+        self.viewed_item = RecentlyViewedItem.objects.create(product=self.products[0], user=self.user)
+        self.buffer = get_recently_viewed_buffer()
+        self.clear_buffer()
+        self.addCleanup(self.clear_buffer)
+        self.client.force_authenticate(self.user)
+
+    def clear_buffer(self):
+        keys = list(self.buffer.redis_client.scan_iter(f"{self.buffer.key_prefix}:*"))
+        if keys:
+            self.buffer.redis_client.delete(*keys)
+
+    def test_buffered_views_are_merged_into_history(self):
+        """
+        Ensures that views aren't written to the database, but the user sees them in the history immediately.
+        """
+        history_list_url = reverse('history-list')
+        for product in (self.products[0], self.products[1], self.products[1]):
+            with self.assertNumQueries(0):
+                response = self.client.post(history_list_url, data={'product': product.object_id}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+
+        self.assertEqual(RecentlyViewedItem.objects.count(), 1)
+
+        response = self.client.get(history_list_url)
+        view_counts = {item["item"]["object_id"]: item["view_count"] for item in response.data["results"]}
+        self.assertEqual(view_counts, {self.products[0].object_id: 2, self.products[1].object_id: 2})
+        # The latest viewed product is the first one
+        self.assertEqual(response.data["results"][0]["item"]["object_id"], self.products[1].object_id)
+        # Reading the history doesn't write the buffered views
+        self.assertEqual(RecentlyViewedItem.objects.count(), 1)
+        self.assertEqual(len(self.buffer.get_user_views(self.user.id)), 2)
+
+    def test_buffered_views_are_shown_only_on_first_page(self):
+        """
+        Ensures that items of the buffered views aren't repeated on the next pages.
+        """
+        RecentlyViewedItem.objects.create(product=self.products[1], user=self.user)
+        RecentlyViewedItem.objects.create(product=self.products[2], user=self.user)
+        self.buffer.record(self.user.id, self.products[0].object_id)
+
+        history_list_url = reverse('history-list')
+        first_page = self.client.get(history_list_url, {"page_size": 1})
+        second_page = self.client.get(history_list_url, {"page_size": 1, "page": 2})
+
+        self.assertEqual(
+            [item["item"]["object_id"] for item in first_page.data["results"]],
+            [self.products[0].object_id, self.products[2].object_id],
+        )
+        self.assertEqual(
+            [item["item"]["object_id"] for item in second_page.data["results"]], [self.products[1].object_id]
+        )
+
+    def test_removed_items_discard_buffered_views(self):
+        """
+        Ensures that views of the removed items aren't written back to the history by the flush.
+        """
+        self.buffer.record(self.user.id, self.products[0].object_id)
+        self.buffer.record(self.user.id, self.products[1].object_id)
+
+        response = self.client.delete(reverse('history-detail', kwargs={'pk': self.viewed_item.id}))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(
+            [view.product_id for view in self.buffer.get_user_views(self.user.id)], [self.products[1].object_id]
+        )
+
+        response = self.client.delete(reverse('history-destroy-all'))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.buffer.flush()
+        self.assertEqual(RecentlyViewedItem.objects.count(), 0)
+
+    def test_flush_task_is_skipped_if_write_behind_is_disabled(self):
+        """
+        Ensures that the periodic job doesn't touch the buffer if write-behind is disabled.
+        """
+        self.buffer.record(self.user.id, self.products[1].object_id)
+
+        with override_settings(RECENTLY_VIEWED_WRITE_BEHIND=False), self.assertNumQueries(0):
+            flush_recently_viewed_items.fn()
+
+        self.assertEqual(len(self.buffer.get_user_views(self.user.id)), 1)
+
+    def test_flush_writes_views_of_all_users(self):
+        """
+        Ensures that the periodic flush aggregates views and skips deleted products.
+        """
+        another_user = User.objects.create_user(email='another@gmail.com', password='test1488', first_name='Another')
+        self.buffer.record(self.user.id, self.products[0].object_id)
+        self.buffer.record(another_user.id, self.products[2].object_id)
+        self.buffer.record(another_user.id, self.products[2].object_id)
+        self.buffer.record(another_user.id, "deleted-product")
+
+        self.assertEqual(self.buffer.flush(), 2)
+        self.assertEqual(self.buffer.flush(), 0)
+
+        self.assertEqual(
+            dict(RecentlyViewedItem.objects.values_list('user_id', 'view_count')),
+            {self.user.id: 2, another_user.id: 2},
+        )
+
+
+class HistoryRetentionTestCase(TestCase):
+    def setUp(self):
+        self.products = [ProductFactory.create() for _ in range(5)]
+        self.user = User.objects.create_user(email='retention@gmail.com', password='test1488', first_name='Retention')
+        self.another_user = User.objects.create_user(email='kept@gmail.com', password='test1488', first_name='Kept')
+        now = timezone.now()
+        for i, product in enumerate(self.products):
+            item = RecentlyViewedItem.objects.create(product=product, user=self.user)
+            # The first product is the most recently viewed one
+            RecentlyViewedItem.objects.filter(id=item.id).update(last_seen=now - timedelta(days=i * 10))
+        RecentlyViewedItem.objects.create(product=self.products[0], user=self.another_user)
+
+    def get_user_products(self, user):
+        return list(
+            RecentlyViewedItem.objects.filter(user=user).order_by('-last_seen').values_list('product_id', flat=True)
+        )
+
+    def test_prune_expired_items(self):
+        retention = HistoryRetention(RecentlyViewedItem.objects.all(), max_age=timedelta(days=25), batch_size=1)
+
+        result = retention.prune()
+
+        self.assertEqual(result.pruned_count, 2)
+        self.assertEqual(self.get_user_products(self.user), [product.object_id for product in self.products[:3]])
+        self.assertEqual(RecentlyViewedItem.objects.filter(user=self.another_user).count(), 1)
+
+    def test_prune_items_over_the_limit_of_user(self):
+        retention = HistoryRetention(RecentlyViewedItem.objects.all(), max_items_per_user=2, batch_size=2)
+
+        result = retention.prune()
+
+        self.assertEqual(result.pruned_count, 3)
+        self.assertEqual(self.get_user_products(self.user), [product.object_id for product in self.products[:2]])
+        self.assertEqual(RecentlyViewedItem.objects.filter(user=self.another_user).count(), 1)
+        self.assertEqual(retention.prune().pruned_count, 0)
@@ -1,11 +1,16 @@
+from typing import List
+
+from django.conf import settings
 from django.http import QueryDict
 from rest_framework import mixins, viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
+from dependencies.service_dependencies.history import get_recently_viewed_buffer
+from apps.products.models import Product
 from .models import RecentlyViewedItem
 from .serializers.model_serializers import RecentlyViewedItemSerializer
-from .pagination import RecentlyViewedItemsPagination
+from .pagination import RecentlyViewedItemsPagination, RecentlyViewedItemsCursorPagination
 
 
 class HistoryViewSet(mixins.CreateModelMixin,
@@ -18,16 +23,83 @@ class HistoryViewSet(mixins.CreateModelMixin,
      - create a new viewed item in the user's history.
      - remove (destroy) a viewed item from the user's history
      - remove all viewed items from the user's history.
+    With the write-behind mode, views are buffered and written to the database by the periodic job,
+    user's buffered views are merged into the first page of the history without writing them,
+    and they're discarded when the items are removed from the history.
     """
     serializer_class = RecentlyViewedItemSerializer
     permission_classes = (permissions.IsAuthenticated,)
     pagination_class = RecentlyViewedItemsPagination
 
+    @property
+    def paginator(self):
+        """
+        Returns the cursor paginator if the cursor is passed, otherwise the page number paginator
+        """
+        if not hasattr(self, '_paginator'):
+            if RecentlyViewedItemsCursorPagination.is_requested(self.request):
+                self._paginator = RecentlyViewedItemsCursorPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
     def get_queryset(self):
         return RecentlyViewedItem.objects.filter(user=self.request.user) \
             .select_related('product').order_by('-last_seen')
 
+    def list(self, request, *args, **kwargs):
+        if not settings.RECENTLY_VIEWED_WRITE_BEHIND:
+            return super().list(request, *args, **kwargs)
+
+        buffered_views = get_recently_viewed_buffer().get_user_views(request.user.id)
+        if not buffered_views:
+            return super().list(request, *args, **kwargs)
+
+        # Items of the buffered products are shown on the first page, so they're skipped by all pages
+        buffered_product_ids = [view.product_id for view in buffered_views]
+        queryset = self.get_queryset()
+        page = self.paginate_queryset(queryset.exclude(product_id__in=buffered_product_ids))
+        if self._is_first_page():
+            page = self._merge_buffered_views(queryset, buffered_views) + list(page)
+
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    def _is_first_page(self) -> bool:
+        if isinstance(self.paginator, RecentlyViewedItemsCursorPagination):
+            return self.paginator.cursor is None
+        return self.paginator.page.number == 1
+
+    def _merge_buffered_views(self, queryset, buffered_views) -> List[RecentlyViewedItem]:
+        """
+        Returns items of the buffered views, as they will be after the flush, ordered by the last view
+        """
+        buffered_product_ids = [view.product_id for view in buffered_views]
+        stored_items = {item.product_id: item for item in queryset.filter(product_id__in=buffered_product_ids)}
+        products = Product.objects.in_bulk(buffered_product_ids, field_name='object_id')
+
+        items = []
+        for view in buffered_views:
+            item = stored_items.get(view.product_id)
+            if item is not None:
+                item.view_count += view.count
+                item.last_seen = max(item.last_seen, view.last_seen)
+            elif view.product_id in products:
+                item = RecentlyViewedItem(
+                    user=self.request.user, product=products[view.product_id], view_count=view.count,
+                    created_at=view.last_seen, last_seen=view.last_seen,
+                )
+            else:
+                # The product is deleted, its views are skipped by the flush
+                continue
+            items.append(item)
+
+        return sorted(items, key=lambda item: item.last_seen, reverse=True)
+
     def create(self, request, *args, **kwargs):
+        if settings.RECENTLY_VIEWED_WRITE_BEHIND:
+            return self.create_buffered(request)
+
         serializer_raw_data = {"user": request.user.id, **request.data}
         serializer = self.get_serializer(data=serializer_raw_data)
         serializer.is_valid(raise_exception=True)
@@ -41,8 +113,26 @@ class HistoryViewSet(mixins.CreateModelMixin,
         # so HTTP 201 status will be returned.
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
+    def create_buffered(self, request):
+        """
+        Records the view in the buffer without queries to the database
+        """
+        product_id = request.data.get("product")
+        if not product_id or not isinstance(product_id, str):
+            return Response({"product": ["This field is required."]}, status=status.HTTP_400_BAD_REQUEST)
+
+        get_recently_viewed_buffer().record(request.user.id, product_id)
+        return Response({"product": product_id, "user": request.user.id}, status=status.HTTP_202_ACCEPTED)
+
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        if settings.RECENTLY_VIEWED_WRITE_BEHIND:
+            get_recently_viewed_buffer().discard(self.request.user.id, [instance.product_id])
+
     @action(detail=False, methods=['DELETE', ], url_path='delete-all', url_name='destroy-all')
     def destroy_all(self, request):
+        if settings.RECENTLY_VIEWED_WRITE_BEHIND:
+            get_recently_viewed_buffer().discard(request.user.id)
         queryset = self.get_queryset()
         deleted_viewed_items_count, _ = queryset.delete()
         return Response(
@@ -0,0 +1,58 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.products.models import Product
+from apps.products.param_classes.attach_to_event_params import AttachToEventParams
+from apps.products.param_classes.detach_from_event_params import DetachFromEventParams
+from services.products.replication.update import ProductModifier
+from .benchmark_product_ingestion import Rollback, Command as ProductIngestionBenchmark
+
+
+class Command(BaseCommand):
+    help = ('Compares attaching products to the event with save() of every product and with set-based updates. '
+            'All changes are rolled back')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                            help='Numbers of products attached to the event')
+        parser.add_argument('--max-save-size', type=int, default=10000,
+                            help='save() of every product is measured only for sizes up to this number')
+
+    def report(self, name: str, count: int, elapsed: float) -> None:
+        self.stdout.write(f"{name}: {count} products in {elapsed:.3f}s")
+
+    def handle(self, *args, **options):
+        product_modifier = ProductModifier()
+        for size in options['sizes']:
+            try:
+                with transaction.atomic():
+                    Product.objects.bulk_create(
+                        [Product(**row) for row in ProductIngestionBenchmark.make_rows(size)], batch_size=5000,
+                    )
+                    product_ids = list(Product.objects.values_list('object_id', flat=True)[:size])
+                    discounts = [round(random.uniform(0.05, 0.5), 2) for _ in product_ids]
+
+                    if size <= options['max_save_size']:
+                        # The previous implementation of attaching products to the event
+                        started_at = time.perf_counter()
+                        discount_mapping = dict(zip(product_ids, discounts))
+                        for product in Product.objects.filter(object_id__in=product_ids):
+                            product.discount_rate = discount_mapping[product.object_id]
+                            product.event_id = 'benchmark_save'
+                            product.save()
+                        self.report('save() per product attach', size, time.perf_counter() - started_at)
+
+                    started_at = time.perf_counter()
+                    product_modifier.attach_to_event(AttachToEventParams(product_ids, discounts, 'benchmark'))
+                    self.report('set-based attach', size, time.perf_counter() - started_at)
+
+                    started_at = time.perf_counter()
+                    product_modifier.detach_from_event(DetachFromEventParams('benchmark'))
+                    self.report('set-based detach', size, time.perf_counter() - started_at)
+
+                    raise Rollback
+            except Rollback:
+                pass
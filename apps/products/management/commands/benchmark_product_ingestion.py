@@ -0,0 +1,63 @@
+import time
+
+from bson import ObjectId
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.products.models import Product
+from apps.products.serializers.update import ProductSerializer
+from dependencies.service_dependencies.products import get_product_bulk_ingestor
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = ('Measures throughput of the bulk ingestion of created and updated products '
+            'and compares it with the update through serializers. All changes are rolled back')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=10000, help='Number of products in the message')
+
+    @staticmethod
+    def make_rows(count: int) -> list[dict]:
+        return [
+            {"object_id": str(ObjectId()), "name": f"Product {i}", "price": "199.99", "tax_rate": "0.20",
+             "discount_rate": "0.05", "stock": 100, "max_order_qty": 10, "sku": f"SKU-{i:08}",
+             "image": f"https://example.com/products/{i}.png"}
+            for i in range(count)
+        ]
+
+    def report(self, name: str, count: int, elapsed: float) -> None:
+        self.stdout.write(f"{name}: {count} products in {elapsed:.3f}s ({count / elapsed * 60:.0f} products/min)")
+
+    def handle(self, *args, **options):
+        count = options['products']
+        ingestor = get_product_bulk_ingestor()
+        rows = self.make_rows(count)
+        update_rows = [{"object_id": row["object_id"], "stock": 50, "price": "149.99"} for row in rows]
+
+        try:
+            with transaction.atomic():
+                started_at = time.perf_counter()
+                ingestor.create_many(rows)
+                self.report('bulk create.many', count, time.perf_counter() - started_at)
+
+                started_at = time.perf_counter()
+                ingestor.update_many(update_rows)
+                self.report('bulk update.many', count, time.perf_counter() - started_at)
+
+                # The previous implementation of update.many
+                started_at = time.perf_counter()
+                grouped_data = {row["object_id"]: row for row in update_rows}
+                for product in Product.objects.filter(object_id__in=grouped_data.keys()):
+                    serializer = ProductSerializer(instance=product, data=grouped_data[product.object_id],
+                                                   partial=True)
+                    serializer.is_valid(raise_exception=True)
+                    serializer.save()
+                self.report('serializer per product update.many', count, time.perf_counter() - started_at)
+
+                raise Rollback
+        except Rollback:
+            pass
@@ -0,0 +1,86 @@
+import random
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction, connection
+
+from apps.products.models import Product
+from services.products.stock_reservation import StockReservationEngine
+from .benchmark_product_ingestion import Command as ProductIngestionBenchmark
+
+
+class Command(BaseCommand):
+    help = ('Reserves a few "hot" products from many threads, like during a flash sale, '
+            'and compares the conditional decrement with locking reads. Use it against PostgreSQL, '
+            'created products are removed at the end')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16, help='Number of concurrent consumers')
+        parser.add_argument('--orders', type=int, default=200, help='Number of orders per thread')
+        parser.add_argument('--products', type=int, default=5, help='Number of hot products')
+        parser.add_argument('--stock', type=int, default=2000, help='Initial stock of every product')
+
+    @staticmethod
+    def reserve_with_locking_read(product_items) -> bool:
+        # Reads with SELECT ... FOR UPDATE, so concurrent orders of the same product wait for each other
+        with transaction.atomic():
+            products = Product.objects.select_for_update().in_bulk(
+                [item["product_id"] for item in product_items], field_name='object_id',
+            )
+            if any(products.get(item["product_id"]) is None or products[item["product_id"]].stock < item["quantity"]
+                   for item in product_items):
+                return False
+
+            for item in product_items:
+                product = products[item["product_id"]]
+                product.stock -= item["quantity"]
+                product.save(update_fields=['stock'])
+            return True
+
+    def run_benchmark(self, name, reserve, product_ids, options) -> None:
+        Product.objects.filter(object_id__in=product_ids).update(stock=options['stock'])
+        reserved_units = [0] * options['threads']
+        failed_orders = [0] * options['threads']
+
+        def consume(thread_number):
+            try:
+                for _ in range(options['orders']):
+                    product_items = [{"product_id": product_id, "quantity": random.randint(1, 3)}
+                                     for product_id in random.sample(product_ids, k=min(2, len(product_ids)))]
+                    if reserve(product_items):
+                        reserved_units[thread_number] += sum(item["quantity"] for item in product_items)
+                    else:
+                        failed_orders[thread_number] += 1
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=consume, args=(i, )) for i in range(options['threads'])]
+        started_at = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started_at
+
+        remaining_stock = sum(Product.objects.filter(object_id__in=product_ids).values_list('stock', flat=True))
+        orders_count = options['threads'] * options['orders']
+        is_consistent = remaining_stock + sum(reserved_units) == options['stock'] * len(product_ids)
+        self.stdout.write(
+            f"{name}: {orders_count} orders in {elapsed:.3f}s ({orders_count / elapsed:.0f} orders/s), "
+            f"{sum(failed_orders)} without enough stock, remaining stock {remaining_stock}, "
+            f"{'consistent' if is_consistent else 'OVERSOLD OR LOST UPDATES'}"
+        )
+
+    def handle(self, *args, **options):
+        rows = ProductIngestionBenchmark.make_rows(options['products'])
+        Product.objects.bulk_create([Product(**row) for row in rows])
+        product_ids = [row["object_id"] for row in rows]
+
+        engine = StockReservationEngine(Product.objects.all())
+        try:
+            self.run_benchmark('locking read', self.reserve_with_locking_read, product_ids, options)
+            self.run_benchmark('conditional decrement', lambda items: engine.reserve(items).is_reserved,
+                               product_ids, options)
+        finally:
+            Product.objects.filter(object_id__in=product_ids).delete()
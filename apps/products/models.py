@@ -3,6 +3,8 @@ from decimal import Decimal
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
 
+from .pricing import PricingRow, price_item
+
 
 class Product(models.Model):
     # Original product's identifier from the product microservice
@@ -30,10 +32,12 @@ class Product(models.Model):
     image = models.URLField()
     event_id = models.CharField(db_index=True, null=True, blank=True, default=None)
 
+    def get_pricing_row(self, quantity: int = 1) -> PricingRow:
+        return PricingRow(self.price, self.discount_rate, self.tax_rate, quantity)
+
     @property
     def discounted_price(self):
-        discount_rate = self.discount_rate if self.discount_rate is not None else Decimal("0.00")
-        return self.price - (self.price * discount_rate)
+        return price_item(self.get_pricing_row()).discounted_price
 
     @property
     def discount_percentage(self):
@@ -42,7 +46,7 @@ class Product(models.Model):
 
     @property
     def tax_amount(self):
-        return round(self.discounted_price * self.tax_rate, 2)
+        return price_item(self.get_pricing_row()).tax_amount
 
     @property
     def tax_percentage(self):
@@ -0,0 +1,77 @@
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Iterable, List, NamedTuple, Optional
+
+
+CENT = Decimal("0.01")
+ZERO = Decimal("0.00")
+
+
+def round_money(amount: Decimal) -> Decimal:
+    """
+    Rounds the amount to cents, halves are rounded up.
+    """
+    return amount.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+class PricingRow(NamedTuple):
+    """
+    Prices of the product and its quantity:
+        - price: Price of the product without discount.
+        - discount_rate: Coefficient where 0.00 means 0% discount and 1 means 100% discount, None means no discount.
+        - tax_rate: Coefficient where 0.00 means 0% tax and 1 means 100% tax.
+        - quantity: Number of units.
+    """
+    price: Decimal
+    discount_rate: Optional[Decimal]
+    tax_rate: Decimal
+    quantity: int = 1
+
+
+class PricedItem(NamedTuple):
+    """
+    Amounts derived from the pricing row, all of them are rounded to cents:
+        - discounted_price: Price of one unit with the discount.
+        - tax_amount: Tax of one unit.
+        - total_price: Price of all units, discounted_price * quantity.
+        - total_tax: Tax of all units, tax_amount * quantity.
+    """
+    discounted_price: Decimal
+    tax_amount: Decimal
+    total_price: Decimal
+    total_tax: Decimal
+
+
+class PricingResult(NamedTuple):
+    """
+    Priced items in the order of pricing rows and totals, which are the sums of the item amounts.
+    """
+    items: List[PricedItem]
+    count: int
+    total: Decimal
+    tax_total: Decimal
+
+
+def price_item(row: PricingRow) -> PricedItem:
+    discount_rate = row.discount_rate if row.discount_rate is not None else ZERO
+    # Amounts shown to the user are rounded first, so totals always match the sum of the shown amounts
+    discounted_price = round_money(row.price - row.price * discount_rate)
+    tax_amount = round_money(discounted_price * row.tax_rate)
+    return PricedItem(discounted_price, tax_amount, discounted_price * row.quantity, tax_amount * row.quantity)
+
+
+def price_items(rows: Iterable[PricingRow]) -> PricingResult:
+    """
+    Calculates amounts of all rows and their totals in one pass.
+    """
+    items = []
+    count = 0
+    total = ZERO
+    tax_total = ZERO
+    for row in rows:
+        item = price_item(row)
+        items.append(item)
+        count += row.quantity
+        total += item.total_price
+        tax_total += item.total_tax
+
+    return PricingResult(items, count, total, tax_total)
@@ -1,3 +1,318 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.carts.models import Cart, CartItem
+from apps.core.models import OutboxEvent
+from apps.products.factories import ProductFactory
+from apps.products.models import Product
+from apps.products.pricing import round_money, PricingRow, price_items
+from apps.products.param_classes.attach_to_event_params import AttachToEventParams
+from apps.products.param_classes.detach_from_event_params import DetachFromEventParams
+from dependencies.service_dependencies.carts import get_cart_cache, get_cart_service
+from dependencies.service_dependencies.products import get_product_service
+from services.orders.replication.order_processing import OrderProcessingHandler
+from services.orders.message_handler import handle_message_batch as handle_order_message_batch
+from services.products.message_handler import handle_message_batch
+from services.products.replication.bulk_ingestion import ProductBulkIngestor
+from services.products.replication.update import ProductModifier
+
+Account = get_user_model()
+
+
+class TestProductBulkIngestor(TestCase):
+    def setUp(self):
+        caches['carts'].clear()
+        self.ingestor = ProductBulkIngestor(get_cart_cache(), chunk_size=2)
+
+    @staticmethod
+    def make_row(object_id, **fields):
+        row = {"object_id": object_id, "name": "Phone", "price": "199.99", "tax_rate": "0.20", "stock": 10,
+               "max_order_qty": 5, "sku": "PHN-00000001", "image": "https://example.com/phone.png"}
+        row.update(fields)
+        return row
+
+    def test_create_many_rejects_invalid_rows(self):
+        """
+        Invalid rows are rejected, while other rows of the batch are created
+        """
+        rows = [
+            self.make_row("1"),
+            self.make_row("2", price="not a number"),
+            self.make_row("3", tax_rate="1.50"),
+            {"object_id": "4", "name": "No price"},
+            self.make_row("5"),
+        ]
+
+        result = self.ingestor.create_many(rows)
+
+        self.assertEqual(result.ingested_count, 2)
+        self.assertEqual([object_id for object_id, _ in result.rejected_rows], ["2", "3", "4"])
+        self.assertIn("price", result.rejected_rows[2][1])
+        self.assertEqual(set(Product.objects.values_list('object_id', flat=True)), {"1", "5"})
+
+    def test_create_many_accepts_numeric_prices(self):
+        """
+        Prices and rates sent as JSON numbers are accepted like the same values sent as strings
+        """
+        result = self.ingestor.create_many([self.make_row("1", price=19.99, discount_rate=0.1, tax_rate=0.2)])
+        self.assertEqual(result.rejected_rows, [])
+
+        result = self.ingestor.update_many([{"object_id": "1", "price": 0.3}])
+        self.assertEqual(result.rejected_rows, [])
+
+        product = Product.objects.get(object_id="1")
+        self.assertEqual((product.price, product.discount_rate, product.tax_rate),
+                         (Decimal("0.30"), Decimal("0.10"), Decimal("0.20")))
+
+    def test_create_many_updates_existing_products(self):
+        """
+        Redelivered creation updates provided fields and keeps fields missing in the message
+        """
+        product = ProductFactory(discount_rate=Decimal("0.10"), event_id="event")
+
+        result = self.ingestor.create_many([self.make_row(product.object_id, price="10.00")])
+
+        product.refresh_from_db()
+        self.assertEqual(result.ingested_count, 1)
+        self.assertEqual(product.price, Decimal("10.00"))
+        self.assertEqual(product.discount_rate, Decimal("0.10"))
+        self.assertEqual(product.event_id, "event")
+
+    def test_update_many_updates_only_provided_fields(self):
+        products = ProductFactory.create_batch(3)
+        rows = [{"object_id": product.object_id, "stock": 100 + i} for i, product in enumerate(products)]
+        rows.append({"object_id": products[0].object_id, "name": "Renamed"})
+
+        result = self.ingestor.update_many(rows)
+
+        self.assertEqual(result.ingested_count, 3)
+        self.assertEqual(result.rejected_rows, [])
+        for i, product in enumerate(products):
+            updated_product = Product.objects.get(id=product.id)
+            self.assertEqual(updated_product.stock, 100 + i)
+            self.assertEqual(updated_product.price, product.price)
+        self.assertEqual(Product.objects.get(id=products[0].id).name, "Renamed")
+
+    def test_update_many_rejects_missing_and_invalid_rows(self):
+        product = ProductFactory(stock=1)
+
+        result = self.ingestor.update_many([
+            {"object_id": "missing", "stock": 5},
+            {"object_id": product.object_id, "stock": -1},
+            {"stock": 5},
+        ])
+
+        product.refresh_from_db()
+        self.assertEqual(result.ingested_count, 0)
+        self.assertEqual([object_id for object_id, _ in result.rejected_rows], [product.object_id, None, "missing"])
+        self.assertEqual(product.stock, 1)
+
+
+class TestProductEvents(TestCase):
+    def setUp(self):
+        caches['carts'].clear()
+        self.products = ProductFactory.create_batch(3, discount_rate=None, event_id=None)
+        self.cart = Cart.objects.create(user_id=None)
+        CartItem.objects.create(cart=self.cart, product=self.products[0], quantity=1)
+        self.cart_service = get_cart_service()
+        self.cart_filters = self.cart_service.get_cart_filters(self.cart.cart_uuid)
+
+    def test_attach_to_event(self):
+        """
+        Products get their own discounts and carts with these products are invalidated
+        """
+        self.cart_service.get_cart_short_info(self.cart_filters)
+
+        cart_uuids = ProductModifier().attach_to_event(AttachToEventParams(
+            product_ids=[self.products[0].object_id, self.products[1].object_id],
+            discounts=[0.15, 0.3],
+            event_id="event",
+        ))
+
+        self.assertEqual(cart_uuids, [self.cart.cart_uuid])
+        discounts = dict(Product.objects.values_list('object_id', 'discount_rate'))
+        self.assertEqual(discounts[self.products[0].object_id], Decimal("0.15"))
+        self.assertEqual(discounts[self.products[1].object_id], Decimal("0.30"))
+        self.assertIsNone(discounts[self.products[2].object_id])
+        self.assertEqual(Product.objects.filter(event_id="event").count(), 2)
+        event = OutboxEvent.objects.get()
+        self.assertEqual(event.routing_key, 'users.carts.reprice')
+        self.assertEqual(event.payload, {"event_id": "event", "cart_uuids": [str(self.cart.cart_uuid)]})
+
+        cart_short_info = self.cart_service.get_cart_short_info(self.cart_filters)
+        self.assertEqual(cart_short_info["total"], round_money(self.products[0].price * Decimal("0.85")))
+
+    def test_detach_from_event(self):
+        Product.objects.filter(id__in=[self.products[0].id, self.products[1].id]).update(
+            discount_rate=Decimal("0.10"), event_id="event",
+        )
+
+        cart_uuids = ProductModifier().detach_from_event(DetachFromEventParams(event_id="event"))
+
+        self.assertEqual(cart_uuids, [self.cart.cart_uuid])
+        self.assertFalse(Product.objects.filter(discount_rate__isnull=False).exists())
+        self.assertFalse(Product.objects.filter(event_id="event").exists())
+        event = OutboxEvent.objects.get()
+        self.assertEqual(event.routing_key, 'users.carts.reprice')
+        self.assertEqual(event.payload["cart_uuids"], [str(self.cart.cart_uuid)])
+
+    def test_event_without_carts_is_not_replicated(self):
+        ProductModifier().attach_to_event(AttachToEventParams(
+            product_ids=[self.products[2].object_id], discounts=[0.5], event_id="event",
+        ))
+
+        self.assertFalse(OutboxEvent.objects.exists())
+
+
+class TestProductMessageBatch(TestCase):
+    def setUp(self):
+        caches['carts'].clear()
+
+    def test_messages_about_same_product_are_collapsed(self):
+        removed_product = ProductFactory()
+        row = {"object_id": "1", "name": "Phone", "price": "199.99", "tax_rate": "0.20", "stock": 10,
+               "max_order_qty": 5, "sku": "PHN-00000001", "image": "https://example.com/phone.png"}
+
+        handle_message_batch([
+            ('products.crud.create.one', row),
+            ('products.crud.update.one', {"object_id": "1", "stock": 20}),
+            ('products.crud.update.one', {"object_id": "1", "price": "99.99"}),
+            ('products.crud.update.one', {"object_id": "1", "stock": 30}),
+            ('products.crud.delete.one', {"_id": removed_product.object_id}),
+        ])
+
+        product = Product.objects.get(object_id="1")
+        self.assertEqual(product.stock, 30)
+        self.assertEqual(product.price, Decimal("99.99"))
+        self.assertFalse(Product.objects.filter(id=removed_product.id).exists())
+
+
+class TestPricing(TestCase):
+    def test_totals_match_sum_of_rounded_amounts(self):
+        pricing = price_items([
+            PricingRow(Decimal("19.99"), Decimal("0.15"), Decimal("0.20"), 3),
+            PricingRow(Decimal("10.05"), None, Decimal("0.05"), 1),
+        ])
+
+        # 19.99 - 15% = 16.9915 -> 16.99, tax 3.398 -> 3.40; tax of 10.05 is 0.5025 -> 0.50
+        self.assertEqual(pricing.items[0].discounted_price, Decimal("16.99"))
+        self.assertEqual(pricing.items[0].tax_amount, Decimal("3.40"))
+        self.assertEqual(pricing.items[0].total_price, Decimal("50.97"))
+        self.assertEqual(pricing.items[0].total_tax, Decimal("10.20"))
+        self.assertEqual(pricing.items[1].discounted_price, Decimal("10.05"))
+        self.assertEqual(pricing.count, 4)
+        self.assertEqual(pricing.total, Decimal("61.02"))
+        self.assertEqual(pricing.tax_total, Decimal("10.70"))
+
+    def test_halves_are_rounded_up(self):
+        self.assertEqual(round_money(Decimal("0.125")), Decimal("0.13"))
+        self.assertEqual(round_money(Decimal("0.135")), Decimal("0.14"))
+
+
+class TestStockReservation(TestCase):
+    def setUp(self):
+        caches['carts'].clear()
+        self.products = [ProductFactory(stock=stock) for stock in (5, 2, 10)]
+        self.product_service = get_product_service()
+
+    def get_stocks(self):
+        return [Product.objects.get(id=product.id).stock for product in self.products]
+
+    def test_order_is_reserved(self):
+        result = self.product_service.reserve_for_order([
+            {"product_id": self.products[0].object_id, "quantity": 3},
+            {"product_id": self.products[1].object_id, "quantity": 2},
+        ])
+
+        self.assertTrue(result.is_reserved)
+        self.assertEqual(self.get_stocks(), [2, 0, 10])
+
+    def test_order_without_enough_stock_is_not_reserved(self):
+        """
+        Products with not enough stock are reported and none of the order's products are reserved
+        """
+        result = self.product_service.reserve_for_order([
+            {"product_id": self.products[0].object_id, "quantity": 3},
+            {"product_id": self.products[1].object_id, "quantity": 2},
+            # The same product twice, 2 + 1 is more than the stock
+            {"product_id": self.products[1].object_id, "quantity": 1},
+            {"product_id": "missing", "quantity": 1},
+        ])
+
+        self.assertFalse(result.is_reserved)
+        self.assertEqual(result.failed_product_ids, [self.products[1].object_id, "missing"])
+        self.assertEqual(self.get_stocks(), [5, 2, 10])
+
+    def test_many_orders_are_reserved(self):
+        orders = [
+            [{"product_id": self.products[0].object_id, "quantity": 3}],
+            [{"product_id": self.products[0].object_id, "quantity": 3},
+             {"product_id": self.products[2].object_id, "quantity": 1}],
+            [{"product_id": self.products[2].object_id, "quantity": 4}],
+        ]
+
+        results = self.product_service.reserve_for_orders(orders)
+
+        # The second order doesn't have enough stock left after the first one
+        self.assertEqual([result.is_reserved for result in results], [True, False, True])
+        self.assertEqual(results[1].failed_product_ids, [self.products[0].object_id])
+        self.assertEqual(self.get_stocks(), [2, 2, 6])
+
+    def test_many_orders_are_reserved_with_one_update(self):
+        orders = [
+            [{"product_id": self.products[0].object_id, "quantity": 1}],
+            [{"product_id": self.products[0].object_id, "quantity": 1},
+             {"product_id": self.products[2].object_id, "quantity": 1}],
+        ]
+
+        with CaptureQueriesContext(connection) as context:
+            results = self.product_service.reserve_for_orders(orders)
+
+        self.assertTrue(all(result.is_reserved for result in results))
+        self.assertEqual(len([query for query in context.captured_queries if query["sql"].startswith("UPDATE")]), 1)
+        self.assertEqual(self.get_stocks(), [3, 2, 9])
+
+    def test_cart_items_are_kept_if_order_is_not_reserved(self):
+        cart = Cart.objects.create(user_id=None)
+        CartItem.objects.create(cart=cart, product=self.products[1], quantity=3)
+
+        OrderProcessingHandler.reserve_products_and_remove_cart_items({
+            "order_id": "order-1", "user_id": None,
+            "products": [{"product_id": self.products[1].object_id, "quantity": 3}],
+        })
+
+        self.assertTrue(CartItem.objects.filter(cart=cart).exists())
+        self.assertEqual(self.get_stocks(), [5, 2, 10])
+        # The orders service is notified which products are out of stock
+        event = OutboxEvent.objects.get()
+        self.assertEqual(event.routing_key, 'users.orders.reservation_failed')
+        self.assertEqual(event.payload, {
+            "order_id": "order-1", "user_id": None, "failed_product_ids": [self.products[1].object_id],
+        })
+
+    def test_batch_of_orders_is_reserved(self):
+        users = [Account.objects.create_user(email=f"buyer-{i}@example.com", password="password", first_name="Buyer")
+                 for i in range(2)]
+        carts = [Cart.objects.create(user=user) for user in users]
+        for cart in carts:
+            CartItem.objects.create(cart=cart, product=self.products[0], quantity=3)
+
+        handle_order_message_batch([
+            ('orders.products.reserve_and_remove_cart_items', {
+                "order_id": f"order-{i}", "user_id": user.id,
+                "products": [{"product_id": self.products[0].object_id, "quantity": 3}],
+            })
+            for i, user in enumerate(users)
+        ])
 
-# Create your tests here.
+        # Only the first order fits into the stock
+        self.assertEqual(self.get_stocks(), [2, 2, 10])
+        self.assertFalse(CartItem.objects.filter(cart=carts[0]).exists())
+        self.assertTrue(CartItem.objects.filter(cart=carts[1]).exists())
+        event = OutboxEvent.objects.get()
+        self.assertEqual(event.payload["order_id"], "order-1")
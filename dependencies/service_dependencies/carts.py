@@ -1,7 +1,52 @@
+import threading
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from redis import Redis
+
 from apps.carts.models import Cart, CartItem
 from apps.products.models import Product
 from services.carts.cart_service import CartService
 from services.carts.cart_service_utils import CartsServiceUtils
+from services.carts.cart_summary import CartSummaryEngine
+from services.carts.cart_cache import CartCache
+from services.carts.cart_product_index import CartProductIndex
+from services.carts.inactive_cart_purger import InactiveCartPurger
+from services.carts.cart_replicator import CartReplicator
+from services.carts.cart_activity_tracker import CartActivityTracker
+from services.carts.pending_cart_merges import PendingCartMerges
+
+_cart_activity_tracker: Optional[CartActivityTracker] = None
+_cart_activity_tracker_lock = threading.Lock()
+
+
+def get_cart_product_index() -> CartProductIndex:
+    return CartProductIndex(CartItem.objects.all())
+
+
+def get_cart_cache() -> CartCache:
+    return CartCache(caches['carts'], Cart.objects.all(), get_cart_product_index())
+
+
+def get_cart_activity_tracker() -> CartActivityTracker:
+    global _cart_activity_tracker
+
+    # The tracker keeps the throttled carts of the process, so it's shared by all services
+    with _cart_activity_tracker_lock:
+        if _cart_activity_tracker is None:
+            _cart_activity_tracker = CartActivityTracker(
+                Redis.from_url(settings.CART_ACTIVITY_URL),
+                Cart.objects.all(),
+                throttle_seconds=settings.CART_ACTIVITY_THROTTLE_MINUTES * 60,
+            )
+
+        return _cart_activity_tracker
+
+
+def get_inactive_cart_purger() -> InactiveCartPurger:
+    return InactiveCartPurger(Cart.objects.all(), CartReplicator(),
+                              chunk_size=settings.DELETE_INACTIVE_CARTS_CHUNK_SIZE)
 
 
 def get_cart_service() -> CartService:
@@ -9,6 +54,11 @@ def get_cart_service() -> CartService:
     cart_queryset = Cart.objects.all()
     product_queryset = Product.objects.all()
     cart_service_utils = CartsServiceUtils(cart_item_queryset)
+    cart_summary_engine = CartSummaryEngine(cart_queryset)
+    cart_cache = get_cart_cache()
+    cart_activity_tracker = get_cart_activity_tracker()
+    pending_cart_merges = PendingCartMerges(caches['carts'])
 
     return CartService(cart_queryset, cart_item_queryset, product_queryset,
-                       cart_service_utils)
+                       cart_service_utils, cart_summary_engine, cart_cache, cart_activity_tracker, pending_cart_merges,
+                       cart_merge_quantity_policy=settings.CART_MERGE_QUANTITY_POLICY)
@@ -0,0 +1,38 @@
+import threading
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from redis import Redis
+
+from apps.history.models import RecentlyViewedItem
+from apps.products.models import Product
+from services.history.history_retention import HistoryRetention
+from services.history.recently_viewed_buffer import RecentlyViewedBuffer
+
+_buffer_redis_client: Optional[Redis] = None
+_buffer_redis_client_lock = threading.Lock()
+
+
+def get_buffer_redis_client() -> Redis:
+    global _buffer_redis_client
+
+    # The client keeps the pool of connections, so it's shared by all buffers of the process
+    with _buffer_redis_client_lock:
+        if _buffer_redis_client is None:
+            _buffer_redis_client = Redis.from_url(settings.RECENTLY_VIEWED_BUFFER_URL)
+
+        return _buffer_redis_client
+
+
+def get_recently_viewed_buffer() -> RecentlyViewedBuffer:
+    return RecentlyViewedBuffer(get_buffer_redis_client(), RecentlyViewedItem.objects.all(), Product.objects.all())
+
+
+def get_history_retention() -> HistoryRetention:
+    return HistoryRetention(
+        RecentlyViewedItem.objects.all(),
+        max_age=timedelta(days=settings.HISTORY_RETENTION_DAYS) if settings.HISTORY_RETENTION_DAYS else None,
+        max_items_per_user=settings.HISTORY_RETENTION_MAX_ITEMS_PER_USER or None,
+        batch_size=settings.HISTORY_PRUNING_BATCH_SIZE,
+    )
@@ -0,0 +1,13 @@
+from datetime import timedelta
+
+from django.conf import settings
+
+from apps.core.models import ProcessedMessage
+from services.inbox.processed_message_ledger import ProcessedMessageLedger
+
+
+def get_processed_message_ledger() -> ProcessedMessageLedger:
+    return ProcessedMessageLedger(
+        ProcessedMessage.objects.all(),
+        retention=timedelta(days=settings.PROCESSED_MESSAGES_RETENTION_DAYS),
+    )
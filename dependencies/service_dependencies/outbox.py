@@ -0,0 +1,62 @@
+import threading
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from apps.core.models import OutboxEvent
+from apps.core.message_broker.publisher import PooledPublisher, get_connection_factory, get_replication_codec
+from services.outbox.cart_item_event_coalescer import CartItemEventCoalescer
+from services.outbox.background_outbox_relay import BackgroundOutboxRelay
+from services.outbox.outbox_relay import OutboxRelay
+
+
+def get_outbox_relay(wait_for_locks: bool = True) -> OutboxRelay:
+    # Transactions let the relay wait for the broker once per batch
+    publisher = PooledPublisher(
+        connection_factory=get_connection_factory(),
+        pool_size=1,
+        retries=settings.AMPQ_PUBLISHER_RETRIES,
+        use_transactions=True,
+        codec=get_replication_codec(),
+    )
+    coalescer = None
+    if settings.CART_ITEM_EVENTS_COALESCING_WINDOW_MS > 0:
+        coalescer = CartItemEventCoalescer(
+            window=timedelta(milliseconds=settings.CART_ITEM_EVENTS_COALESCING_WINDOW_MS),
+        )
+
+    return OutboxRelay(OutboxEvent.objects.all(), publisher, settings.OUTBOX_RELAY_BATCH_SIZE, coalescer,
+                       wait_for_locks=wait_for_locks)
+
+
+def send_outbox_relay_task() -> None:
+    # Imported here, since tasks depend on the outbox writer, which depends on this module
+    from apps.core.tasks import relay_outbox_events
+
+    relay_outbox_events.send()
+
+
+_background_outbox_relay: Optional[BackgroundOutboxRelay] = None
+_background_outbox_relay_lock = threading.Lock()
+
+
+def get_background_outbox_relay() -> BackgroundOutboxRelay:
+    global _background_outbox_relay
+
+    with _background_outbox_relay_lock:
+        if _background_outbox_relay is None:
+            if settings.CART_ITEM_EVENTS_COALESCING_WINDOW_MS > 0:
+                # Coalesced events are held back for the window, so they can't be published right after the commit
+                raise ImproperlyConfigured("The direct replication transport can't be used with coalescing")
+
+            _background_outbox_relay = BackgroundOutboxRelay(
+                # Relays of the web processes don't block each other on the locked events
+                relay_factory=lambda: get_outbox_relay(wait_for_locks=False),
+                retry_delay=settings.OUTBOX_RELAY_POLL_INTERVAL_SECONDS,
+                # Dramatiq retries publishing until the broker is available again
+                fallback=send_outbox_relay_task,
+            )
+
+        return _background_outbox_relay
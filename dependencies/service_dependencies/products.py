@@ -1,7 +1,18 @@
+from django.conf import settings
+
 from apps.products.models import Product
 from services.products.product_service import ProductService
+from services.products.replication.bulk_ingestion import ProductBulkIngestor
+from services.products.stock_reservation import StockReservationEngine
+from .carts import get_cart_cache
 
 
 def get_product_service() -> ProductService:
     product_queryset = Product.objects.all()
-    return ProductService(product_queryset, )
+    cart_cache = get_cart_cache()
+    stock_reservation_engine = StockReservationEngine(product_queryset)
+    return ProductService(product_queryset, cart_cache, stock_reservation_engine)
+
+
+def get_product_bulk_ingestor() -> ProductBulkIngestor:
+    return ProductBulkIngestor(get_cart_cache(), settings.PRODUCTS_BULK_INGESTION_CHUNK_SIZE)
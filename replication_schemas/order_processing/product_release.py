@@ -1,7 +1,9 @@
-from typing import TypedDict, List
+from typing import TypedDict, List, NotRequired
 
 from .base import ProductItem
 
 
 class ProductReleaseData(TypedDict):
+    # Used to skip the redelivered message if the message has no message_id property
+    order_id: NotRequired[str]
     products: List[ProductItem]
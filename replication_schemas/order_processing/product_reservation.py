@@ -1,8 +1,10 @@
-from typing import TypedDict, List
+from typing import TypedDict, List, NotRequired
 
 from .base import ProductItem
 
 
 class ProductReservationData(TypedDict):
+    # Used to skip the redelivered message if the message has no message_id property
+    order_id: NotRequired[str]
     user_id: int
     products: List[ProductItem]
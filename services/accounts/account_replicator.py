@@ -2,10 +2,9 @@ from typing import Dict, Any, List
 from django.contrib.auth import get_user_model
 from django.conf import settings
 
-from apps.accounts.serializers.replication_serializers import UserReplicationSerializer
 from apps.carts.models import Cart, CartItem
-from apps.core.tasks import perform_data_topic_replication
-from ..replication_utils import serialize_cart_data, serialize_many_cart_items
+from services.outbox.outbox_writer import write_replication_event
+from ..replication_utils import serialize_cart_data, serialize_many_cart_items, serialize_user_data
 from param_classes.accounts.account_replication import ReplicateAccountCreationParams
 
 User = get_user_model()
@@ -20,10 +19,7 @@ class AccountReplicator:
 
     @staticmethod
     def __serialize_users_data(user: User) -> Dict[str, Any]:
-        user_serializer = UserReplicationSerializer(instance=user)
-        users_data = user_serializer.data
-        users_data["original_id"] = users_data.pop("id")
-        return users_data
+        return serialize_user_data(user)
 
     @staticmethod
     def __serialize_cart_data(cart: Cart) -> Dict[str, Any]:
@@ -44,7 +40,7 @@ class AccountReplicator:
         if params.cart_items:
             cart_items_data = self.__serialize_cart_item_data(params.cart_items)
 
-        perform_data_topic_replication.send(
+        write_replication_event(
             self.exchange_name, routing_key,
             {"user": users_data, "cart": carts_data, "cart_items": cart_items_data},
         )
@@ -53,4 +49,4 @@ class AccountReplicator:
         routing_key = self.base_routing_key_name + '.update.one'
         users_data = self.__serialize_users_data(user)
 
-        perform_data_topic_replication.send(self.exchange_name, routing_key, users_data)
+        write_replication_event(self.exchange_name, routing_key, users_data)
@@ -1,4 +1,4 @@
-from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth import get_user_model
 from django.db import transaction
 from rest_framework import status
 from rest_framework.response import Response
@@ -73,7 +73,8 @@ class AccountService:
             old_password = serializer.validated_data['old_password']
             new_password = serializer.validated_data['new_password']
             # check if the old password is correct
-            if not authenticate(email=user_object.email, password=old_password):
+            # The password of the authenticated user is checked without looking the user up again
+            if not user_object.check_password(old_password):
                 return Response({'error': 'The old password is incorrect'}, status=status.HTTP_401_UNAUTHORIZED)
             # set the new password
             user_object.set_password(new_password)
@@ -88,8 +89,9 @@ class AccountService:
         # specify the fields that you want to update
         serializer = self.user_serializer(user_object, data=request_data, partial=True)
         if serializer.is_valid():
-            instance = serializer.save()
-            self.account_replicator.replicate_account_update(instance)
+            with transaction.atomic():
+                instance = serializer.save()
+                self.account_replicator.replicate_account_update(instance)
             # use the join and capitalize methods to modify the field names
             field_names = ', '.join([field.replace('_', ' ').capitalize() for field in request_data])
             return Response({'success': f'{field_names} updated successfully'}, status=status.HTTP_200_OK)
@@ -134,6 +136,10 @@ class AccountService:
         :param cart_uuid: Cart's uuid identifier.
         """
         user, _ = self.find_user_by_id(user_id)
+        if user is not None and cart_uuid:
+            # Items of the anonymous cart are shown in the user's cart even if their merge after login is pending
+            self.cart_service.merge_pending_cart_items(user.id, cart_uuid)
+
         if user is not None:
             serializer = self.user_serializer(instance=user)
             user = serializer.data
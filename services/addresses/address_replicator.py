@@ -1,9 +1,9 @@
 from typing import Dict, Any
 from django.conf import settings
 
-from apps.addresses.serializers import AddressReplicationSerializer
 from apps.addresses.models import Address
-from apps.core.tasks import perform_data_topic_replication
+from services.outbox.outbox_writer import write_replication_event
+from ..replication_utils import serialize_address_data
 
 
 class AddressReplicator:
@@ -16,24 +16,21 @@ class AddressReplicator:
 
     @staticmethod
     def __serialize_address(address: Address) -> Dict[str, Any]:
-        address_serializer = AddressReplicationSerializer(instance=address)
-        address_data = address_serializer.data
-        address_data["original_id"] = address_data.pop("id")
-        return address_data
+        return serialize_address_data(address)
 
     def replicate_address_creation(self, address: Address) -> None:
         routing_key = self.base_routing_key_name + '.create.one'
         address_data = self.__serialize_address(address)
-        perform_data_topic_replication.send(self.exchange_name, routing_key, address_data)
+        write_replication_event(self.exchange_name, routing_key, address_data)
 
     def replicate_address_update(self, address: Address) -> None:
         routing_key = self.base_routing_key_name + '.update.one'
         address_data = self.__serialize_address(address)
-        perform_data_topic_replication.send(self.exchange_name, routing_key, address_data)
+        write_replication_event(self.exchange_name, routing_key, address_data)
 
     def replicate_address_delete(self, address_id: int) -> None:
         routing_key = self.base_routing_key_name + '.delete.one'
-        perform_data_topic_replication.send(
+        write_replication_event(
             self.exchange_name, routing_key,
             {"address_id": address_id}
         )
@@ -0,0 +1,94 @@
+import datetime
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple, Union
+
+from django.db.models import QuerySet, F, Case, When, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from redis import Redis
+
+from apps.carts.models import Cart
+
+
+class CartActivityTracker:
+    """
+    Keeps the time of the last change of cart items, which isn't written to the cart on every change.
+    The activity is sent to Redis at most once per throttle_seconds for each cart by each process,
+    and flush() writes it to Cart.updated_at with bulk statements, so the inactive carts are judged by their items too.
+    """
+    # Number of carts updated with one statement
+    CHUNK_SIZE = 500
+
+    def __init__(self, redis_client: Redis, cart_queryset: QuerySet[Cart], throttle_seconds: int,
+                 key: str = 'carts:activity', max_throttled_carts_count: int = 10000):
+        self.redis_client = redis_client
+        self.cart_queryset = cart_queryset
+        self.throttle_seconds = throttle_seconds
+        self.key = key
+        self.max_throttled_carts_count = max_throttled_carts_count
+        # Time when the activity of the cart was sent to Redis by this process
+        self._sent_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _is_throttled(self, cart_uuid: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            sent_at = self._sent_at.get(cart_uuid)
+            if sent_at is not None and now - sent_at < self.throttle_seconds:
+                return True
+
+            if len(self._sent_at) >= self.max_throttled_carts_count:
+                self._sent_at = {
+                    key: value for key, value in self._sent_at.items() if now - value < self.throttle_seconds
+                }
+            self._sent_at[cart_uuid] = now
+            return False
+
+    def touch(self, cart_uuid: Union[uuid.UUID, str], at: Optional[datetime.datetime] = None) -> None:
+        """
+        Records the activity in the cart, only the first call in the throttle period reaches Redis.
+        """
+        cart_uuid = str(cart_uuid)
+        if self._is_throttled(cart_uuid):
+            return
+
+        # The latest time of the activity is kept
+        self.redis_client.zadd(self.key, {cart_uuid: (at or timezone.now()).timestamp()}, gt=True)
+
+    def _apply(self, activity: List[Tuple[str, datetime.datetime]]) -> None:
+        for i in range(0, len(activity), self.CHUNK_SIZE):
+            chunk = activity[i:i + self.CHUNK_SIZE]
+            self.cart_queryset.filter(cart_uuid__in=[cart_uuid for cart_uuid, _ in chunk]).update(
+                updated_at=Greatest(F('updated_at'), Case(*[
+                    When(cart_uuid=cart_uuid, then=Value(active_at)) for cart_uuid, active_at in chunk
+                ])),
+            )
+
+    def flush(self, batch_size: int = 1000) -> int:
+        """
+        Writes recorded activity to the carts.
+        :return: Number of the carts whose activity was written.
+        """
+        carts_count = 0
+        while True:
+            # Taken carts are removed atomically, so the activity recorded meanwhile is left to the next batch
+            taken = self.redis_client.zpopmin(self.key, batch_size)
+            if not taken:
+                return carts_count
+
+            activity = [
+                (cart_uuid.decode(), datetime.datetime.fromtimestamp(timestamp, tz=datetime.timezone.utc))
+                for cart_uuid, timestamp in taken
+            ]
+            try:
+                self._apply(activity)
+            except Exception:
+                # The activity is returned and written by the next flush
+                self.redis_client.zadd(self.key, dict(taken), gt=True)
+                raise
+
+            carts_count += len(activity)
+            if len(taken) < batch_size:
+                return carts_count
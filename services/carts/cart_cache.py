@@ -0,0 +1,103 @@
+import logging
+import uuid
+from typing import Optional, Dict, Any, Iterable, List, Union
+
+from django.core.cache.backends.base import BaseCache
+from django.db import connection, transaction
+from django.db.models import QuerySet
+from redis.exceptions import RedisError
+
+from apps.carts.models import Cart
+from .cart_product_index import CartProductIndex
+
+
+class CartCache:
+    """
+    Read-through cache of the cart's short information and cart's details.
+    Entries are stored by the cart uuid, user's cart is found using "user id -> cart uuid" alias.
+    If the cache is unavailable, reads fall back to the database.
+    """
+    SHORT_INFO = 'short_info'
+    DETAILS = 'details'
+
+    def __init__(self, cache: BaseCache, cart_queryset: QuerySet[Cart], cart_product_index: CartProductIndex):
+        self.cache = cache
+        self.cart_queryset = cart_queryset
+        self.cart_product_index = cart_product_index
+
+    @staticmethod
+    def _get_cart_key(cart_uuid: Union[uuid.UUID, str], view: str) -> str:
+        return f"cart:{cart_uuid}:{view}"
+
+    @staticmethod
+    def _get_user_key(user_id: int) -> str:
+        return f"user:{user_id}:cart_uuid"
+
+    def get(self, view: str, cart_uuid: Optional[Union[uuid.UUID, str]] = None,
+            user_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Returns cached data of the cart or None if there's nothing in the cache.
+        :param view: What data of the cart is needed (SHORT_INFO or DETAILS).
+        :param cart_uuid: uuid of the cart, if it's not specified, user's cart will be used.
+        :param user_id: identifier of the cart owner, None if the cart belongs to the anonymous user.
+        """
+        if cart_uuid is None and user_id is None:
+            return None
+
+        try:
+            if cart_uuid is None:
+                cart_uuid = self.cache.get(self._get_user_key(user_id))
+                if cart_uuid is None:
+                    return None
+
+            entry = self.cache.get(self._get_cart_key(cart_uuid, view))
+        except RedisError as e:
+            logging.warning(f"Unable to read the cart from the cache: {e!r}")
+            return None
+
+        # Entry of the cart that belongs to another user must not be returned
+        if entry is None or entry["user_id"] != user_id:
+            return None
+
+        return entry["data"]
+
+    def set(self, view: str, cart_uuid: Union[uuid.UUID, str], user_id: Optional[int], data: Dict[str, Any]) -> None:
+        entries = {self._get_cart_key(cart_uuid, view): {"user_id": user_id, "data": data}}
+        if user_id is not None:
+            entries[self._get_user_key(user_id)] = str(cart_uuid)
+
+        try:
+            self.cache.set_many(entries)
+        except RedisError as e:
+            logging.warning(f"Unable to write the cart to the cache: {e!r}")
+
+    def invalidate(self, cart_uuids: Iterable[Union[uuid.UUID, str]]) -> None:
+        """
+        Removes cached data of the specified carts.
+        """
+        keys = [
+            self._get_cart_key(cart_uuid, view)
+            for cart_uuid in {str(cart_uuid) for cart_uuid in cart_uuids}
+            for view in (self.SHORT_INFO, self.DETAILS)
+        ]
+        if not keys:
+            return
+
+        self.cache.delete_many(keys)
+        if connection.in_atomic_block:
+            # Concurrent readers can put the old state into the cache before the transaction is committed
+            transaction.on_commit(lambda: self.cache.delete_many(keys))
+
+    def invalidate_user_cart(self, user_id: int) -> None:
+        cart_uuids = self.cart_queryset.filter(user_id=user_id).values_list('cart_uuid', flat=True)
+        self.invalidate(cart_uuids)
+
+    def get_carts_with_products(self, product_ids: Union[Iterable[str], QuerySet]) -> List[uuid.UUID]:
+        """
+        Returns uuids of the carts which contain any of the specified products.
+        :param product_ids: Identifiers of the products or queryset of the product identifiers.
+        """
+        return self.cart_product_index.get_carts_with_products(product_ids)
+
+    def invalidate_carts_with_products(self, product_ids: Iterable[str]) -> None:
+        self.invalidate(self.get_carts_with_products(product_ids))
@@ -0,0 +1,51 @@
+import uuid
+from typing import Dict, Iterable, List, Set, Union
+
+from django.db.models import QuerySet
+
+from apps.carts.models import CartItem
+
+
+class CartProductIndex:
+    """
+    Finds carts by the products they contain.
+    Queries are answered by the (product, cart) index of cart items without reading the cart items table.
+    """
+    # Maximum number of product ids in one query, databases limit the number of query parameters
+    PRODUCTS_LOOKUP_CHUNK_SIZE = 10000
+
+    def __init__(self, cart_item_queryset: QuerySet[CartItem]):
+        self.cart_item_queryset = cart_item_queryset
+
+    def _get_pairs(self, product_ids: Union[Iterable[str], QuerySet]) -> Iterable[tuple]:
+        """
+        Yields pairs of the product id and the cart uuid for the specified products.
+        """
+        if isinstance(product_ids, QuerySet):
+            yield from self.cart_item_queryset.filter(product_id__in=product_ids).values_list('product_id', 'cart_id')
+            return
+
+        product_ids = list(product_ids)
+        for start in range(0, len(product_ids), self.PRODUCTS_LOOKUP_CHUNK_SIZE):
+            yield from self.cart_item_queryset.filter(
+                product_id__in=product_ids[start:start + self.PRODUCTS_LOOKUP_CHUNK_SIZE],
+            ).values_list('product_id', 'cart_id')
+
+    def get_carts_with_products(self, product_ids: Union[Iterable[str], QuerySet]) -> List[uuid.UUID]:
+        """
+        Returns uuids of the carts which contain any of the specified products.
+        :param product_ids: Identifiers of the products or queryset of the product identifiers.
+        """
+        return list({cart_uuid for _, cart_uuid in self._get_pairs(product_ids)})
+
+    def get_products_by_cart(self, product_ids: Union[Iterable[str], QuerySet]) -> Dict[uuid.UUID, Set[str]]:
+        """
+        Returns the mapping of the cart uuid to the specified products which the cart contains,
+        for example, to notify users about the changed prices of the products in their carts.
+        :param product_ids: Identifiers of the products or queryset of the product identifiers.
+        """
+        products_by_cart: Dict[uuid.UUID, Set[str]] = {}
+        for product_id, cart_uuid in self._get_pairs(product_ids):
+            products_by_cart.setdefault(cart_uuid, set()).add(product_id)
+
+        return products_by_cart
@@ -2,10 +2,9 @@ import uuid
 from typing import List, Dict, Any
 from django.conf import settings
 
-from apps.carts.replication_serializers.cart_item import CartItemReplicationSerializer
 from apps.carts.models import Cart, CartItem
-from apps.core.tasks import perform_data_topic_replication
-from ..replication_utils import serialize_cart_data, serialize_many_cart_items
+from services.outbox.outbox_writer import write_replication_event
+from ..replication_utils import serialize_cart_data, serialize_cart_item_data, serialize_many_cart_items
 
 
 class CartReplicator:
@@ -23,11 +22,7 @@ class CartReplicator:
 
     @staticmethod
     def __serialize_one_cart_item(cart_item: CartItem) -> Dict[str, Any]:
-        cart_item_serializer = CartItemReplicationSerializer(instance=cart_item)
-        cart_item_data = cart_item_serializer.data
-        cart_item_data["cart"] = str(cart_item_data["cart"])
-        cart_item_data["original_id"] = cart_item_data.pop("id")
-        return cart_item_data
+        return serialize_cart_item_data(cart_item)
 
     @staticmethod
     def __serialize_many_cart_items(cart_items: List[CartItem]) -> List[Dict[str, Any]]:
@@ -36,34 +31,72 @@ class CartReplicator:
     def replicate_cart_creation(self, cart: Cart):
         routing_key = self.base_routing_key_name_carts + '.create.one'
         cart_data = self.__serialize_cart(cart)
-        perform_data_topic_replication.send(self.exchange_name, routing_key, cart_data)
+        write_replication_event(self.exchange_name, routing_key, cart_data)
 
     def replicate_cart_clearance(self, cart_uuid: uuid.UUID):
         routing_key = self.base_routing_key_name_carts + '.clear'
-        perform_data_topic_replication.send(
+        write_replication_event(
             self.exchange_name, routing_key,
             {"cart_uuid": str(cart_uuid)}
         )
 
+    def replicate_inactive_carts_deletion(self, cart_uuids: List[uuid.UUID]):
+        routing_key = self.base_routing_key_name_carts + '.delete_inactive_carts'
+        write_replication_event(
+            self.exchange_name, routing_key,
+            {"cart_uuids": [str(cart_uuid) for cart_uuid in cart_uuids]}
+        )
+
+    def replicate_carts_repricing(self, cart_uuids: List[uuid.UUID], event_id: str):
+        routing_key = self.base_routing_key_name_carts + '.reprice'
+        write_replication_event(
+            self.exchange_name, routing_key,
+            {"event_id": event_id, "cart_uuids": [str(cart_uuid) for cart_uuid in cart_uuids]}
+        )
+
     def replicate_one_cart_item_creation(self, cart_item: CartItem):
         routing_key = self.base_routing_key_name_cart_items + '.create.one'
         cart_item_data = self.__serialize_one_cart_item(cart_item)
-        perform_data_topic_replication.send(self.exchange_name, routing_key, cart_item_data)
+        write_replication_event(self.exchange_name, routing_key, cart_item_data)
 
     def replicate_one_cart_item_update(self, cart_item: CartItem):
         routing_key = self.base_routing_key_name_cart_items + '.update.one'
         cart_item_data = self.__serialize_one_cart_item(cart_item)
-        perform_data_topic_replication.send(self.exchange_name, routing_key, cart_item_data)
+        write_replication_event(self.exchange_name, routing_key, cart_item_data)
 
     def replicate_many_cart_items_creation(self, cart_items: List[CartItem]):
         routing_key = self.base_routing_key_name_cart_items + '.create.many'
         cart_items_data = self.__serialize_many_cart_items(cart_items)
-        perform_data_topic_replication.send(self.exchange_name, routing_key, cart_items_data)
+        write_replication_event(self.exchange_name, routing_key, cart_items_data)
 
     def replicate_one_cart_item_removal(self, cart_item_id: int):
         routing_key = self.base_routing_key_name_cart_items + '.delete.one'
-        perform_data_topic_replication.send(
+        write_replication_event(
             self.exchange_name, routing_key,
             {"cart_item_id": cart_item_id}
         )
 
+    def replicate_cart_item_changes(self, cart_uuid: uuid.UUID, created_cart_items: List[CartItem],
+                                    updated_cart_items: List[CartItem], deleted_cart_item_ids: List[int]):
+        """
+        Replicates created, updated and deleted cart items of one cart with one "batch" message
+        if it's enabled by CART_ITEM_BATCH_EVENTS, otherwise with the messages all consumers handle
+        """
+        if not settings.CART_ITEM_BATCH_EVENTS:
+            if created_cart_items:
+                self.replicate_many_cart_items_creation(created_cart_items)
+            for cart_item in updated_cart_items:
+                self.replicate_one_cart_item_update(cart_item)
+            for cart_item_id in deleted_cart_item_ids:
+                self.replicate_one_cart_item_removal(cart_item_id)
+            return
+
+        routing_key = self.base_routing_key_name_cart_items + '.batch'
+        write_replication_event(
+            self.exchange_name, routing_key,
+            {
+                "cart": str(cart_uuid),
+                "upserted": self.__serialize_many_cart_items(created_cart_items + updated_cart_items),
+                "deleted": deleted_cart_item_ids,
+            }
+        )
@@ -9,17 +9,28 @@ from apps.carts.models import Cart, CartItem
 from apps.products.models import Product
 from apps.carts.model_serializers.cart_item import CartItemWithProductSerializer, CartItemSerializer
 from apps.carts.model_serializers.cart import CartSerializer
-from apps.carts.serializers.cart_item import CreateCartItemSerializer
+from apps.carts.serializers.cart_item import CreateCartItemSerializer, BatchCartItemChangesSerializer
 from .cart_replicator import CartReplicator
 from .cart_service_utils import CartsServiceUtils
+from .cart_summary import CartSummaryEngine, CartSummary
+from .cart_cache import CartCache
+from .cart_activity_tracker import CartActivityTracker
+from .pending_cart_merges import PendingCartMerges
 
 
 class CartService:
-    def __init__(self, cart_queryset, cart_item_queryset, product_queryset, cart_service_utils):
+    def __init__(self, cart_queryset, cart_item_queryset, product_queryset, cart_service_utils,
+                 cart_summary_engine, cart_cache, cart_activity_tracker, pending_cart_merges,
+                 cart_merge_quantity_policy='sum'):
         self.cart_queryset: QuerySet[Cart] = cart_queryset
         self.cart_item_queryset: QuerySet[CartItem] = cart_item_queryset
         self.product_queryset: QuerySet[Product] = product_queryset
         self.cart_service_utils: CartsServiceUtils = cart_service_utils
+        self.cart_summary_engine: CartSummaryEngine = cart_summary_engine
+        self.cart_cache: CartCache = cart_cache
+        self.cart_activity_tracker: CartActivityTracker = cart_activity_tracker
+        self.pending_cart_merges: PendingCartMerges = pending_cart_merges
+        self.cart_merge_quantity_policy: str = cart_merge_quantity_policy
         self.cart_replicator = CartReplicator()
 
     @staticmethod
@@ -49,15 +60,16 @@ class CartService:
 
     def get_cart_short_info(self, cart_filters: dict, return_response_object: bool = False) \
             -> Union[Dict[str, Any], Response]:
-        cart: Cart = self.cart_queryset.prefetch_related('items').get(**cart_filters)
-        cart_serializer = CartSerializer(instance=cart)
-        cart_validated_data = cart_serializer.data
+        cart_validated_data = self.cart_cache.get(CartCache.SHORT_INFO, cart_filters.get('cart_uuid'),
+                                                  cart_filters.get('user_id'))
+        if cart_validated_data is None:
+            cart_summary: CartSummary = self.cart_summary_engine.get_summary(cart_filters)
+            cart_serializer = CartSerializer(instance=cart_summary.cart, context={"summary": cart_summary})
+            cart_validated_data = cart_serializer.data
+            cart_validated_data["items"] = cart_summary.quantities
+            self.cart_cache.set(CartCache.SHORT_INFO, cart_summary.cart.cart_uuid, cart_summary.cart.user_id,
+                                cart_validated_data)
 
-        cart_items = {
-            cart_item.product_id: {"quantity": cart_item.quantity}
-            for cart_item in CartItem.objects.filter(cart=cart)
-        }
-        cart_validated_data["items"] = cart_items
         return cart_validated_data if not return_response_object \
             else Response(cart_validated_data, status.HTTP_200_OK)
 
@@ -66,49 +78,93 @@ class CartService:
             cart_filters = self.get_cart_filters(cart_uuid, user_id)
             return self.get_cart_short_info(cart_filters)
         except Cart.DoesNotExist:
-            cart = Cart.objects.create(user_id=user_id)
-            cart.save()
-            self.cart_replicator.replicate_cart_creation(cart)
+            with transaction.atomic():
+                cart = Cart.objects.create(user_id=user_id)
+                self.cart_replicator.replicate_cart_creation(cart)
 
-            serializer = CartSerializer(instance=cart)
+            cart_summary = self.cart_summary_engine.get_empty_summary(cart)
+            serializer = CartSerializer(instance=cart, context={"summary": cart_summary})
             cart_data = serializer.data
-
-            cart_data["items"] = {}
-            cart_data["count"] = 0
+            cart_data["items"] = cart_summary.quantities
 
             return cart_data
 
     def copy_cart_items(self, user_id: int, cart_uuid: uuid.UUID) -> Optional[List[CartItem]]:
+        """
+        Merges items of the cart into the user's cart in the database without loading them.
+        :return: Created and changed items of the user's cart or None if any of the carts doesn't exist.
+        """
         with transaction.atomic():
             try:
-                old_cart: Cart = self.cart_queryset.get(cart_uuid=cart_uuid)
-                new_cart: Cart = self.cart_queryset.get(user_id=user_id)
+                new_cart_uuid = self.cart_queryset.values_list('cart_uuid', flat=True).get(user_id=user_id)
             except Cart.DoesNotExist:
                 return None
 
-            cart_items: QuerySet[CartItem] = self.cart_item_queryset.filter(cart=old_cart)
-            cloned_cart_items = []
-            for cart_item in cart_items:
-                cart_item.id = None
-                cart_item.cart = new_cart
-                cloned_cart_items.append(cart_item)
+            # Items of the user's own cart aren't merged into it again
+            if not self.cart_queryset.filter(cart_uuid=cart_uuid).exclude(user_id=user_id).exists():
+                return None
+
+            merged_cart_items = CartItem.merge_cart_items(cart_uuid, new_cart_uuid, self.cart_merge_quantity_policy)
+            if merged_cart_items:
+                self.cart_cache.invalidate([new_cart_uuid])
+                self.cart_activity_tracker.touch(new_cart_uuid)
+            return merged_cart_items
+
+    def schedule_cart_items_merge(self, user_id: int, cart_uuid: uuid.UUID) -> None:
+        """
+        Marks items of the cart to be merged into the user's cart by merge_pending_cart_items.
+        """
+        self.pending_cart_merges.add(user_id, cart_uuid)
+
+    def merge_pending_cart_items(self, user_id: int, cart_uuid: uuid.UUID) -> None:
+        """
+        Merges items of the cart into the user's cart if the merge is still pending and replicates changed items.
+        """
+        try:
+            cart_uuid = uuid.UUID(str(cart_uuid))
+        except ValueError:
+            return
+
+        # Most requests have nothing to merge, so they don't lock the user's cart
+        if not self.pending_cart_merges.is_pending(user_id, cart_uuid):
+            return
 
-            inserted_cart_items = self.cart_item_queryset.bulk_create(cloned_cart_items)
-            return inserted_cart_items
+        with transaction.atomic():
+            # The user's cart is locked, so the task and the request merging the same cart don't interleave
+            if not self.cart_queryset.select_for_update().filter(user_id=user_id).exists():
+                return
+            if not self.pending_cart_merges.claim(user_id, cart_uuid):
+                return
+
+            try:
+                merged_cart_items = self.copy_cart_items(user_id, cart_uuid)
+                if merged_cart_items:
+                    # Merged items are replicated as created like before, consumers of "create.many" upsert them
+                    self.cart_replicator.replicate_cart_item_changes(merged_cart_items[0].cart_id,
+                                                                     merged_cart_items, [], [])
+            except Exception:
+                # The merge is retried by the task
+                self.pending_cart_merges.add(user_id, cart_uuid)
+                raise
 
     def get_cart_details(self, cart_uuid: uuid.UUID, user_id: Optional[int]) -> Response:
+        cart_details = self.cart_cache.get(CartCache.DETAILS, cart_uuid, user_id)
+        if cart_details is not None:
+            return Response(data=cart_details, status=status.HTTP_200_OK)
+
         try:
             cart: Cart = self.get_cart(cart_uuid, user_id)
         except Cart.DoesNotExist:
             return Response(status=status.HTTP_404_NOT_FOUND, data={'detail': 'Cart with specified not found'})
 
-        cart_items: QuerySet[CartItem] = self.get_cart_items({"cart": cart})
-        cart_serializer = CartSerializer(instance=cart)
-        cart_item_serializer = CartItemWithProductSerializer(instance=cart_items, many=True)
-        return Response(
-            data={"cart": cart_serializer.data, "cart_items": cart_item_serializer.data},
-            status=status.HTTP_200_OK,
-        )
+        cart_items: List[CartItem] = list(self.get_cart_items({"cart": cart}))
+        cart_summary = self.cart_summary_engine.summarize_cart_items(cart, cart_items)
+        cart_serializer = CartSerializer(instance=cart, context={"summary": cart_summary})
+        cart_item_serializer = CartItemWithProductSerializer(instance=cart_items, many=True,
+                                                             context={"priced_items": cart_summary.priced_items})
+        cart_details = {"cart": cart_serializer.data, "cart_items": cart_item_serializer.data}
+        self.cart_cache.set(CartCache.DETAILS, cart.cart_uuid, user_id, cart_details)
+        return Response(data=cart_details, status=status.HTTP_200_OK)
 
     def get_cart_item_list(self, cart_uuid: uuid.UUID, user_id: Optional[int] = None,
                            product_ids: Optional[List[str]] = None) -> Response:
@@ -126,40 +182,126 @@ class CartService:
         serializer = CartItemWithProductSerializer(instance=cart_items, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
-    def create_cart_item(self, cart_uuid: uuid.UUID, data: dict) -> Response:
-        create_cart_serializer = CreateCartItemSerializer(data={"cart_id": cart_uuid, **data})
-        if not create_cart_serializer.is_valid():
-            return Response(create_cart_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-
-        validated_data = create_cart_serializer.validated_data
-
+    def _get_cart_item_creation_error(self, cart_uuid: uuid.UUID, product_id: str) -> Response:
         if not self.cart_queryset.filter(cart_uuid=cart_uuid).exists():
             return Response({"error": "Cart with specified cart_id does not exist"},
                             status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            product: Product = self.product_queryset.get(object_id=validated_data.get("product_id"))
-        except Product.DoesNotExist:
+        if not self.product_queryset.filter(object_id=product_id).exists():
             return Response({"error": "Specified product does not exist"},
                             status=status.HTTP_400_BAD_REQUEST)
 
-        if not product.is_able_to_add_to_cart(validated_data.get("quantity")):
-            return Response({"error": "Not able to add a product to the cart"},
-                            status=status.HTTP_400_BAD_REQUEST)
+        return Response({"error": "Not able to add a product to the cart"},
+                        status=status.HTTP_400_BAD_REQUEST)
 
-        cart_item, created = CartItem.change_quantity_or_create(validated_data)
+    def create_cart_item(self, cart_uuid: uuid.UUID, data: dict) -> Response:
+        create_cart_serializer = CreateCartItemSerializer(data={"cart_id": cart_uuid, **data})
+        if not create_cart_serializer.is_valid():
+            return Response(create_cart_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        validated_data = create_cart_serializer.validated_data
+        cart_id, product_id, quantity = (validated_data["cart_id"], validated_data["product_id"],
+                                         validated_data["quantity"])
+
+        with transaction.atomic():
+            upsert_result = CartItem.upsert_if_able_to_add(cart_id, product_id, quantity)
+            if upsert_result is not None:
+                cart_item, created = upsert_result
+                self.cart_cache.invalidate([cart_uuid])
+                self.cart_activity_tracker.touch(cart_uuid)
+                if created:
+                    self.cart_replicator.replicate_one_cart_item_creation(cart_item)
+                else:
+                    self.cart_replicator.replicate_one_cart_item_update(cart_item)
+
+        if upsert_result is None:
+            # The reason is looked up only when the cart item wasn't added
+            return self._get_cart_item_creation_error(cart_id, product_id)
 
         cart_item_serializer = CartItemSerializer(cart_item)
 
         if created:
-            self.cart_replicator.replicate_one_cart_item_creation(cart_item)
             return Response(status=status.HTTP_201_CREATED, data={"cart_item": cart_item_serializer.data,
                                                                   "created": True})
 
-        self.cart_replicator.replicate_one_cart_item_update(cart_item)
         return Response(status=status.HTTP_204_NO_CONTENT, data={"cart_item": cart_item_serializer.data,
                                                                  "created": False})
 
+    def apply_cart_item_changes(self, cart_uuid: uuid.UUID, data: dict) -> Response:
+        """
+        Creates, updates and deletes (quantity 0) many cart items at once.
+        Products are fetched with one query and valid changes are applied in one transaction,
+        invalid changes are skipped and reported in the per-item results.
+        """
+        batch_serializer = BatchCartItemChangesSerializer(data=data)
+        if not batch_serializer.is_valid():
+            return Response(batch_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        if not self.cart_queryset.filter(cart_uuid=cart_uuid).exists():
+            return Response({"error": "Cart with specified cart_id does not exist"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        changes = batch_serializer.validated_data["items"]
+        product_ids = [change["product_id"] for change in changes]
+        products = self.product_queryset.in_bulk(product_ids, field_name='object_id')
+
+        results = []
+        created_items, updated_items, deleted_items = [], [], []
+        with transaction.atomic():
+            cart_items = {
+                cart_item.product_id: cart_item
+                for cart_item in self.cart_item_queryset.select_for_update().filter(
+                    cart_id=cart_uuid, product_id__in=product_ids
+                )
+            }
+            for change in changes:
+                product_id, quantity = change["product_id"], change["quantity"]
+                cart_item = cart_items.get(product_id)
+                result = {"product_id": product_id}
+                results.append(result)
+
+                if quantity == 0:
+                    if cart_item is None:
+                        result.update(status="failed", error="Product is not in the cart")
+                    else:
+                        deleted_items.append(cart_item)
+                        result.update(status="deleted", cart_item_id=cart_item.id)
+                    continue
+
+                product = products.get(product_id)
+                if product is None:
+                    result.update(status="failed", error="Specified product does not exist")
+                elif not product.is_able_to_add_to_cart(quantity):
+                    result.update(status="failed", error="Not able to add a product to the cart")
+                elif cart_item is None:
+                    cart_item = CartItem(cart_id=cart_uuid, product_id=product_id, quantity=quantity)
+                    created_items.append(cart_item)
+                    result.update(status="created", cart_item=cart_item)
+                else:
+                    cart_item.quantity = quantity
+                    updated_items.append(cart_item)
+                    result.update(status="updated", cart_item=cart_item)
+
+            deleted_item_ids = [cart_item.id for cart_item in deleted_items]
+            if created_items:
+                self.cart_item_queryset.bulk_create(created_items)
+            if updated_items:
+                self.cart_item_queryset.bulk_update(updated_items, ['quantity'])
+            if deleted_item_ids:
+                self.cart_item_queryset.filter(id__in=deleted_item_ids).delete()
+
+            if created_items or updated_items or deleted_item_ids:
+                self.cart_cache.invalidate([cart_uuid])
+                self.cart_activity_tracker.touch(cart_uuid)
+                self.cart_replicator.replicate_cart_item_changes(cart_uuid, created_items, updated_items,
+                                                                 deleted_item_ids)
+
+        for result in results:
+            if "cart_item" in result:
+                result["cart_item"] = CartItemSerializer(result["cart_item"]).data
+
+        return Response(status=status.HTTP_200_OK, data={"results": results})
+
     def update_cart_item(self, cart_uuid: uuid.UUID, item_id: Union[int, str], data: dict) -> Response:
         if isinstance(item_id, str) and item_id.isdigit():
             item_id = int(item_id)
@@ -176,14 +318,18 @@ class CartService:
                 return Response({"error": "Not able to add a product to the cart"},
                                 status=status.HTTP_400_BAD_REQUEST)
 
-            if cart_quantity > 0:
-                cart_item.quantity = serializer.validated_data.get("quantity")
-                cart_item.save()
-                self.cart_replicator.replicate_one_cart_item_update(cart_item)
-            else:
-                cart_item_id = cart_item.id
-                cart_item.delete()
-                self.cart_replicator.replicate_one_cart_item_removal(cart_item_id)
+            with transaction.atomic():
+                if cart_quantity > 0:
+                    cart_item.quantity = serializer.validated_data.get("quantity")
+                    cart_item.save()
+                    self.cart_replicator.replicate_one_cart_item_update(cart_item)
+                else:
+                    cart_item_id = cart_item.id
+                    cart_item.delete()
+                    self.cart_replicator.replicate_one_cart_item_removal(cart_item_id)
+
+                self.cart_cache.invalidate([cart_uuid])
+                self.cart_activity_tracker.touch(cart_uuid)
 
             return Response(status=status.HTTP_204_NO_CONTENT)
 
@@ -198,15 +344,18 @@ class CartService:
             return Response({"error": "Cart or its item does not exist"}, status=status.HTTP_404_NOT_FOUND)
 
         cart_item_id = cart_item.id
-        cart_item.delete()
+        with transaction.atomic():
+            cart_item.delete()
+            self.cart_cache.invalidate([cart_uuid])
+            self.cart_activity_tracker.touch(cart_uuid)
+            self.cart_replicator.replicate_one_cart_item_removal(cart_item_id)
 
-        self.cart_replicator.replicate_one_cart_item_removal(cart_item_id)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     def delete_many_cart_items(self, user_id: int, cart_item_ids: List[Union[int, str]]) -> None:
         filters = self.cart_service_utils.get_filters_for_cart_item_list(user_id, cart_item_ids)
         self.cart_item_queryset.filter(**filters).delete()
-
+        self.cart_cache.invalidate_user_cart(user_id)
 
     def clear_cart(self, cart_uuid: uuid.UUID) -> Response:
         try:
@@ -214,7 +363,10 @@ class CartService:
         except Cart.DoesNotExist:
             return Response({"error": "Cart does not exist"}, status=status.HTTP_404_NOT_FOUND)
 
-        cart.clear()
-        self.cart_replicator.replicate_cart_clearance(cart.cart_uuid)
+        with transaction.atomic():
+            cart.clear()
+            self.cart_cache.invalidate([cart.cart_uuid])
+            self.cart_activity_tracker.touch(cart.cart_uuid)
+            self.cart_replicator.replicate_cart_clearance(cart.cart_uuid)
 
         return Response(status=status.HTTP_204_NO_CONTENT)
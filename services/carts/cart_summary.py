@@ -0,0 +1,102 @@
+from decimal import Decimal
+from typing import Dict, Any, Iterable, Optional
+
+from django.db.models import QuerySet
+
+from apps.carts.models import Cart, CartItem
+from apps.products.pricing import PricedItem, PricingRow, price_items
+
+
+class CartSummary:
+    """
+    Aggregated information about the cart:
+        - cart: Cart object the summary belongs to.
+        - count: Total quantity of all cart items.
+        - total: Total cost of all cart items, accounting for product discounts.
+        - tax_total: Total tax of all cart items.
+        - quantities: Mapping of product id to the quantity of this product in the cart.
+        - priced_items: Mapping of product id to the prices of the cart item.
+    """
+    def __init__(self, cart: Cart, count: int = 0, total: Decimal = Decimal("0.00"),
+                 tax_total: Decimal = Decimal("0.00"), quantities: Optional[Dict[str, Dict[str, int]]] = None,
+                 priced_items: Optional[Dict[str, PricedItem]] = None):
+        self.cart = cart
+        self.count = count
+        self.total = total
+        self.tax_total = tax_total
+        self.quantities = quantities if quantities is not None else {}
+        self.priced_items = priced_items if priced_items is not None else {}
+
+
+class CartSummaryEngine:
+    """
+    Calculates cart's count, total, tax total and product quantities
+    in one database query or in one pass over already loaded cart items.
+    """
+    def __init__(self, cart_queryset: QuerySet[Cart]):
+        self.cart_queryset = cart_queryset
+
+    @staticmethod
+    def _summarize(cart: Cart, rows: Iterable[Dict[str, Any]]) -> CartSummary:
+        """
+        Summarizes rows with keys: product_id, quantity, price, discount_rate, tax_rate.
+        """
+        rows = list(rows)
+        pricing = price_items(
+            PricingRow(row["price"], row["discount_rate"], row["tax_rate"], row["quantity"]) for row in rows
+        )
+        quantities = {row["product_id"]: {"quantity": row["quantity"]} for row in rows}
+        priced_items = {row["product_id"]: item for row, item in zip(rows, pricing.items)}
+        return CartSummary(cart, pricing.count, pricing.total, pricing.tax_total, quantities, priced_items)
+
+    def get_summary(self, cart_filters: Dict[str, Any]) -> CartSummary:
+        """
+        Returns the summary of the cart that matches the filters using a single query.
+        :raises Cart.DoesNotExist: if there's no cart that matches the filters.
+        """
+        rows = list(
+            self.cart_queryset.filter(**cart_filters).values(
+                'id', 'cart_uuid', 'user_id',
+                'items__product_id', 'items__quantity', 'items__product__price',
+                'items__product__discount_rate', 'items__product__tax_rate',
+            )
+        )
+        if not rows:
+            raise Cart.DoesNotExist("Cart matching query does not exist.")
+
+        cart = Cart(id=rows[0]['id'], cart_uuid=rows[0]['cart_uuid'], user_id=rows[0]['user_id'])
+        # Empty cart is returned as a single row without items because of LEFT OUTER JOIN
+        item_rows = (
+            {
+                "product_id": row["items__product_id"],
+                "quantity": row["items__quantity"],
+                "price": row["items__product__price"],
+                "discount_rate": row["items__product__discount_rate"],
+                "tax_rate": row["items__product__tax_rate"],
+            }
+            for row in rows if row["items__product_id"] is not None
+        )
+        return self._summarize(cart, item_rows)
+
+    def summarize_cart_items(self, cart: Cart, cart_items: Iterable[CartItem]) -> CartSummary:
+        """
+        Returns the summary of the cart using cart items with already loaded products.
+        """
+        item_rows = (
+            {
+                "product_id": cart_item.product_id,
+                "quantity": cart_item.quantity,
+                "price": cart_item.product.price,
+                "discount_rate": cart_item.product.discount_rate,
+                "tax_rate": cart_item.product.tax_rate,
+            }
+            for cart_item in cart_items
+        )
+        return self._summarize(cart, item_rows)
+
+    @staticmethod
+    def get_empty_summary(cart: Cart) -> CartSummary:
+        """
+        Returns the summary of the cart without items, no queries needed.
+        """
+        return CartSummary(cart)
@@ -0,0 +1,90 @@
+import datetime
+import logging
+import time
+from typing import List, NamedTuple, Tuple
+
+from django.db import connection, transaction
+from django.db.models import QuerySet
+
+from apps.carts.models import Cart, CartItem
+from .cart_replicator import CartReplicator
+
+
+class CartPurgeResult(NamedTuple):
+    deleted_carts_count: int
+    deleted_items_count: int
+    elapsed_seconds: float
+
+
+class InactiveCartPurger:
+    """
+    Deletes anonymous carts which weren't updated since the specified time.
+    Carts are deleted in chunks of chunk_size with two statements per chunk: one for their items and one
+    for the carts, so neither carts nor their items are loaded into memory by the cascade collector,
+    and every chunk holds its locks only for its own short transaction.
+    Carts are found by the partial index of the anonymous carts' updated_at.
+    Uuids of the deleted carts are replicated in the transaction of their chunk, since the replicated carts
+    don't know the activity of their items tracked by this service.
+    """
+    def __init__(self, cart_queryset: QuerySet[Cart], cart_replicator: CartReplicator, chunk_size: int = 1000):
+        self.cart_queryset = cart_queryset
+        self.cart_replicator = cart_replicator
+        self.chunk_size = chunk_size
+
+    def _delete_chunk(self, updated_before: datetime.datetime) -> Tuple[int, int]:
+        """
+        Deletes the chunk of the inactive carts with their items.
+        :return: Tuple with the numbers of deleted carts and cart items.
+        """
+        with transaction.atomic():
+            # Locked carts are being updated, so they're active and skipped
+            carts = list(
+                self.cart_queryset.filter(user__isnull=True, updated_at__lte=updated_before)
+                .order_by('updated_at')
+                .select_for_update(skip_locked=True)
+                .values_list('id', 'cart_uuid')[:self.chunk_size]
+            )
+            if not carts:
+                return 0, 0
+
+            cart_uuid_field = Cart._meta.get_field('cart_uuid')
+            cart_ids: List[int] = [cart_id for cart_id, _ in carts]
+            cart_uuids = [cart_uuid_field.get_db_prep_value(cart_uuid, connection) for _, cart_uuid in carts]
+            quote_name = connection.ops.quote_name
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"DELETE FROM {quote_name(CartItem._meta.db_table)} "
+                    f"WHERE cart_id IN ({', '.join(['%s'] * len(cart_uuids))})",
+                    cart_uuids,
+                )
+                deleted_items_count = cursor.rowcount
+                cursor.execute(
+                    f"DELETE FROM {quote_name(Cart._meta.db_table)} "
+                    f"WHERE id IN ({', '.join(['%s'] * len(cart_ids))})",
+                    cart_ids,
+                )
+                deleted_carts_count = cursor.rowcount
+
+            self.cart_replicator.replicate_inactive_carts_deletion([cart_uuid for _, cart_uuid in carts])
+
+        return deleted_carts_count, deleted_items_count
+
+    def purge(self, updated_before: datetime.datetime) -> CartPurgeResult:
+        """
+        Deletes all anonymous carts which weren't updated since updated_before and logs the progress.
+        """
+        started_at = time.monotonic()
+        deleted_carts_count = deleted_items_count = 0
+        while True:
+            chunk_carts_count, chunk_items_count = self._delete_chunk(updated_before)
+            deleted_carts_count += chunk_carts_count
+            deleted_items_count += chunk_items_count
+            elapsed_seconds = time.monotonic() - started_at
+            logging.info(
+                f"Deleted {deleted_carts_count} inactive carts and {deleted_items_count} cart items, "
+                f"{deleted_carts_count / max(elapsed_seconds, 1e-6):.0f} carts/s"
+            )
+            if chunk_carts_count < self.chunk_size:
+                break
+
+        return CartPurgeResult(deleted_carts_count, deleted_items_count, time.monotonic() - started_at)
@@ -0,0 +1,34 @@
+import uuid
+from typing import Union
+
+from django.core.cache.backends.base import BaseCache
+
+
+class PendingCartMerges:
+    """
+    Markers of the anonymous carts whose items are to be merged into the user's cart after login.
+    The merge is performed by whoever claims the marker first: the background task
+    or the request for the user's cart, so items are merged exactly once.
+    """
+    # The marker outlives any delay of the task queue, it's removed when the merge is claimed
+    TIMEOUT_SECONDS = 60 * 60 * 24
+
+    def __init__(self, cache: BaseCache):
+        self.cache = cache
+
+    @staticmethod
+    def _get_key(user_id: int, cart_uuid: Union[uuid.UUID, str]) -> str:
+        # Uuids written in a different case or without hyphens refer to the same marker
+        return f"user:{user_id}:pending_merge:{uuid.UUID(str(cart_uuid))}"
+
+    def add(self, user_id: int, cart_uuid: Union[uuid.UUID, str]) -> None:
+        self.cache.set(self._get_key(user_id, cart_uuid), 1, self.TIMEOUT_SECONDS)
+
+    def is_pending(self, user_id: int, cart_uuid: Union[uuid.UUID, str]) -> bool:
+        return self.cache.get(self._get_key(user_id, cart_uuid)) is not None
+
+    def claim(self, user_id: int, cart_uuid: Union[uuid.UUID, str]) -> bool:
+        """
+        Removes the marker and returns whether it was removed by this call.
+        """
+        return bool(self.cache.delete(self._get_key(user_id, cart_uuid)))
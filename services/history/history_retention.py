@@ -0,0 +1,109 @@
+import time
+from datetime import timedelta
+from typing import List, NamedTuple, Optional
+
+from django.db.models import QuerySet, Q, Count
+from django.utils import timezone
+
+from apps.history.models import RecentlyViewedItem
+
+
+class HistoryPruningResult(NamedTuple):
+    pruned_count: int
+    elapsed_seconds: float
+
+
+class HistoryRetention:
+    """
+    Removes items from the users' history which are out of the retention policy:
+    items older than max_age and items after the newest max_items_per_user items of the user.
+    Items are removed in batches of batch_size rows found by the indexes, and every batch is deleted
+    by its own statement, so the table isn't locked for long and the history can be listed meanwhile.
+    """
+    # Number of users whose items are counted with one statement
+    USERS_CHUNK_SIZE = 1000
+
+    def __init__(self, recently_viewed_queryset: QuerySet[RecentlyViewedItem],
+                 max_age: Optional[timedelta] = None, max_items_per_user: Optional[int] = None,
+                 batch_size: int = 1000):
+        self.recently_viewed_queryset = recently_viewed_queryset
+        self.max_age = max_age
+        self.max_items_per_user = max_items_per_user
+        self.batch_size = batch_size
+
+    def _delete_in_batches(self, queryset: QuerySet[RecentlyViewedItem]) -> int:
+        """
+        Deletes items of the queryset by batches of identifiers.
+        """
+        deleted_count = 0
+        while True:
+            item_ids = list(queryset.values_list('id', flat=True)[:self.batch_size])
+            if not item_ids:
+                return deleted_count
+
+            batch_deleted_count, _ = self.recently_viewed_queryset.filter(id__in=item_ids).delete()
+            deleted_count += batch_deleted_count
+            if len(item_ids) < self.batch_size:
+                return deleted_count
+
+    def prune_expired(self) -> int:
+        """
+        Removes items which weren't seen during max_age.
+        """
+        if not self.max_age:
+            return 0
+
+        # The oldest items are found by the last_seen index
+        return self._delete_in_batches(
+            self.recently_viewed_queryset.filter(last_seen__lt=timezone.now() - self.max_age).order_by('last_seen')
+        )
+
+    def _get_users_over_limit(self, after_user_id: int) -> List[int]:
+        return list(
+            self.recently_viewed_queryset.filter(user_id__gt=after_user_id)
+            .values('user_id')
+            .annotate(items_count=Count('id'))
+            .filter(items_count__gt=self.max_items_per_user)
+            .order_by('user_id')
+            .values_list('user_id', flat=True)[:self.USERS_CHUNK_SIZE]
+        )
+
+    def _prune_user_excess(self, user_id: int) -> int:
+        user_items = self.recently_viewed_queryset.filter(user_id=user_id)
+        # The oldest kept item is read from the (user, -last_seen, -id) index, items after it are removed
+        boundary = list(user_items.order_by('-last_seen', '-id').values_list(
+            'last_seen', 'id',
+        )[self.max_items_per_user - 1:self.max_items_per_user])
+        if not boundary:
+            return 0
+
+        last_seen, item_id = boundary[0]
+        return self._delete_in_batches(
+            user_items.filter(Q(last_seen__lt=last_seen) | Q(last_seen=last_seen, id__lt=item_id))
+        )
+
+    def prune_excess(self) -> int:
+        """
+        Removes items of the users after their newest max_items_per_user items.
+        """
+        if not self.max_items_per_user:
+            return 0
+
+        deleted_count = 0
+        last_user_id = 0
+        while True:
+            user_ids = self._get_users_over_limit(last_user_id)
+            for user_id in user_ids:
+                deleted_count += self._prune_user_excess(user_id)
+
+            if len(user_ids) < self.USERS_CHUNK_SIZE:
+                return deleted_count
+            last_user_id = user_ids[-1]
+
+    def prune(self) -> HistoryPruningResult:
+        """
+        Applies the retention policy to the history of all users.
+        """
+        started_at = time.monotonic()
+        pruned_count = self.prune_expired() + self.prune_excess()
+        return HistoryPruningResult(pruned_count, time.monotonic() - started_at)
@@ -0,0 +1,208 @@
+import datetime
+import time
+from typing import Iterable, List, NamedTuple, Optional
+
+from django.db import transaction
+from django.db.models import QuerySet, Q, F, Case, When, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from redis import Redis
+
+from apps.history.models import RecentlyViewedItem
+from apps.products.models import Product
+
+
+class BufferedView(NamedTuple):
+    user_id: int
+    product_id: str
+    count: int
+    last_seen: datetime.datetime
+
+
+class RecentlyViewedBuffer:
+    """
+    Write-behind buffer of product views in Redis.
+    Views are aggregated by (user, product): the number of views and the time of the last view,
+    and they are written to the database by flush() in bulk.
+    Buffered views of the user are taken from Redis atomically and applied under the user's lock,
+    so they are never applied twice and concurrent flushes don't overwrite each other's counts.
+    Views which aren't flushed yet are read by get_user_views() to show them in the user's history.
+    """
+    # Number of (user, product) pairs updated with one statement
+    CHUNK_SIZE = 500
+
+    def __init__(self, redis_client: Redis, recently_viewed_queryset: QuerySet[RecentlyViewedItem],
+                 product_queryset: QuerySet[Product], lock_timeout_seconds: int = 30,
+                 key_prefix: str = 'history:buffer'):
+        self.redis_client = redis_client
+        self.recently_viewed_queryset = recently_viewed_queryset
+        self.product_queryset = product_queryset
+        self.lock_timeout_seconds = lock_timeout_seconds
+        self.key_prefix = key_prefix
+
+    def _get_users_key(self) -> str:
+        return f"{self.key_prefix}:users"
+
+    def _get_counts_key(self, user_id: int) -> str:
+        return f"{self.key_prefix}:{user_id}:counts"
+
+    def _get_last_seen_key(self, user_id: int) -> str:
+        return f"{self.key_prefix}:{user_id}:last_seen"
+
+    def _get_lock_key(self, user_id: int) -> str:
+        return f"{self.key_prefix}:{user_id}:lock"
+
+    def record(self, user_id: int, product_id: str, seen_at: Optional[datetime.datetime] = None) -> None:
+        """
+        Records the view of the product with one round trip to Redis.
+        """
+        self.record_many([BufferedView(user_id, product_id, 1, seen_at or timezone.now())])
+
+    def record_many(self, views: Iterable[BufferedView]) -> None:
+        pipeline = self.redis_client.pipeline(transaction=True)
+        for view in views:
+            pipeline.hincrby(self._get_counts_key(view.user_id), view.product_id, view.count)
+            # The latest time of the view is kept
+            pipeline.zadd(self._get_last_seen_key(view.user_id), {view.product_id: view.last_seen.timestamp()},
+                          gt=True)
+            pipeline.sadd(self._get_users_key(), view.user_id)
+        pipeline.execute()
+
+    def _read(self, user_ids: List[int], remove: bool) -> List[BufferedView]:
+        """
+        Returns buffered views of the users, they're removed from Redis at the same time if remove is True.
+        """
+        pipeline = self.redis_client.pipeline(transaction=True)
+        for user_id in user_ids:
+            pipeline.hgetall(self._get_counts_key(user_id))
+            pipeline.zrange(self._get_last_seen_key(user_id), 0, -1, withscores=True)
+            if remove:
+                pipeline.delete(self._get_counts_key(user_id), self._get_last_seen_key(user_id))
+        results = pipeline.execute()
+
+        commands_count = 3 if remove else 2
+        views = []
+        for i, user_id in enumerate(user_ids):
+            counts, last_seen = results[i * commands_count:i * commands_count + 2]
+            last_seen = {product_id.decode(): timestamp for product_id, timestamp in last_seen}
+            for product_id, count in counts.items():
+                product_id = product_id.decode()
+                views.append(BufferedView(
+                    user_id, product_id, int(count),
+                    datetime.datetime.fromtimestamp(last_seen.get(product_id, time.time()), tz=datetime.timezone.utc),
+                ))
+
+        return views
+
+    def _take(self, user_ids: List[int]) -> List[BufferedView]:
+        """
+        Removes buffered views of the users from Redis and returns them.
+        """
+        return self._read(user_ids, remove=True)
+
+    def get_user_views(self, user_id: int) -> List[BufferedView]:
+        """
+        Returns views of the user which aren't written to the database yet, with one round trip to Redis.
+        """
+        return self._read([user_id], remove=False)
+
+    def discard(self, user_id: int, product_ids: Optional[List[str]] = None) -> None:
+        """
+        Removes buffered views of the products or all buffered views of the user,
+        so the history items removed by the user aren't written back by the next flush.
+        """
+        if product_ids is None:
+            self.redis_client.delete(self._get_counts_key(user_id), self._get_last_seen_key(user_id))
+            return
+
+        if product_ids:
+            pipeline = self.redis_client.pipeline(transaction=True)
+            pipeline.hdel(self._get_counts_key(user_id), *product_ids)
+            pipeline.zrem(self._get_last_seen_key(user_id), *product_ids)
+            pipeline.execute()
+
+    def _acquire_locks(self, user_ids: List[int]) -> List[int]:
+        """
+        Locks the users and returns the users who were locked, others are locked by concurrent flushes.
+        """
+        pipeline = self.redis_client.pipeline(transaction=False)
+        for user_id in user_ids:
+            pipeline.set(self._get_lock_key(user_id), 1, nx=True, ex=self.lock_timeout_seconds)
+        return [user_id for user_id, is_locked in zip(user_ids, pipeline.execute()) if is_locked]
+
+    def _release_locks(self, user_ids: List[int]) -> None:
+        if user_ids:
+            self.redis_client.delete(*[self._get_lock_key(user_id) for user_id in user_ids])
+
+    def _apply(self, views: List[BufferedView]) -> None:
+        """
+        Adds the views to the users' history with bulk statements.
+        """
+        existing_product_ids = set(self.product_queryset.filter(
+            object_id__in={view.product_id for view in views}
+        ).values_list('object_id', flat=True))
+        # Products could be deleted after they were viewed
+        views = [view for view in views if view.product_id in existing_product_ids]
+
+        # Views are returned to the buffer on failure, so none of them must be applied
+        with transaction.atomic():
+            for i in range(0, len(views), self.CHUNK_SIZE):
+                self._apply_chunk(views[i:i + self.CHUNK_SIZE])
+
+    def _apply_chunk(self, views: List[BufferedView]) -> None:
+        condition = Q()
+        for view in views:
+            condition |= Q(user_id=view.user_id, product_id=view.product_id)
+
+        existing_pairs = set(self.recently_viewed_queryset.filter(condition).values_list('user_id', 'product_id'))
+        self.recently_viewed_queryset.bulk_create([
+            RecentlyViewedItem(user_id=view.user_id, product_id=view.product_id, view_count=view.count)
+            for view in views if (view.user_id, view.product_id) not in existing_pairs
+        ])
+        # Created items get the time of the view instead of the current time set by auto_now
+        self.recently_viewed_queryset.filter(condition).update(
+            view_count=F('view_count') + Case(*[
+                When(user_id=view.user_id, product_id=view.product_id, then=Value(view.count))
+                for view in views if (view.user_id, view.product_id) in existing_pairs
+            ], default=Value(0)),
+            last_seen=Case(*[
+                When(user_id=view.user_id, product_id=view.product_id,
+                     then=Greatest(F('last_seen'), Value(view.last_seen))
+                     if (view.user_id, view.product_id) in existing_pairs else Value(view.last_seen))
+                for view in views
+            ]),
+        )
+
+    def _flush_locked_users(self, user_ids: List[int]) -> None:
+        views = self._take(user_ids)
+        if not views:
+            return
+
+        try:
+            self._apply(views)
+        except Exception:
+            # Views are returned to the buffer and applied by the next flush
+            self.record_many(views)
+            raise
+
+    def flush(self, max_users_count: int = 1000) -> int:
+        """
+        Writes buffered views of up to max_users_count users to the database.
+        :return: Number of users whose views were written.
+        """
+        user_ids = [int(user_id) for user_id in self.redis_client.spop(self._get_users_key(), max_users_count) or []]
+        if not user_ids:
+            return 0
+
+        locked_user_ids = self._acquire_locks(user_ids)
+        busy_user_ids = set(user_ids) - set(locked_user_ids)
+        if busy_user_ids:
+            # Views of these users are being applied by the concurrent flush, the rest is left to the next flush
+            self.redis_client.sadd(self._get_users_key(), *busy_user_ids)
+
+        try:
+            if locked_user_ids:
+                self._flush_locked_users(locked_user_ids)
+            return len(locked_user_ids)
+        finally:
+            self._release_locks(locked_user_ids)
@@ -0,0 +1,53 @@
+from datetime import timedelta
+from typing import Iterable, Set
+
+from django.db import IntegrityError, transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from apps.core.models import ProcessedMessage
+
+
+class ProcessedMessageLedger:
+    """
+    Records identifiers of handled messages, so redelivered messages can be skipped.
+    Messages must be marked in the same transaction as the changes they make,
+    then a failed message is not recorded and will be handled again.
+    """
+    def __init__(self, processed_message_queryset: QuerySet[ProcessedMessage], retention: timedelta):
+        self.processed_message_queryset = processed_message_queryset
+        # How long identifiers are kept, redeliveries are expected much sooner
+        self.retention = retention
+
+    def mark_processed(self, message_id: str) -> bool:
+        """
+        Records the message and returns False if it was already recorded.
+        """
+        _, created = self.processed_message_queryset.get_or_create(message_id=message_id)
+        return created
+
+    def mark_many_processed(self, message_ids: Iterable[str]) -> Set[str]:
+        """
+        Records messages and returns identifiers of the messages which were not recorded before.
+        """
+        message_ids = set(message_ids)
+        already_processed = set(
+            self.processed_message_queryset.filter(message_id__in=message_ids).values_list('message_id', flat=True)
+        )
+        new_message_ids = message_ids - already_processed
+        try:
+            with transaction.atomic():
+                self.processed_message_queryset.bulk_create(
+                    [ProcessedMessage(message_id=message_id) for message_id in new_message_ids]
+                )
+        except IntegrityError:
+            # Some messages were recorded by the concurrent consumer, so they are checked one by one
+            new_message_ids = {message_id for message_id in new_message_ids if self.mark_processed(message_id)}
+
+        return new_message_ids
+
+    def delete_expired(self) -> int:
+        deleted_count, _ = self.processed_message_queryset.filter(
+            processed_at__lt=timezone.now() - self.retention,
+        ).delete()
+        return deleted_count
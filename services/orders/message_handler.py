@@ -1,6 +1,11 @@
-from typing import Any
+import itertools
+from typing import Any, List, Tuple
+
 from services.orders.replication.order_processing import OrderProcessingHandler
 
+# Messages which can be collected and applied together
+BATCHED_ROUTING_KEYS = ('orders.products.reserve_and_remove_cart_items', )
+
 
 def handle_message(routing_key: str, message: Any) -> None:
     base_routing_key = "orders"
@@ -9,3 +14,16 @@ def handle_message(routing_key: str, message: Any) -> None:
         return OrderProcessingHandler.reserve_products_and_remove_cart_items(message)
     elif routing_key == base_routing_key + ".products.release":
         return OrderProcessingHandler.release_products(message)
+
+
+def handle_message_batch(messages: List[Tuple[str, Any]]) -> None:
+    """
+    Reserves products of consecutive orders at once.
+    """
+    for routing_key, group in itertools.groupby(messages, key=lambda item: item[0]):
+        group_messages = [message for _, message in group]
+        if routing_key == 'orders.products.reserve_and_remove_cart_items':
+            OrderProcessingHandler.reserve_products_for_orders(group_messages)
+        else:
+            for message in group_messages:
+                handle_message(routing_key, message)
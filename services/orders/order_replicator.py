@@ -0,0 +1,22 @@
+from typing import List, Optional
+
+from django.conf import settings
+
+from services.outbox.outbox_writer import write_replication_event
+
+
+class OrderReplicator:
+    """
+    Notifies "subscribed" microservices about the outcome of the processing of orders.
+    """
+    def __init__(self):
+        self.base_routing_key_name = 'users.orders'
+        self.exchange_name = settings.USERS_DATA_CRUD_EXCHANGE_TOPIC_NAME
+
+    def replicate_reservation_failure(self, order_id: Optional[str], user_id: Optional[int],
+                                      failed_product_ids: List[str]) -> None:
+        routing_key = self.base_routing_key_name + '.reservation_failed'
+        write_replication_event(
+            self.exchange_name, routing_key,
+            {"order_id": order_id, "user_id": user_id, "failed_product_ids": failed_product_ids},
+        )
@@ -1,23 +1,48 @@
+from typing import List
+
 from django.db import transaction
 
 from dependencies.service_dependencies.carts import get_cart_service
 from dependencies.service_dependencies.products import get_product_service
 from replication_schemas.order_processing.product_release import ProductReleaseData
 from replication_schemas.order_processing.product_reservation import ProductReservationData
+from services.orders.order_replicator import OrderReplicator
+from services.products.stock_reservation import ReservationResult
 
 
 class OrderProcessingHandler:
+    @staticmethod
+    def _complete_reservation(data: ProductReservationData, reservation_result: ReservationResult) -> None:
+        if not reservation_result.is_reserved:
+            # Cart items are kept and the orders service is notified which products are out of stock
+            OrderReplicator().replicate_reservation_failure(
+                data.get("order_id"), data["user_id"], reservation_result.failed_product_ids
+            )
+            return
+
+        # Get all product_ids, that will be used for cart_items removal
+        product_ids = [product["product_id"] for product in data["products"]]
+        # Delete cart items that were used for order creation
+        get_cart_service().delete_many_cart_items(data["user_id"], product_ids)
+
     @staticmethod
     def reserve_products_and_remove_cart_items(data: ProductReservationData) -> None:
-        cart_service = get_cart_service()
         product_service = get_product_service()
         with transaction.atomic():
-            # Get all product_ids, that will be used for cart_items removal
-            product_ids = [product["product_id"] for product in data["products"]]
-            # Delete cart items that were used for order creation
-            cart_service.delete_many_cart_items(data["user_id"], product_ids)
             # Reserve products for order
-            product_service.reserve_for_order(data["products"])
+            reservation_result = product_service.reserve_for_order(data["products"])
+            OrderProcessingHandler._complete_reservation(data, reservation_result)
+
+    @staticmethod
+    def reserve_products_for_orders(orders: List[ProductReservationData]) -> None:
+        """
+        Reserves products of many orders with one statement if there's enough stock for all of them
+        """
+        product_service = get_product_service()
+        with transaction.atomic():
+            reservation_results = product_service.reserve_for_orders([data["products"] for data in orders])
+            for data, reservation_result in zip(orders, reservation_results):
+                OrderProcessingHandler._complete_reservation(data, reservation_result)
 
     @staticmethod
     def release_products(data: ProductReleaseData) -> None:
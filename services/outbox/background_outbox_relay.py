@@ -0,0 +1,81 @@
+import logging
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+from django.db import close_old_connections
+
+from services.outbox.outbox_relay import OutboxRelay, OutboxBusyError
+
+
+class BackgroundOutboxRelay:
+    """
+    Publishes outbox events from the background thread of the web process as soon as their transaction is committed,
+    so they don't wait for the next poll of the outbox relay.
+    Events which couldn't be published stay in the outbox and are published by the outbox relay process
+    and by the fallback (the Dramatiq task), which is called once after the publishing starts failing.
+    The relay must not wait for locks: while the oldest events are locked by the relay of another process,
+    the thread retries shortly instead of blocking on the same rows, since the locked events are published meanwhile
+    and the order of events is kept.
+    """
+    # How soon the relay retries if the outbox is being relayed by another process
+    BUSY_RETRY_DELAY_SECONDS = 0.02
+
+    def __init__(self, relay_factory: Callable[[], OutboxRelay], retry_delay: float,
+                 fallback: Optional[Callable[[], None]] = None):
+        self._relay_factory = relay_factory
+        self._retry_delay = retry_delay
+        self._fallback = fallback
+        # The fallback is called once until events are published again
+        self._is_failing = False
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+
+    def notify(self) -> None:
+        """
+        Wakes up the background thread, which publishes all events from the outbox.
+        """
+        self._ensure_started()
+        self._wakeup.set()
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            # Threads don't survive fork, so the worker process starts its own thread
+            if self._thread is None or not self._thread.is_alive() or self._pid != os.getpid():
+                self._thread = threading.Thread(target=self._run, name='background-outbox-relay', daemon=True)
+                self._pid = os.getpid()
+                self._thread.start()
+
+    def _run(self) -> None:
+        relay = self._relay_factory()
+        while True:
+            self._wakeup.wait()
+            # Events committed during the publishing are picked up by the next iteration
+            self._wakeup.clear()
+            close_old_connections()
+            try:
+                while relay.relay_batch() == relay.batch_size:
+                    pass
+                self._is_failing = False
+            except OutboxBusyError:
+                # Events committed after the batch of the other relay are relayed by the retry
+                time.sleep(self.BUSY_RETRY_DELAY_SECONDS)
+                self._wakeup.set()
+            except Exception as e:
+                logging.warning(f"Unable to publish outbox events, they are left to the outbox relay: {e!r}")
+                self._call_fallback()
+                # The broker is likely unavailable, so it isn't retried on every commit
+                time.sleep(self._retry_delay)
+
+    def _call_fallback(self) -> None:
+        if self._fallback is None or self._is_failing:
+            return
+
+        self._is_failing = True
+        try:
+            self._fallback()
+        except Exception as e:
+            logging.warning(f"Unable to call the fallback of the outbox relay: {e!r}")
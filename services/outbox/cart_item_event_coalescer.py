@@ -0,0 +1,51 @@
+from datetime import timedelta
+from typing import Any, Dict, List, Tuple, Iterable
+
+from apps.core.models import OutboxEvent
+
+
+class CartItemEventCoalescer:
+    """
+    Replaces consecutive creations and updates of cart items with one "users.cart_items.upsert.many" message per cart,
+    which contains only the latest state of each cart item.
+    Other events are left untouched and are never reordered with cart item events.
+    """
+    COALESCED_ROUTING_KEYS = ('users.cart_items.create.one', 'users.cart_items.update.one')
+    UPSERT_MANY_ROUTING_KEY = 'users.cart_items.upsert.many'
+
+    def __init__(self, window: timedelta):
+        # How long cart item events wait in the outbox for newer events of the same cart item
+        self.window = window
+
+    def _flush(self, pending: Dict[Tuple[str, str], List[OutboxEvent]],
+               messages: List[Tuple[str, str, Any]]) -> None:
+        # Carts are flushed in the order of their first event
+        for (exchange_name, _), events in pending.items():
+            if len(events) == 1:
+                # Nothing to coalesce, so the event is published as is
+                messages.append((exchange_name, events[0].routing_key, events[0].payload))
+                continue
+
+            # Only the latest state of each cart item is kept
+            latest_states = {event.payload["product"]: event.payload for event in events}
+            messages.append((exchange_name, self.UPSERT_MANY_ROUTING_KEY, list(latest_states.values())))
+
+        pending.clear()
+
+    def coalesce(self, events: Iterable[OutboxEvent]) -> List[Tuple[str, str, Any]]:
+        """
+        Returns messages to publish as tuples of the exchange name, the routing key and the payload.
+        """
+        messages: List[Tuple[str, str, Any]] = []
+        pending: Dict[Tuple[str, str], List[OutboxEvent]] = {}
+        for event in events:
+            if event.routing_key in self.COALESCED_ROUTING_KEYS:
+                pending.setdefault((event.exchange_name, event.payload["cart"]), []).append(event)
+                continue
+
+            # Any other event (for example, removal of the cart item) must be published after the previous updates
+            self._flush(pending, messages)
+            messages.append((event.exchange_name, event.routing_key, event.payload))
+
+        self._flush(pending, messages)
+        return messages
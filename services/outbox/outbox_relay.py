@@ -0,0 +1,87 @@
+import itertools
+import logging
+import time
+from typing import Optional
+
+from django.db import transaction, close_old_connections, OperationalError
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from apps.core.models import OutboxEvent
+from apps.core.message_broker.publisher import PooledPublisher
+from services.outbox.cart_item_event_coalescer import CartItemEventCoalescer
+
+
+# SQLSTATE of PostgreSQL when the row locked by another transaction can't be locked with NOWAIT
+LOCK_NOT_AVAILABLE = '55P03'
+
+
+class OutboxBusyError(Exception):
+    """
+    Raised by the relay which doesn't wait for locks if the oldest events are locked by another relay.
+    """
+
+
+class OutboxRelay:
+    """
+    Publishes replication events from the outbox to the message broker and removes published events.
+    With the coalescer, events are published only after the coalescing window has passed,
+    so frequent updates of the same cart item are published as one message.
+    """
+    def __init__(self, outbox_queryset: QuerySet[OutboxEvent], publisher: PooledPublisher, batch_size: int,
+                 coalescer: Optional[CartItemEventCoalescer] = None, wait_for_locks: bool = True):
+        self.outbox_queryset = outbox_queryset
+        self.publisher = publisher
+        self.batch_size = batch_size
+        self.coalescer = coalescer
+        # Without waiting, OutboxBusyError is raised if the oldest events are locked by another relay
+        self.wait_for_locks = wait_for_locks
+
+    def relay_batch(self) -> int:
+        """
+        Publishes the oldest events and returns the number of published events.
+        Events are locked until they are removed, so concurrent relays cannot change the order of events.
+        """
+        queryset = self.outbox_queryset
+        if self.coalescer is not None:
+            queryset = queryset.filter(created_at__lte=timezone.now() - self.coalescer.window)
+
+        with transaction.atomic():
+            try:
+                events = list(
+                    queryset.select_for_update(nowait=not self.wait_for_locks).order_by('id')[:self.batch_size]
+                )
+            except OperationalError as e:
+                if getattr(e.__cause__, 'pgcode', None) == LOCK_NOT_AVAILABLE:
+                    raise OutboxBusyError() from e
+                raise
+            if not events:
+                return 0
+
+            if self.coalescer is not None:
+                messages = self.coalescer.coalesce(events)
+            else:
+                messages = [(event.exchange_name, event.routing_key, event.payload) for event in events]
+
+            for exchange_name, exchange_messages in itertools.groupby(messages, key=lambda message: message[0]):
+                self.publisher.publish_many(
+                    exchange_name, [(routing_key, payload) for _, routing_key, payload in exchange_messages],
+                )
+
+            self.outbox_queryset.filter(id__in=[event.id for event in events]).delete()
+
+        return len(events)
+
+    def run(self, poll_interval: float) -> None:
+        logging.info('Outbox relay was launched')
+        while True:
+            close_old_connections()
+            try:
+                relayed_count = self.relay_batch()
+            except Exception as e:
+                logging.exception(f"Unable to relay outbox events: {e!r}")
+                relayed_count = 0
+
+            # Wait for new events only if the outbox is drained
+            if relayed_count < self.batch_size:
+                time.sleep(poll_interval)
@@ -0,0 +1,19 @@
+from typing import Any
+
+from django.conf import settings
+from django.db import transaction
+
+from apps.core.models import OutboxEvent
+from dependencies.service_dependencies.outbox import get_background_outbox_relay
+
+
+def write_replication_event(exchange_name: str, routing_key: str, data: Any) -> OutboxEvent:
+    """
+    Saves the replication event to the outbox.
+    The event is published by the outbox relay only if the current transaction is committed.
+    With the direct replication transport, the background relay of this process is woken up after the commit.
+    """
+    event = OutboxEvent.objects.create(exchange_name=exchange_name, routing_key=routing_key, payload=data)
+    if settings.REPLICATION_TRANSPORT == 'direct':
+        transaction.on_commit(lambda: get_background_outbox_relay().notify())
+    return event
@@ -1,4 +1,5 @@
-from typing import Any
+import itertools
+from typing import Any, List, Tuple
 
 from apps.products.param_classes.attach_to_event_params import AttachToEventParams
 from apps.products.param_classes.detach_from_event_params import DetachFromEventParams
@@ -6,6 +7,9 @@ from .replication.create import ProductCreator
 from .replication.update import ProductModifier
 from .replication.delete import ProductRemover
 
+# Messages which can be collected and applied together
+BATCHED_ROUTING_KEYS = ('products.crud.create.one', 'products.crud.update.one', 'products.crud.delete.one')
+
 def handle_message(routing_key: str, message: Any):
     if routing_key == 'products.crud.create.one':
         return ProductCreator().create_one(message)
@@ -25,3 +29,23 @@ def handle_message(routing_key: str, message: Any):
     elif routing_key == 'products.detach_from_event':
         detach_from_event_params = DetachFromEventParams(**message)
         return ProductModifier().detach_from_event(detach_from_event_params)
+
+
+def handle_message_batch(messages: List[Tuple[str, Any]]) -> None:
+    """
+    Applies consecutive messages with the same routing key with one bulk operation.
+    Messages about the same product are collapsed, so only the last creation and the merged update are written.
+    """
+    for routing_key, group in itertools.groupby(messages, key=lambda item: item[0]):
+        group_messages = [message for _, message in group]
+        if routing_key == 'products.crud.create.one':
+            ProductCreator().create_many_products(group_messages)
+        elif routing_key == 'products.crud.update.one':
+            ProductModifier().update_many_products(group_messages)
+        elif routing_key == 'products.crud.delete.one':
+            ProductRemover().delete_many_products(
+                {"product_ids": [message.get('_id', '') for message in group_messages]}
+            )
+        else:
+            for message in group_messages:
+                handle_message(routing_key, message)
@@ -4,29 +4,26 @@ from django.db.models import QuerySet, When, Case, F
 
 from apps.products.models import Product
 from replication_schemas.order_processing.base import ProductItem
+from services.carts.cart_cache import CartCache
+from .stock_reservation import StockReservationEngine, ReservationResult
 
 
 class ProductService:
-    def __init__(self, product_queryset: QuerySet[Product]):
+    def __init__(self, product_queryset: QuerySet[Product], cart_cache: CartCache,
+                 stock_reservation_engine: StockReservationEngine):
         self.product_queryset = product_queryset
+        self.cart_cache = cart_cache
+        self.stock_reservation_engine = stock_reservation_engine
 
     @staticmethod
-    def _create_when_statements(product_items: Iterable[ProductItem], operation: str) -> List[When]:
-        """
-        Creates a list of `When` conditions for the bulk update
-        """
-        if operation == 'reserve':
-            return [
-                When(object_id=order_item["product_id"], then=F('stock') - order_item["quantity"])
-                for order_item in product_items
-            ]
-        elif operation == 'release':
-            return [
-                When(object_id=order_item["product_id"], then=F('stock') + order_item["quantity"])
-                for order_item in product_items
-            ]
-        else:
-            raise ValueError("Invalid operation. Must be 'reserve' or 'release'.")
+    def _create_release_when_statements(product_items: Iterable[ProductItem]) -> List[When]:
+        """
+        Creates a list of `When` conditions which return the quantities to the stock for the bulk update
+        """
+        return [
+            When(object_id=order_item["product_id"], then=F('stock') + order_item["quantity"])
+            for order_item in product_items
+        ]
 
     def _bulk_update_stock(self, product_items: Iterable[ProductItem], when_statements: List[When]) -> None:
         """
@@ -38,16 +35,36 @@ class ProductService:
             stock=Case(*when_statements)
         )
 
-    def reserve_for_order(self, product_items: Iterable[ProductItem]) -> None:
+    def reserve_for_order(self, product_items: Iterable[ProductItem]) -> ReservationResult:
         """
-        Reserves ordered products
+        Reserves ordered products if there's enough stock for all of them
         """
-        when_statements = self._create_when_statements(product_items, 'reserve')
-        self._bulk_update_stock(product_items, when_statements)
+        result = self.stock_reservation_engine.reserve(product_items)
+        if result.is_reserved:
+            self.cart_cache.invalidate_carts_with_products(
+                [order_item["product_id"] for order_item in product_items]
+            )
+        return result
+
+    def reserve_for_orders(self, orders: List[Iterable[ProductItem]]) -> List[ReservationResult]:
+        """
+        Reserves products of many orders, every order is reserved completely or not at all
+        """
+        orders = [list(product_items) for product_items in orders]
+        results = self.stock_reservation_engine.reserve_many(orders)
+        self.cart_cache.invalidate_carts_with_products({
+            order_item["product_id"]
+            for product_items, result in zip(orders, results) if result.is_reserved
+            for order_item in product_items
+        })
+        return results
 
     def release_from_order(self, product_items: Iterable[ProductItem]) -> None:
         """
         Returns ordered products from the reservation for the order
         """
-        when_statements = self._create_when_statements(product_items, 'release')
+        when_statements = self._create_release_when_statements(product_items)
         self._bulk_update_stock(product_items, when_statements)
+        self.cart_cache.invalidate_carts_with_products(
+            [order_item["product_id"] for order_item in product_items]
+        )
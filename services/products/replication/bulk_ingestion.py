@@ -0,0 +1,165 @@
+import logging
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Field, DecimalField
+
+from apps.products.models import Product
+from services.carts.cart_cache import CartCache
+
+
+class BulkIngestionResult:
+    """
+    Result of the bulk ingestion.
+        - ingested_count: Number of created or updated products.
+        - rejected_rows: Pairs of the product's object_id (None if it is missing) and errors of the rejected row.
+    """
+    def __init__(self):
+        self.ingested_count = 0
+        self.rejected_rows: List[Tuple[Optional[str], Dict[str, List[str]]]] = []
+
+
+class ProductBulkIngestor:
+    """
+    Creates and updates products from "products.crud.create.many" and "products.crud.update.many" messages.
+    Rows are validated with model fields instead of serializers and written in chunks with one statement per chunk.
+    Invalid rows are rejected without aborting the rest of the batch.
+    """
+    # Fields which cannot be changed by messages
+    READ_ONLY_FIELDS = ('id', )
+    # Fields which cannot be changed by update messages, object_id is used to find the product
+    UPDATE_READ_ONLY_FIELDS = ('id', 'object_id', 'parent_id')
+
+    def __init__(self, cart_cache: CartCache, chunk_size: int):
+        self.cart_cache = cart_cache
+        self.chunk_size = chunk_size
+        self.fields: Dict[str, Field] = {field.attname: field for field in Product._meta.concrete_fields}
+
+    @staticmethod
+    def _chunks(rows: List[Any], chunk_size: int) -> Iterable[List[Any]]:
+        for start in range(0, len(rows), chunk_size):
+            yield rows[start:start + chunk_size]
+
+    @staticmethod
+    def _is_required(field: Field) -> bool:
+        return not (field.null or field.blank or field.has_default())
+
+    def _clean_row(self, row: Dict[str, Any], read_only_fields: Tuple[str, ...],
+                   partial: bool) -> Tuple[Dict[str, Any], Dict[str, List[str]]]:
+        """
+        Converts values of the row to python types and validates them.
+        Unknown and read-only fields are ignored.
+        :param row: Product's data from the message.
+        :param read_only_fields: Fields which are ignored.
+        :param partial: If False, missing required fields are reported as errors.
+        :return: Cleaned values and errors of the row.
+        """
+        cleaned_data, errors = {}, {}
+        for name, field in self.fields.items():
+            if name in read_only_fields:
+                continue
+
+            if name not in row:
+                if not partial and self._is_required(field):
+                    errors[name] = ["This field is required."]
+                continue
+
+            value = row[name]
+            if isinstance(field, DecimalField) and isinstance(value, float):
+                # Floats are converted by their shortest representation like DRF does, 19.99 stays 19.99
+                value = Decimal(str(value))
+
+            try:
+                cleaned_data[name] = field.clean(value, None)
+            except ValidationError as e:
+                errors[name] = e.messages
+
+        return cleaned_data, errors
+
+    def _reject(self, result: BulkIngestionResult, object_id: Optional[str], errors: Dict[str, List[str]]) -> None:
+        logging.error(f"Product {object_id} was rejected: {errors}")
+        result.rejected_rows.append((object_id, errors))
+
+    def create_many(self, rows: List[Dict[str, Any]]) -> BulkIngestionResult:
+        """
+        Creates products, already existing products are updated with the provided fields,
+        so the redelivered message does not fail on the unique object_id.
+        """
+        result = BulkIngestionResult()
+        # Only the last row of the same product is kept, since one statement cannot update the same row twice
+        valid_rows: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            cleaned_data, errors = self._clean_row(row, self.READ_ONLY_FIELDS, partial=False)
+            if errors:
+                self._reject(result, row.get("object_id"), errors)
+            else:
+                valid_rows[cleaned_data["object_id"]] = cleaned_data
+
+        for chunk in self._chunks(list(valid_rows.values()), self.chunk_size):
+            # Products are grouped by the provided fields, so missing fields don't overwrite existing values
+            groups: Dict[frozenset, List[Product]] = {}
+            for cleaned_data in chunk:
+                groups.setdefault(frozenset(cleaned_data.keys()), []).append(Product(**cleaned_data))
+
+            with transaction.atomic():
+                for provided_fields, products in groups.items():
+                    update_fields = [name for name in self.fields if name in provided_fields and name != 'object_id']
+                    Product.objects.bulk_create(
+                        products,
+                        update_conflicts=True,
+                        unique_fields=['object_id'],
+                        update_fields=update_fields,
+                    )
+
+                self.cart_cache.invalidate_carts_with_products([data["object_id"] for data in chunk])
+
+            result.ingested_count += len(chunk)
+
+        return result
+
+    def update_many(self, rows: List[Dict[str, Any]]) -> BulkIngestionResult:
+        """
+        Updates provided fields of existing products, rows of missing products are rejected.
+        """
+        result = BulkIngestionResult()
+        valid_rows: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            object_id = row.get("object_id")
+            cleaned_data, errors = self._clean_row(row, self.UPDATE_READ_ONLY_FIELDS, partial=True)
+            if object_id is None:
+                errors["object_id"] = ["This field is required."]
+
+            if errors:
+                self._reject(result, object_id, errors)
+            else:
+                valid_rows.setdefault(object_id, {}).update(cleaned_data)
+
+        for chunk in self._chunks(list(valid_rows.items()), self.chunk_size):
+            with transaction.atomic():
+                products = Product.objects.select_for_update().in_bulk(
+                    [object_id for object_id, _ in chunk], field_name='object_id',
+                )
+                updated_products, update_fields = [], set()
+                for object_id, cleaned_data in chunk:
+                    product = products.get(object_id)
+                    if product is None:
+                        self._reject(result, object_id, {"object_id": ["Product does not exist."]})
+                        continue
+
+                    for name, value in cleaned_data.items():
+                        setattr(product, name, value)
+                    update_fields.update(cleaned_data.keys())
+                    updated_products.append(product)
+
+                if update_fields:
+                    Product.objects.bulk_update(
+                        updated_products, [name for name in self.fields if name in update_fields],
+                    )
+
+                self.cart_cache.invalidate_carts_with_products([product.object_id for product in updated_products])
+
+            result.ingested_count += len(updated_products)
+
+        return result
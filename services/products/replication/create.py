@@ -1,6 +1,7 @@
 import logging
 from apps.products.serializers.create import ProductSerializer
-from apps.products.models import Product
+from dependencies.service_dependencies.products import get_product_bulk_ingestor
+from services.products.replication.bulk_ingestion import BulkIngestionResult
 
 
 class ProductCreator:
@@ -13,16 +14,5 @@ class ProductCreator:
             logging.error(serializer.errors)
             logging.info("Unable to serialize data and create product")
 
-    def _validate_products(self, data: list[dict]) -> list[dict]:
-        serializer = ProductSerializer(data=data, many=True)
-        serializer.is_valid(raise_exception=True)
-        return serializer.validated_data
-
-    def create_many_products(self, data: list[dict]) -> list[Product]:
-        validated_data = self._validate_products(data)
-        data_set = list()
-        for data in validated_data:
-            data_set.append(Product(**data))
-
-        products = Product.objects.bulk_create(data_set)
-        return products
+    def create_many_products(self, data: list[dict]) -> BulkIngestionResult:
+        return get_product_bulk_ingestor().create_many(data)
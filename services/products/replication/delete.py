@@ -2,14 +2,20 @@ from logging import error
 from django.db.models import Q
 
 from apps.products.models import Product
+from dependencies.service_dependencies.carts import get_cart_cache
 
 class ProductRemover:
+    def __init__(self):
+        self.cart_cache = get_cart_cache()
 
     def delete_one_product(self ,message_body: dict):
         object_id = message_body.get('_id', '')
         try:
             product = Product.objects.get(object_id=object_id)
+            # Cart items are removed together with the product, so carts must be found before the removal
+            cart_uuids = self.cart_cache.get_carts_with_products([product.object_id])
             product.delete()
+            self.cart_cache.invalidate(cart_uuids)
         except Product.DoesNotExist:
             error("Cannot find product to delete")
 
@@ -17,6 +23,9 @@ class ProductRemover:
     def delete_many_products(self, filters: dict):
         object_ids = filters.get("product_ids", [])
         parent_ids = filters.get("parent_ids", [])
-        Product.objects.filter(
+        queryset = Product.objects.filter(
             Q(object_id__in=object_ids) | Q(parent_id__in=parent_ids)
-        ).delete()
+        )
+        cart_uuids = self.cart_cache.get_carts_with_products(queryset.values('object_id'))
+        queryset.delete()
+        self.cart_cache.invalidate(cart_uuids)
@@ -1,14 +1,28 @@
-from typing import Optional
+import uuid
+from decimal import Decimal
+from typing import Optional, List
 from logging import error
 
+from django.conf import settings
+from django.db.models import Case, When, Value
+
 from apps.products.param_classes.attach_to_event_params import AttachToEventParams
 from apps.products.param_classes.detach_from_event_params import DetachFromEventParams
 from apps.products.serializers.update import ProductSerializer
 from apps.products.models import Product
 from django.db import transaction
+from dependencies.service_dependencies.carts import get_cart_cache
+from dependencies.service_dependencies.products import get_product_bulk_ingestor
+from services.carts.cart_replicator import CartReplicator
+from services.products.replication.bulk_ingestion import BulkIngestionResult
 
 
 class ProductModifier:
+    def __init__(self):
+        self.cart_cache = get_cart_cache()
+        self.cart_replicator = CartReplicator()
+        self.chunk_size = settings.PRODUCTS_BULK_INGESTION_CHUNK_SIZE
+
     def update_one_product(self, data: dict) -> Optional[dict]:
         try:
             product = Product.objects.get(object_id=data.pop("object_id", None))
@@ -19,27 +33,62 @@ class ProductModifier:
         data = ProductSerializer(instance=product, data=data, partial=True)
         if data.is_valid():
             data.save()
+            self.cart_cache.invalidate_carts_with_products([product.object_id])
             return data.data
         else:
             error(data.errors)
 
-    def update_many_products(self, data: list[dict]):
-        grouped_data = {item["object_id"]: item for item in data}
-        queryset = Product.objects.filter(object_id__in=[object_id for object_id in grouped_data.keys()])
+    def update_many_products(self, data: list[dict]) -> BulkIngestionResult:
+        return get_product_bulk_ingestor().update_many(data)
+
+    def attach_to_event(self, params: AttachToEventParams) -> List[uuid.UUID]:
+        """
+        Sets discounts and the event of the products with one UPDATE statement per chunk of products.
+        Returns uuids of the carts affected by the new discounts, they're replicated in the same transaction.
+        """
+        discount_mapping = {
+            _id: Decimal(str(discount)) for _id, discount in zip(params.product_ids, params.discounts)
+        }
+        product_ids = list(discount_mapping.keys())
+        discount_rate_field = Product._meta.get_field('discount_rate')
         with transaction.atomic():
-            for product in queryset:
-                serializer = ProductSerializer(instance=product, data=grouped_data[product.object_id], partial=True)
-                serializer.is_valid(raise_exception=False)
-                serializer.save()
-
-    def attach_to_event(self, params: AttachToEventParams):
-        queryset = Product.objects.filter(object_id__in=params.product_ids)
-        discount_mapping = {_id: discount for _id, discount in zip(params.product_ids, params.discounts)}
+            for start in range(0, len(product_ids), self.chunk_size):
+                chunk = product_ids[start:start + self.chunk_size]
+                # Events usually have a few discount levels, so products are grouped by the discount
+                # to keep the number of CASE branches small
+                products_by_discount = {}
+                for _id in chunk:
+                    products_by_discount.setdefault(discount_mapping[_id], []).append(_id)
+
+                Product.objects.filter(object_id__in=chunk).update(
+                    discount_rate=Case(
+                        *[When(object_id__in=ids, then=Value(discount))
+                          for discount, ids in products_by_discount.items()],
+                        output_field=discount_rate_field,
+                    ),
+                    event_id=params.event_id,
+                )
+
+            cart_uuids = self.cart_cache.get_carts_with_products(product_ids)
+            self.cart_cache.invalidate(cart_uuids)
+            if cart_uuids:
+                self.cart_replicator.replicate_carts_repricing(cart_uuids, params.event_id)
+
+        return cart_uuids
+
+    def detach_from_event(self, params: DetachFromEventParams) -> List[uuid.UUID]:
+        """
+        Removes discounts of the event's products.
+        Returns uuids of the carts affected by the removed discounts, they're replicated in the same transaction.
+        """
+        queryset = Product.objects.filter(event_id=params.event_id)
         with transaction.atomic():
-            for product in queryset:
-                product.discount_rate = discount_mapping[product.object_id]
-                product.event_id = params.event_id
-                product.save()
+            # Carts are found before the update, since the update removes the event from the products
+            cart_uuids = self.cart_cache.get_carts_with_products(queryset.values('object_id'))
+            queryset.update(discount_rate=None, event_id=None)
+            self.cart_cache.invalidate(cart_uuids)
+            if cart_uuids:
+                self.cart_replicator.replicate_carts_repricing(cart_uuids, params.event_id)
+
+        return cart_uuids
 
-    def detach_from_event(self, params: DetachFromEventParams):
-        Product.objects.filter(event_id=params.event_id).update(discount_rate=None, event_id=None)
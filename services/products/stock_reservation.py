@@ -0,0 +1,105 @@
+from typing import Dict, Iterable, List
+
+from django.db import transaction
+from django.db.models import QuerySet, Q, F, Case, When
+
+from apps.products.models import Product
+from replication_schemas.order_processing.base import ProductItem
+
+
+class ReservationResult:
+    """
+    Result of the reservation of products for one order:
+        - failed_product_ids: Products with not enough stock (or missing products), empty if products are reserved.
+    """
+    def __init__(self, failed_product_ids: List[str]):
+        self.failed_product_ids = failed_product_ids
+
+    @property
+    def is_reserved(self) -> bool:
+        return not self.failed_product_ids
+
+
+class _ReservationConflict(Exception):
+    pass
+
+
+class StockReservationEngine:
+    """
+    Reserves products with one conditional UPDATE, which decrements the stock only if it's enough for the quantity.
+    Rows are locked only by the UPDATE itself, so concurrent orders don't wait for each other's reads.
+    Reservation of the order is all or nothing, products without enough stock are reported.
+    """
+    # How many times the reservation is retried if the stock was changed by the concurrent order
+    MAX_ATTEMPTS = 3
+
+    def __init__(self, product_queryset: QuerySet[Product]):
+        self.product_queryset = product_queryset
+
+    @staticmethod
+    def _sum_quantities(product_items: Iterable[ProductItem]) -> Dict[str, int]:
+        quantities = {}
+        for product_item in product_items:
+            product_id = product_item["product_id"]
+            quantities[product_id] = quantities.get(product_id, 0) + product_item["quantity"]
+
+        return quantities
+
+    def _decrement_stock(self, quantities: Dict[str, int]) -> None:
+        """
+        Decrements the stock of all products or none of them.
+        :raises _ReservationConflict: if any of the products doesn't have enough stock.
+        """
+        condition = Q()
+        for product_id, quantity in quantities.items():
+            condition |= Q(object_id=product_id, stock__gte=quantity)
+
+        with transaction.atomic():
+            updated_count = self.product_queryset.filter(condition).update(stock=Case(
+                *[When(object_id=product_id, then=F('stock') - quantity) for product_id, quantity in quantities.items()]
+            ))
+            if updated_count != len(quantities):
+                # Rolls back the savepoint, so products with enough stock are not reserved either
+                raise _ReservationConflict
+
+    def _get_failed_product_ids(self, quantities: Dict[str, int]) -> List[str]:
+        stocks = dict(self.product_queryset.filter(object_id__in=quantities.keys()).values_list('object_id', 'stock'))
+        return [product_id for product_id, quantity in quantities.items() if stocks.get(product_id, 0) < quantity]
+
+    def reserve(self, product_items: Iterable[ProductItem]) -> ReservationResult:
+        """
+        Reserves products of one order.
+        """
+        quantities = self._sum_quantities(product_items)
+        if not quantities:
+            return ReservationResult([])
+
+        failed_product_ids = []
+        for _ in range(self.MAX_ATTEMPTS):
+            try:
+                self._decrement_stock(quantities)
+                return ReservationResult([])
+            except _ReservationConflict:
+                failed_product_ids = self._get_failed_product_ids(quantities)
+                if failed_product_ids:
+                    return ReservationResult(failed_product_ids)
+                # The stock was replenished after the update, so the reservation is tried again
+
+        return ReservationResult(failed_product_ids or list(quantities.keys()))
+
+    def reserve_many(self, orders: List[Iterable[ProductItem]]) -> List[ReservationResult]:
+        """
+        Reserves products of many orders with one statement if there's enough stock for all of them,
+        otherwise every order is reserved separately.
+        :return: Results in the order of orders.
+        """
+        orders = [list(product_items) for product_items in orders]
+        try:
+            quantities = self._sum_quantities(
+                product_item for product_items in orders for product_item in product_items
+            )
+            if quantities:
+                self._decrement_stock(quantities)
+            return [ReservationResult([]) for _ in orders]
+        except _ReservationConflict:
+            return [self.reserve(product_items) for product_items in orders]
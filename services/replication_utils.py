@@ -1,22 +1,86 @@
-from typing import Dict, Any, List
+"""
+Replication payloads are built directly from model instances with the same fields and formats
+as the replication serializers, which are much slower for the simple flat data.
+"""
+import datetime
+from typing import Dict, Any, List, Optional
 
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from apps.addresses.models import Address
 from apps.carts.models import Cart, CartItem
-from apps.carts.replication_serializers.cart import CartReplicationSerializer
-from apps.carts.replication_serializers.cart_item import CartItemReplicationSerializer
+
+User = get_user_model()
+
+
+def format_datetime(value: Optional[datetime.datetime]) -> Optional[str]:
+    """
+    Formats the datetime like serializers.DateTimeField does.
+    """
+    if value is None:
+        return None
+
+    if timezone.is_aware(value):
+        value = timezone.localtime(value)
+
+    value = value.isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def format_date(value: Optional[datetime.date]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
 
 
 def serialize_cart_data(cart: Cart)  -> Dict[str, Any]:
-    cart_serializer = CartReplicationSerializer(instance=cart)
-    cart_data = cart_serializer.data
-    cart_data.pop("id")
-    return cart_data
+    return {
+        "cart_uuid": str(cart.cart_uuid),
+        "created_at": format_datetime(cart.created_at),
+        "updated_at": format_datetime(cart.updated_at),
+        "user": cart.user_id,
+    }
+
+def serialize_cart_item_data(cart_item: CartItem) -> Dict[str, Any]:
+    return {
+        "original_id": cart_item.id,
+        "cart": str(cart_item.cart_id),
+        "product": cart_item.product_id,
+        "quantity": cart_item.quantity,
+    }
 
 def serialize_many_cart_items(cart_items: List[CartItem]) -> List[Dict[str, Any]]:
-    cart_item_serializer = CartItemReplicationSerializer(instance=cart_items, many=True)
-    cart_items_data = []
-    for cart_item in cart_item_serializer.data:
-        cart_item["cart"] = str(cart_item["cart"])
-        cart_item["original_id"] = cart_item.pop("id")
-        cart_items_data.append(cart_item)
-
-    return cart_items_data
+    return [serialize_cart_item_data(cart_item) for cart_item in cart_items]
+
+def serialize_user_data(user: User) -> Dict[str, Any]:
+    return {
+        "original_id": user.id,
+        "last_login": format_datetime(user.last_login),
+        "is_superuser": user.is_superuser,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+        "is_staff": user.is_staff,
+        "is_active": user.is_active,
+        "date_joined": format_datetime(user.date_joined),
+        "email": user.email,
+        "date_of_birth": format_date(user.date_of_birth),
+        "sex": user.sex,
+        "phone_number": str(user.phone_number),
+    }
+
+def serialize_address_data(address: Address) -> Dict[str, Any]:
+    return {
+        "original_id": address.id,
+        "country": address.country.code or "",
+        "phone_number": str(address.phone_number),
+        "first_name": address.first_name,
+        "last_name": address.last_name,
+        "city": address.city,
+        "region": address.region,
+        "street": address.street,
+        "house_number": address.house_number,
+        "apartment_number": address.apartment_number,
+        "postal_code": address.postal_code,
+        "user": address.user_id,
+    }
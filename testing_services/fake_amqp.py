@@ -0,0 +1,170 @@
+import threading
+import time
+from typing import List, Tuple, Optional
+
+from pika.exceptions import StreamLostError
+
+
+class FakeBroker:
+    """
+    In-memory stand-in of the AMQP broker.
+    Counts opened connections and network round trips and optionally simulates the latency of each round trip.
+    """
+    # Round trips of TCP connect, Connection.Start, Connection.Open
+    CONNECT_ROUND_TRIPS = 3
+
+    def __init__(self, round_trip_latency: float = 0.0):
+        self.round_trip_latency = round_trip_latency
+        self.messages: List[Tuple[str, str, str]] = []
+        # Properties of the messages, in the same order as the messages
+        self.message_properties: List[Optional[object]] = []
+        self.declared_exchanges: List[Tuple[str, str]] = []
+        self.connections: List["FakeConnection"] = []
+        self.round_trips = 0
+
+    def round_trip(self, count: int = 1) -> None:
+        self.round_trips += count
+        if self.round_trip_latency:
+            time.sleep(self.round_trip_latency * count)
+
+    def connect(self) -> "FakeConnection":
+        self.round_trip(self.CONNECT_ROUND_TRIPS)
+        connection = FakeConnection(self)
+        self.connections.append(connection)
+        return connection
+
+    def drop_connections(self) -> None:
+        """
+        Simulates the loss of all open connections, for example after the broker's restart.
+        """
+        for connection in self.connections:
+            connection.is_open = False
+
+
+class FakeConnection:
+    def __init__(self, broker: FakeBroker):
+        self.broker = broker
+        self.is_open = True
+
+    def channel(self) -> "FakeChannel":
+        self.broker.round_trip()
+        return FakeChannel(self)
+
+    def close(self) -> None:
+        self.broker.round_trip()
+        self.is_open = False
+
+
+class FakeChannel:
+    def __init__(self, connection: FakeConnection):
+        self.connection = connection
+        self.publisher_confirms = False
+        self.transactional = False
+        self._uncommitted_messages: List[Tuple[str, str, str]] = []
+        self._uncommitted_properties: List[Optional[object]] = []
+        self._is_open = True
+
+    @property
+    def is_open(self) -> bool:
+        return self._is_open and self.connection.is_open
+
+    def _check_connection(self) -> None:
+        if not self.connection.is_open:
+            raise StreamLostError("Stream connection lost")
+
+    def confirm_delivery(self) -> None:
+        self._check_connection()
+        self.connection.broker.round_trip()
+        self.publisher_confirms = True
+
+    def tx_select(self) -> None:
+        self._check_connection()
+        self.connection.broker.round_trip()
+        self.transactional = True
+
+    def tx_commit(self) -> None:
+        self._check_connection()
+        self.connection.broker.round_trip()
+        self.connection.broker.messages.extend(self._uncommitted_messages)
+        self.connection.broker.message_properties.extend(self._uncommitted_properties)
+        self._uncommitted_messages = []
+        self._uncommitted_properties = []
+
+    def exchange_declare(self, exchange: str, exchange_type: str) -> None:
+        self._check_connection()
+        self.connection.broker.round_trip()
+        self.connection.broker.declared_exchanges.append((exchange, exchange_type))
+
+    def basic_publish(self, exchange: str, routing_key: str, body: str, properties: Optional[object] = None) -> None:
+        self._check_connection()
+        # Without publisher confirms, the message is sent without waiting for the broker's response
+        if self.publisher_confirms:
+            self.connection.broker.round_trip()
+
+        if self.transactional:
+            self._uncommitted_messages.append((exchange, routing_key, body))
+            self._uncommitted_properties.append(properties)
+        else:
+            self.connection.broker.messages.append((exchange, routing_key, body))
+            self.connection.broker.message_properties.append(properties)
+
+    def close(self) -> None:
+        self._is_open = False
+
+
+class FakeDeliveryMethod:
+    def __init__(self, routing_key: str, delivery_tag: int):
+        self.routing_key = routing_key
+        self.delivery_tag = delivery_tag
+
+
+class FakeQueueConsumer:
+    """
+    In-memory stand-in of the Consumer, which delivers the given messages to the callback
+    and records acknowledgements.
+    """
+    def __init__(self, deliveries: List[Tuple[str, str]]):
+        self.deliveries = deliveries
+        self.binding_keys: List[str] = []
+        self.prefetch_count: Optional[int] = None
+        self.acks: List[int] = []
+        self.nacks: List[int] = []
+        self._callbacks_lock = threading.Lock()
+        self._pending_callbacks: List = []
+        self._timers: List = []
+
+    def bind_queue(self, binding_key: str) -> None:
+        self.binding_keys.append(binding_key)
+
+    def set_prefetch_count(self, prefetch_count: int) -> None:
+        self.prefetch_count = prefetch_count
+
+    def add_callback_threadsafe(self, callback) -> None:
+        with self._callbacks_lock:
+            self._pending_callbacks.append(callback)
+
+    def process_callbacks(self) -> None:
+        with self._callbacks_lock:
+            callbacks, self._pending_callbacks = self._pending_callbacks, []
+
+        for callback in callbacks:
+            callback()
+
+    def call_later(self, delay: float, callback) -> None:
+        self._timers.append(callback)
+
+    def basic_ack(self, delivery_tag: int) -> None:
+        self.acks.append(delivery_tag)
+
+    def basic_nack(self, delivery_tag: int, requeue: bool = True) -> None:
+        self.nacks.append(delivery_tag)
+
+    def consume(self, callback, auto_ack: bool = True) -> None:
+        for delivery_tag, (routing_key, body) in enumerate(self.deliveries, start=1):
+            callback(self, FakeDeliveryMethod(routing_key, delivery_tag), None, body)
+            self.process_callbacks()
+
+        # Timers fire after all messages were delivered
+        timers, self._timers = self._timers, []
+        for timer in timers:
+            timer()
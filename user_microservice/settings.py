@@ -134,6 +134,55 @@ DRAMATIQ_RESULT_BACKEND = {
     }
 }
 
+# Cache
+CARTS_CACHE_URL = os.getenv("CARTS_CACHE_URL", DRAMATIQ_BROKER_URL)
+CARTS_CACHE_TIMEOUT_SECONDS = int(os.getenv("CARTS_CACHE_TIMEOUT_SECONDS", 60 * 15))
+CART_ACTIVITY_URL = os.getenv("CART_ACTIVITY_URL", CARTS_CACHE_URL)
+CART_ACTIVITY_THROTTLE_MINUTES = int(os.getenv("CART_ACTIVITY_THROTTLE_MINUTES", 5))
+CART_MERGE_QUANTITY_POLICY = os.getenv("CART_MERGE_QUANTITY_POLICY", "sum")
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Cart's short information and details
+    "carts": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": CARTS_CACHE_URL,
+        "TIMEOUT": CARTS_CACHE_TIMEOUT_SECONDS,
+        "KEY_PREFIX": "carts",
+    },
+}
+
+# Recently viewed items
+# Views are buffered in Redis and written to the database by the periodic job instead of every request
+RECENTLY_VIEWED_WRITE_BEHIND = bool(int(os.getenv("RECENTLY_VIEWED_WRITE_BEHIND", 0)))
+RECENTLY_VIEWED_BUFFER_URL = os.getenv("RECENTLY_VIEWED_BUFFER_URL", DRAMATIQ_BROKER_URL)
+# Retention of the users' history, 0 disables the limit
+HISTORY_RETENTION_DAYS = int(os.getenv("HISTORY_RETENTION_DAYS", 0))
+HISTORY_RETENTION_MAX_ITEMS_PER_USER = int(os.getenv("HISTORY_RETENTION_MAX_ITEMS_PER_USER", 0))
+HISTORY_PRUNING_BATCH_SIZE = int(os.getenv("HISTORY_PRUNING_BATCH_SIZE", 1000))
+
+# Password hashing
+# New passwords are hashed by the selected hasher, hashes of other hashers are rehashed on login
+PASSWORD_HASHER = os.getenv("PASSWORD_HASHER", "pbkdf2")
+# Costs of the hashers, 0 keeps the default of Django
+PASSWORD_HASHER_PBKDF2_ITERATIONS = int(os.getenv("PASSWORD_HASHER_PBKDF2_ITERATIONS", 0))
+PASSWORD_HASHER_SCRYPT_WORK_FACTOR = int(os.getenv("PASSWORD_HASHER_SCRYPT_WORK_FACTOR", 0))
+PASSWORD_HASHER_ARGON2_MEMORY_COST = int(os.getenv("PASSWORD_HASHER_ARGON2_MEMORY_COST", 0))
+PASSWORD_HASHER_PARALLELISM = int(os.getenv("PASSWORD_HASHER_PARALLELISM", 0))
+
+PASSWORD_HASHER_PROFILES = {
+    "pbkdf2": "apps.accounts.hashers.TunedPBKDF2PasswordHasher",
+    "scrypt": "apps.accounts.hashers.TunedScryptPasswordHasher",
+    "argon2": "apps.accounts.hashers.TunedArgon2PasswordHasher",
+}
+PASSWORD_HASHERS = [
+    PASSWORD_HASHER_PROFILES[PASSWORD_HASHER],
+    *[hasher for name, hasher in PASSWORD_HASHER_PROFILES.items() if name != PASSWORD_HASHER],
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -193,6 +242,7 @@ SIMPLE_JWT = {
 
 FLUSH_EXPIRED_TOKEN_INTERVAL_HOURS = int(os.getenv("FLUSH_EXPIRED_TOKEN_PERIOD_HOURS", 24))
 DELETE_INACTIVE_CARTS_PERIOD_DAYS = int(os.getenv("DELETE_INACTIVE_CARTS_PERIOD_DAYS", 1))
+DELETE_INACTIVE_CARTS_CHUNK_SIZE = int(os.getenv("DELETE_INACTIVE_CARTS_CHUNK_SIZE", 1000))
 
 CORS_ALLOWED_ORIGINS = os.getenv("CORS_ALLOWED_ORIGINS").split(",")
 
@@ -217,3 +267,46 @@ AMPQ_CONNECTION_URL = os.getenv("AMPQ_CONNECTION_URL")
 PRODUCT_CRUD_EXCHANGE_TOPIC_NAME = os.getenv("PRODUCT_CRUD_EXCHANGE_TOPIC_NAME")
 USERS_DATA_CRUD_EXCHANGE_TOPIC_NAME = os.getenv("USERS_DATA_CRUD_EXCHANGE_TOPIC_NAME")
 ORDER_PROCESSING_EXCHANGE_TOPIC_NAME = os.getenv("ORDER_PROCESSING_EXCHANGE_TOPIC_NAME")
+# How many times the publisher reconnects to the broker before giving up
+AMPQ_PUBLISHER_RETRIES = int(os.getenv("AMPQ_PUBLISHER_RETRIES", 1))
+# Content type of published replication messages: application/json or application/msgpack
+REPLICATION_CONTENT_TYPE = os.getenv("REPLICATION_CONTENT_TYPE", "application/json")
+
+# Queue listener settings
+# Number of threads which handle messages with different ordering keys (for example, different products) concurrently
+QUEUE_LISTENER_WORKERS = int(os.getenv("QUEUE_LISTENER_WORKERS", 4))
+# Maximum number of messages delivered to the listener and not acknowledged yet
+QUEUE_LISTENER_PREFETCH_COUNT = int(os.getenv("QUEUE_LISTENER_PREFETCH_COUNT", 50))
+# Maximum number of product messages applied to the database at once, 1 disables batching.
+# The prefetch count must not be less than the batch size
+PRODUCT_QUEUE_LISTENER_BATCH_SIZE = int(os.getenv("PRODUCT_QUEUE_LISTENER_BATCH_SIZE", 1))
+# How long product messages are collected before they are applied to the database
+PRODUCT_QUEUE_LISTENER_BATCH_WINDOW_MS = int(os.getenv("PRODUCT_QUEUE_LISTENER_BATCH_WINDOW_MS", 100))
+# Maximum number of orders whose products are reserved with one statement, 1 disables batching
+ORDER_QUEUE_LISTENER_BATCH_SIZE = int(os.getenv("ORDER_QUEUE_LISTENER_BATCH_SIZE", 1))
+# How long reservations of orders are collected before they are applied to the database
+ORDER_QUEUE_LISTENER_BATCH_WINDOW_MS = int(os.getenv("ORDER_QUEUE_LISTENER_BATCH_WINDOW_MS", 20))
+# How long identifiers of handled messages are kept to skip redelivered messages
+PROCESSED_MESSAGES_RETENTION_DAYS = int(os.getenv("PROCESSED_MESSAGES_RETENTION_DAYS", 7))
+
+# Outbox relay settings
+# Maximum number of replication events published at once
+OUTBOX_RELAY_BATCH_SIZE = int(os.getenv("OUTBOX_RELAY_BATCH_SIZE", 500))
+# How long the relay waits for new events when the outbox is drained
+OUTBOX_RELAY_POLL_INTERVAL_SECONDS = float(os.getenv("OUTBOX_RELAY_POLL_INTERVAL_SECONDS", 0.5))
+# How long creations and updates of cart items are collected before they are published
+# as one "users.cart_items.upsert.many" message per cart. 0 disables coalescing,
+# enable it only when all consumers handle "users.cart_items.upsert.many"
+CART_ITEM_EVENTS_COALESCING_WINDOW_MS = int(os.getenv("CART_ITEM_EVENTS_COALESCING_WINDOW_MS", 0))
+# Whether changes of many cart items of one cart are published as one "users.cart_items.batch" message,
+# enable it only when all consumers handle "users.cart_items.batch"
+CART_ITEM_BATCH_EVENTS = bool(int(os.getenv("CART_ITEM_BATCH_EVENTS", 0)))
+# How replication events get from the outbox to the broker:
+# "outbox" - only by the outbox relay process, "direct" - also by the background thread of the web process
+# right after the commit, events the web process was unable to publish are published by the outbox relay process
+# and by the Dramatiq task sent as the fallback
+REPLICATION_TRANSPORT = os.getenv("REPLICATION_TRANSPORT", "outbox")
+
+# Number of products written with one statement by the bulk ingestion of product replication messages
+# and by attaching products to events
+PRODUCTS_BULK_INGESTION_CHUNK_SIZE = int(os.getenv("PRODUCTS_BULK_INGESTION_CHUNK_SIZE", 1000))